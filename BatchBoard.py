@@ -0,0 +1,252 @@
+from BitBoard import BitBoard, SQUARE_OF, POSITION_OF, NW, NE, SW, SE, DIRECTIONS
+
+try:
+    import numpy as np
+except ImportError:
+    # optional dependency, only needed for batched self-play
+    np = None
+
+# piece codes: the sign is the color (Black positive, White negative), the magnitude the type
+EMPTY = 0
+REGULAR = 1
+KING = 2
+TRIPLE_KING = 3
+# turn codes
+BLACK = 1
+WHITE = -1
+# (row, column) step of each BitBoard direction
+STEPS = {NW: (-1, -1), NE: (-1, 1), SW: (1, -1), SE: (1, 1)}
+# index used for squares off the board in the lookup tables
+OFF_BOARD = 32
+
+
+class BatchBoard:
+    """Many checkers positions held as NumPy arrays for self-play data generation: an int8 array of shape [N, 32]
+    with one piece code per dark square (same numbering as BitBoard) and an int8 array of N turn codes.
+    Legal-move masks, capture availability and piece counts are computed for the whole batch at once from
+    precomputed neighbor and ray tables, following the same rules as BitBoard and Token. Masks are bool arrays
+    of shape [N, 32, 4]: entry [n, s, d] is True when the piece on square s of position n can start a move
+    in direction d (NW, NE, SW, SE). Needs NumPy"""
+    def __init__(self, squares, turns):
+        if np is None:
+            raise ImportError("BatchBoard needs NumPy: pip install numpy")
+        self._squares = np.asarray(squares, dtype=np.int8)
+        self._turns = np.asarray(turns, dtype=np.int8)
+
+    @classmethod
+    def start_positions(cls, size):
+        """
+        Returns a batch of size copies of the starting position, Black to move
+
+        :param size: Int
+        :return: BatchBoard object
+        """
+        return cls.from_bitboards([BitBoard.start_position()] * size)
+
+    @classmethod
+    def from_bitboards(cls, boards):
+        """
+        Builds a batch from a list of BitBoard positions
+
+        :param boards: List of BitBoard objects
+        :return: BatchBoard object
+        """
+        if np is None:
+            raise ImportError("BatchBoard needs NumPy: pip install numpy")
+        masks = np.array([board.get_masks() for board in boards], dtype=np.uint64).reshape(-1, 4)
+        bits = ((masks[:, :, None] >> np.arange(32, dtype=np.uint64)) & np.uint64(1)).astype(np.int8)
+        black, white, kings, triple_kings = bits[:, 0], bits[:, 1], bits[:, 2], bits[:, 3]
+        squares = (black - white) * (REGULAR + kings + 2 * triple_kings)
+        turns = [BLACK if board.get_turn() == "Black" else WHITE for board in boards]
+        return cls(squares, turns)
+
+    def get_size(self):
+        """
+        Returns the number of positions in the batch
+
+        :return: Int
+        """
+        return len(self._squares)
+
+    def get_squares(self):
+        """
+        Returns the [N, 32] piece code array. Changes to it change the batch
+
+        :return: NumPy array
+        """
+        return self._squares
+
+    def get_turns(self):
+        """
+        Returns the array of turn codes (BLACK or WHITE). Changes to it change the batch
+
+        :return: NumPy array
+        """
+        return self._turns
+
+    def to_bitboard(self, index):
+        """
+        Returns one position of the batch as a BitBoard, e.g. to expand its full capture sequences and play one
+
+        :param index: Int
+        :return: BitBoard object
+        """
+        row = self._squares[index]
+        masks = [0, 0, 0, 0]
+        for square in np.flatnonzero(row):
+            bit = 1 << int(square)
+            masks[0 if row[square] > 0 else 1] |= bit
+            if abs(row[square]) == KING:
+                masks[2] |= bit
+            elif abs(row[square]) == TRIPLE_KING:
+                masks[3] |= bit
+        return BitBoard(*masks, turn="Black" if self._turns[index] == BLACK else "White")
+
+    def set_bitboard(self, index, board):
+        """
+        Overwrites one position of the batch, e.g. after playing a move on it as a BitBoard
+
+        :param index: Int
+        :param board: BitBoard object
+        :return: None
+        """
+        single = BatchBoard.from_bitboards([board])
+        self._squares[index] = single.get_squares()[0]
+        self._turns[index] = single.get_turns()[0]
+
+    def piece_counts(self):
+        """
+        Returns the number of pieces of each color in every position
+
+        :return: NumPy array of shape [N, 2], Black then White
+        """
+        return np.stack([(self._squares > 0).sum(axis=1), (self._squares < 0).sum(axis=1)], axis=1)
+
+    def _sides(self):
+        """
+        Returns bool arrays of the side to move's pieces, the opponent's pieces and the empty squares, each
+        with an extra always False column at index OFF_BOARD so the lookup tables can point off the board
+
+        :return: Tuple of NumPy arrays of shape [N, 33]
+        """
+        signed = self._squares * self._turns[:, None]
+        edge = np.zeros((len(signed), 1), dtype=bool)
+        own = np.concatenate([signed > 0, edge], axis=1)
+        foe = np.concatenate([signed < 0, edge], axis=1)
+        empty = np.concatenate([signed == 0, edge], axis=1)
+        return own, foe, empty
+
+    def _kinds(self):
+        """
+        Returns bool arrays marking regular, King and TripleKing pieces, shaped to broadcast over directions
+
+        :return: Tuple of NumPy arrays of shape [N, 32, 1]
+        """
+        kinds = np.abs(self._squares)[:, :, None]
+        return kinds == REGULAR, kinds == KING, kinds == TRIPLE_KING
+
+    def _forward(self):
+        """
+        Returns the directions regular pieces of the side to move may go in
+
+        :return: NumPy bool array of shape [N, 1, 4]
+        """
+        return FORWARD_MASK[(self._turns == WHITE).astype(np.intp)][:, None, :]
+
+    def simple_mask(self):
+        """
+        Returns where a piece of the side to move can step onto an adjacent empty square: Regular pieces
+        forward, Kings and TripleKings in any direction
+
+        :return: NumPy bool array of shape [N, 32, 4]
+        """
+        own, foe, empty = self._sides()
+        regular, king, triple_king = self._kinds()
+        allowed = ~regular | self._forward()
+        return own[:, :OFF_BOARD, None] & allowed & empty[:, NEIGHBORS]
+
+    def capture_mask(self):
+        """
+        Returns where a piece of the side to move can start a capture.
+        Regular: adjacent foe forward with the square behind it empty.
+        King: the first piece along the diagonal is a foe with an empty square right behind it.
+        TripleKing: an empty square along the diagonal after one or two foes, friendly pieces passed over.
+
+        :return: NumPy bool array of shape [N, 32, 4]
+        """
+        own, foe, empty = self._sides()
+        regular, king, triple_king = self._kinds()
+        captures = regular & self._forward() & foe[:, NEIGHBORS] & empty[:, JUMPS]
+
+        ray_foe = foe[:, RAYS]
+        ray_empty = empty[:, RAYS]
+        # every ray ends on OFF_BOARD, which is never empty, so each has an occupied square
+        first = np.argmax(~ray_empty, axis=-1)[..., None]
+        behind = np.minimum(first + 1, RAYS.shape[-1] - 1)
+        king_captures = (np.take_along_axis(ray_foe, first, axis=-1)
+                         & np.take_along_axis(ray_empty, behind, axis=-1))[..., 0]
+        foes_passed = np.cumsum(ray_foe, axis=-1, dtype=np.int8)
+        triple_captures = (ray_empty & (foes_passed >= 1) & (foes_passed <= 2)).any(axis=-1)
+
+        captures |= (king & king_captures) | (triple_king & triple_captures)
+        return own[:, :OFF_BOARD, None] & captures
+
+    def has_captures(self):
+        """
+        Returns whether the side to move has a capture in each position
+
+        :return: NumPy bool array of shape [N]
+        """
+        return self.capture_mask().any(axis=(1, 2))
+
+    def legal_mask(self):
+        """
+        Returns the first step of every legal move. Captures are mandatory, so positions with a capture only
+        get their capture mask
+
+        :return: NumPy bool array of shape [N, 32, 4]
+        """
+        captures = self.capture_mask()
+        forced = captures.any(axis=(1, 2))
+        return np.where(forced[:, None, None], captures, self.simple_mask())
+
+    def winners(self):
+        """
+        Returns the winner of each position: the opponent's turn code if the side to move has no pieces or no
+        legal move, otherwise 0
+
+        :return: NumPy int8 array of shape [N]
+        """
+        stuck = ~self.legal_mask().any(axis=(1, 2))
+        return np.where(stuck, -self._turns, 0).astype(np.int8)
+
+
+def build_tables():
+    """
+    Builds the lookup tables of square indices: NEIGHBORS [32, 4] the adjacent square in each direction,
+    JUMPS [32, 4] the square two steps away, RAYS [32, 4, 8] every square along each diagonal. Squares past
+    the edge are OFF_BOARD, and every ray ends with at least one
+
+    :return: Tuple of NumPy arrays
+    """
+    neighbors = np.full((32, 4), OFF_BOARD, dtype=np.intp)
+    jumps = np.full((32, 4), OFF_BOARD, dtype=np.intp)
+    rays = np.full((32, 4, 8), OFF_BOARD, dtype=np.intp)
+    for square, (row, column) in enumerate(POSITION_OF):
+        for direction in DIRECTIONS:
+            row_step, column_step = STEPS[direction]
+            for distance in range(1, 8):
+                position = (row + distance * row_step, column + distance * column_step)
+                if position not in SQUARE_OF:
+                    break
+                rays[square, direction, distance - 1] = SQUARE_OF[position]
+            neighbors[square, direction] = rays[square, direction, 0]
+            jumps[square, direction] = rays[square, direction, 1]
+    return neighbors, jumps, rays
+
+
+if np is not None:
+    NEIGHBORS, JUMPS, RAYS = build_tables()
+    # forward directions for regular pieces, row 0 for Black (up the board), row 1 for White
+    FORWARD_MASK = np.array([[direction in (NW, NE) for direction in DIRECTIONS],
+                             [direction in (SW, SE) for direction in DIRECTIONS]])
@@ -0,0 +1,310 @@
+import argparse
+import contextlib
+import io
+import json
+import platform
+import sys
+import time
+from CheckersGame import Checkers
+from Perft import perft, perft_bitboard, load_fixtures, from_fixture
+from Simulator import RandomBot, play_one
+
+# seed of the random game the fixed positions and move sequences come from
+SEED = 1234
+# plies played to reach the fixed middle game position
+PLIES = 20
+# depth of the perft benchmarks, from the starting position
+PERFT_DEPTH = 4
+
+
+def seeded_moves(plies=PLIES, seed=SEED):
+    """
+    Plays random legal moves from the starting position and returns them, so every run times the same games
+
+    :param plies: Int
+    :param seed: Int
+    :return: List of (player name, move) tuples, the players being named after their colors
+    """
+    game = new_game()
+    bot = RandomBot(seed)
+    moves = []
+    for ply in range(plies):
+        move = bot.choose_move(game)
+        if move is None:
+            break
+        moves.append((game.get_turn(), move))
+        game.play_move(game.get_turn(), move)
+    return moves
+
+
+def new_game(backend="objects"):
+    """
+    Returns a game at the starting position with players "Black" and "White"
+
+    :param backend: String, Checkers backend
+    :return: Checkers object
+    """
+    game = Checkers(backend=backend)
+    game.create_player("Black", "Black")
+    game.create_player("White", "White")
+    return game
+
+
+def middle_game():
+    """
+    Returns the game after the seeded moves, with a mix of pieces and open squares
+
+    :return: Checkers object
+    """
+    game = new_game()
+    for player, move in seeded_moves():
+        game.play_move(player, move)
+    return game
+
+
+def bench_possible_moves():
+    """Token.get_possible_moves for every token of the middle game position"""
+    game = middle_game()
+    tokens = game.get_black_tokens() + game.get_white_tokens()
+
+    def call(prepared):
+        for token in tokens:
+            token.get_possible_moves()
+    return None, call
+
+
+def bench_possible_jumps():
+    """Token.possible_jumps for every token of the middle game position"""
+    game = middle_game()
+    board = game.get_board_codes()
+    tokens = game.get_black_tokens() + game.get_white_tokens()
+
+    def call(prepared):
+        for token in tokens:
+            token.possible_jumps(token.get_possible_moves(), board)
+    return None, call
+
+
+def bench_play_game():
+    """Checkers.play_game over the seeded opening moves, from a fresh game each call"""
+    steps = [(player, move[index], move[index + 1]) for player, move in seeded_moves()
+             for index in range(len(move) - 1)]
+
+    def call(game):
+        for player, start, destination in steps:
+            game.play_game(player, start, destination)
+    return new_game, call
+
+
+def bench_bitboard_play_game():
+    """The play_game benchmark on Checkers(backend="bitboard"), to compare with play_game"""
+    prepare, call = bench_play_game()
+    return lambda: new_game("bitboard"), call
+
+
+def bench_checker_details():
+    """Checkers.get_checker_details for all 64 squares of the middle game position"""
+    game = middle_game()
+    squares = [(row, column) for row in range(8) for column in range(8)]
+
+    def call(prepared):
+        for square in squares:
+            game.get_checker_details(square)
+    return None, call
+
+
+def bench_print_color_board():
+    """Checkers.print_color_board of the middle game position, written to memory instead of the terminal"""
+    game = middle_game()
+
+    def call(output):
+        with contextlib.redirect_stdout(output):
+            game.print_color_board()
+    return io.StringIO, call
+
+
+def bench_full_game():
+    """A full game between two seeded random bots"""
+    def call(prepared):
+        play_one(RandomBot(SEED), RandomBot(SEED + 1), 200, backend="objects")
+    return None, call
+
+
+def bench_bitboard_full_game():
+    """The same game on Checkers(backend="bitboard"), to compare with full_game"""
+    def call(prepared):
+        play_one(RandomBot(SEED), RandomBot(SEED + 1), 200, backend="bitboard")
+    return None, call
+
+
+def fixture_board(name):
+    """
+    Returns the BitBoard of a perft fixture position
+
+    :param name: String, the fixture's name
+    :return: BitBoard object
+    """
+    for entry in load_fixtures():
+        if entry["name"] == name:
+            return from_fixture(entry)
+    raise KeyError(name)
+
+
+def bench_legal_moves():
+    """Checkers.legal_moves of the perft captures fixture, where several pieces have capture sequences"""
+    game = Checkers.from_bitboard(fixture_board("captures"))
+
+    def call(prepared):
+        game.legal_moves()
+    return None, call
+
+
+def bench_bitboard_legal_moves():
+    """BitBoard.legal_moves of the same captures fixture, to compare with legal_moves"""
+    board = fixture_board("captures")
+
+    def call(prepared):
+        board.legal_moves()
+    return None, call
+
+
+def bench_perft():
+    """Perft from the starting position with Checkers make_move/unmake_move"""
+    board = fixture_board("start")
+
+    def call(game):
+        perft(game, PERFT_DEPTH)
+    return lambda: Checkers.from_bitboard(board), call
+
+
+def bench_backend_perft():
+    """Perft from the starting position with make_move/unmake_move of Checkers(backend="bitboard")"""
+    board = fixture_board("start")
+
+    def call(game):
+        perft(game, PERFT_DEPTH)
+    return lambda: Checkers.from_bitboard(board, backend="bitboard"), call
+
+
+def bench_bitboard_perft():
+    """Perft from the starting position on a BitBoard, to compare with perft"""
+    board = fixture_board("start")
+
+    def call(prepared):
+        perft_bitboard(board.copy(), PERFT_DEPTH)
+    return None, call
+
+
+BENCHMARKS = {
+    "get_possible_moves": bench_possible_moves,
+    "possible_jumps": bench_possible_jumps,
+    "play_game": bench_play_game,
+    "bitboard_play_game": bench_bitboard_play_game,
+    "get_checker_details": bench_checker_details,
+    "print_color_board": bench_print_color_board,
+    "full_game": bench_full_game,
+    "bitboard_full_game": bench_bitboard_full_game,
+    "legal_moves": bench_legal_moves,
+    "bitboard_legal_moves": bench_bitboard_legal_moves,
+    "perft": bench_perft,
+    "backend_perft": bench_backend_perft,
+    "bitboard_perft": bench_bitboard_perft,
+}
+
+
+def time_benchmark(name, repeat=5, number=None):
+    """
+    Times one benchmark. Each call gets a fresh argument from the benchmark's prepare step, which isn't timed.
+    With no number given, calls are added until a repeat takes about 0.1 seconds
+
+    :param name: String, a key of BENCHMARKS
+    :param repeat: Int
+    :param number: Int calls per repeat or None
+    :return: Dictionary with the best seconds per call over the repeats and the calls per repeat
+    """
+    prepare, call = BENCHMARKS[name]()
+    if number is None:
+        number = 1
+        while measure(prepare, call, number) < 0.1 and number < 100000:
+            number *= 2
+    best = min(measure(prepare, call, number) for attempt in range(repeat))
+    return {"seconds": best / number, "number": number}
+
+
+def measure(prepare, call, number):
+    """
+    Returns the total seconds spent in number calls, leaving out the prepare step
+
+    :param prepare: Function returning the argument for one call, or None
+    :param call: Function of one argument
+    :param number: Int
+    :return: Float
+    """
+    total = 0.0
+    for attempt in range(number):
+        prepared = prepare() if prepare is not None else None
+        start = time.perf_counter()
+        call(prepared)
+        total += time.perf_counter() - start
+    return total
+
+
+def run_benchmarks(names=None, repeat=5, number=None):
+    """
+    Times the given benchmarks, all of them by default
+
+    :param names: List of strings or None
+    :param repeat: Int
+    :param number: Int or None
+    :return: Dictionary report, as saved to JSON
+    """
+    results = {}
+    for name in names or BENCHMARKS:
+        results[name] = time_benchmark(name, repeat, number)
+    return {"python": platform.python_version(), "created": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "repeat": repeat, "results": results}
+
+
+def compare(baseline, current, threshold=0.1):
+    """
+    Compares two reports and returns the benchmarks that got slower by more than threshold (0.1 = 10%)
+
+    :param baseline: Dictionary report
+    :param current: Dictionary report
+    :param threshold: Float
+    :return: List of (name, baseline seconds, current seconds, ratio) tuples
+    """
+    regressions = []
+    for name, result in current["results"].items():
+        if name not in baseline["results"]:
+            continue
+        before = baseline["results"][name]["seconds"]
+        ratio = result["seconds"] / before if before else 1.0
+        if ratio > 1 + threshold:
+            regressions.append((name, before, result["seconds"], ratio))
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Time the hot entry points on fixed seeded positions")
+    parser.add_argument("names", nargs="*", help="benchmarks to run, all by default: " + ", ".join(BENCHMARKS))
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output", help="save the results to this JSON file")
+    parser.add_argument("--compare", help="baseline JSON file to check the results against")
+    parser.add_argument("--threshold", type=float, default=0.1, help="allowed slowdown, 0.1 = 10%%")
+    options = parser.parse_args()
+
+    report = run_benchmarks(options.names, options.repeat)
+    for name, result in report["results"].items():
+        print(name.ljust(22), round(result["seconds"] * 1e6, 2), "us per call")
+    if options.output:
+        with open(options.output, "w") as output:
+            json.dump(report, output, indent=2)
+    if options.compare:
+        with open(options.compare) as baseline_file:
+            regressions = compare(json.load(baseline_file), report, options.threshold)
+        for name, before, after, ratio in regressions:
+            print("REGRESSION", name, round(before * 1e6, 2), "->", round(after * 1e6, 2), "us", "(x" +
+                  str(round(ratio, 2)) + ")")
+        if regressions:
+            sys.exit(1)
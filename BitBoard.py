@@ -0,0 +1,591 @@
+from Codes import BLACK, WHITE, REGULAR, KING, TRIPLE_KING, COLOR_NAMES, TYPE_NAMES, COLOR_CODES, OPPONENT
+
+
+class BitBoard:
+    """Compact game-state backend for checkers. The 32 playable squares are packed into integer masks (black, white,
+    kings, triple kings) and moves and captures are generated with shifts and masks instead of walking the
+    list of lists board square by square. Square n is the nth dark square counting row by row from the top left.
+    Kings are only flagged in the kings mask and triple kings only in the triple_kings mask. The turn and piece
+    types are handled as Color and PieceType codes, the string accessors translate them"""
+    def __init__(self, black=0, white=0, kings=0, triple_kings=0, turn="Black"):
+        self._black = black
+        self._white = white
+        self._kings = kings
+        self._triple_kings = triple_kings
+        # accepts "Black"/"White" or a Color code
+        self._turn = COLOR_CODES[turn]
+
+    @classmethod
+    def start_position(cls):
+        """
+        Returns a BitBoard with the same layout CheckerBoard.start_setup uses: White on the top three rows,
+        Black on the bottom three, Black to move
+
+        :return: BitBoard object
+        """
+        return cls(black=ROW_MASKS[5] | ROW_MASKS[6] | ROW_MASKS[7], white=ROW_MASKS[0] | ROW_MASKS[1] | ROW_MASKS[2])
+
+    @classmethod
+    def from_checkers(cls, game):
+        """
+        Builds a BitBoard from the tokens and turn of a Checkers game
+
+        :param game: Checkers object
+        :return: BitBoard object
+        """
+        return cls.from_tokens(game.get_black_tokens() + game.get_white_tokens(), game.get_turn_code())
+
+    @classmethod
+    def from_tokens(cls, tokens, turn):
+        """
+        Builds a BitBoard from Token objects and the color to move
+
+        :param tokens: Iterable of Token objects
+        :param turn: "Black" or "White", or a Color code
+        :return: BitBoard object
+        """
+        # black, white, kings, triple_kings: indexed by Color code, then PieceType code + 1
+        masks = [0, 0, 0, 0]
+        for token in tokens:
+            bit = 1 << SQUARE_OF[token.get_position()]
+            masks[token.get_color_code()] |= bit
+            if token.get_type_code() != REGULAR:
+                masks[token.get_type_code() + 1] |= bit
+        return cls(masks[0], masks[1], masks[2], masks[3], turn)
+
+    def copy(self):
+        """
+        Returns an independent copy of this position
+
+        :return: BitBoard object
+        """
+        return BitBoard(self._black, self._white, self._kings, self._triple_kings, self._turn)
+
+    def key(self):
+        """
+        Returns the position as a hashable tuple (black, white, kings, triple_kings, turn code)
+
+        :return: Tuple
+        """
+        return self._black, self._white, self._kings, self._triple_kings, self._turn
+
+    def restore(self, key):
+        """
+        Resets this position from a tuple returned by key()
+
+        :param key: Tuple
+        :return: None
+        """
+        self._black, self._white, self._kings, self._triple_kings, self._turn = key
+
+    def get_turn(self):
+        """
+        Get method to return the color to move
+
+        :return: "Black" or "White"
+        """
+        return COLOR_NAMES[self._turn]
+
+    def get_turn_code(self):
+        """
+        Get method to return the color to move as a Color code
+
+        :return: Int
+        """
+        return self._turn
+
+    def get_masks(self):
+        """
+        Returns the raw piece masks
+
+        :return: Tuple (black, white, kings, triple_kings)
+        """
+        return self._black, self._white, self._kings, self._triple_kings
+
+    def piece_count(self, color):
+        """
+        Returns the number of pieces the given color has on the board
+
+        :param color: "Black" or "White", or a Color code
+        :return: Int
+        """
+        if COLOR_CODES[color] == BLACK:
+            return bin(self._black).count("1")
+        return bin(self._white).count("1")
+
+    def get_piece(self, position):
+        """
+        Returns the (color, type) of the piece on a position, or None if the square is empty
+
+        :param position: Tuple (row, column)
+        :return: Tuple (String, String) or None
+        """
+        piece = self.piece_codes(SQUARE_OF[position])
+        if piece is None:
+            return None
+        return COLOR_NAMES[piece[0]], TYPE_NAMES[piece[1]]
+
+    def piece_codes(self, square):
+        """
+        Returns the (color, type) codes of the piece on a square, or None if it is empty
+
+        :param square: Int square index
+        :return: Tuple (Int, Int) or None
+        """
+        bit = 1 << square
+        if self._black & bit:
+            color = BLACK
+        elif self._white & bit:
+            color = WHITE
+        else:
+            return None
+        return color, self._kind(bit)
+
+    def to_board(self):
+        """
+        Returns the position in the list of lists form get_board_dm returns: None for white squares, "OK" for empty
+        dark squares, otherwise the color of the piece
+
+        :return: Array of arrays
+        """
+        board = []
+        for row in range(8):
+            whole_row = []
+            for column in range(8):
+                if (row + column) % 2 == 0:
+                    whole_row.append(None)
+                    continue
+                bit = 1 << SQUARE_OF[(row, column)]
+                if self._black & bit:
+                    whole_row.append("Black")
+                elif self._white & bit:
+                    whole_row.append("White")
+                else:
+                    whole_row.append("OK")
+            board.append(whole_row)
+        return board
+
+    def _sides(self):
+        """
+        Returns the masks of the side to move and its opponent
+
+        :return: Tuple (own, foe)
+        """
+        if self._turn == BLACK:
+            return self._black, self._white
+        return self._white, self._black
+
+    def _kind(self, bit):
+        """
+        Returns the type of the piece on a single bit mask
+
+        :param bit: Int
+        :return: PieceType code
+        """
+        if self._triple_kings & bit:
+            return TRIPLE_KING
+        if self._kings & bit:
+            return KING
+        return REGULAR
+
+    def simple_moves(self):
+        """
+        Returns every non capture move for the side to move as (path, captured) pairs with an empty capture mask.
+        Regular pieces step forward, Kings and TripleKings one square in any direction
+
+        :return: List of tuples
+        """
+        own, foe = self._sides()
+        empty = ~(self._black | self._white) & FULL
+        kings = own & (self._kings | self._triple_kings)
+        regulars = own & ~kings
+        forward = FORWARD[self._turn]
+        moves = []
+        for direction in DIRECTIONS:
+            movers = kings | regulars if direction in forward else kings
+            targets = SHIFTS[direction](movers) & empty
+            sources = STEPS[OPPOSITE[direction]]
+            while targets:
+                low = targets & -targets
+                targets ^= low
+                square = low.bit_length() - 1
+                moves.append(((sources[square], square), 0))
+        return moves
+
+    def has_captures(self):
+        """
+        Returns True if the side to move has at least one capture available
+
+        :return: Bool
+        """
+        own, foe = self._sides()
+        empty = ~(self._black | self._white) & FULL
+        if jumpers(own & ~(self._kings | self._triple_kings), self._turn, foe, empty):
+            return True
+        pieces = own & (self._kings | self._triple_kings)
+        while pieces:
+            low = pieces & -pieces
+            pieces ^= low
+            if hops(low, self._kind(low), self._turn, foe, empty | low):
+                return True
+        return False
+
+    def capture_moves(self):
+        """
+        Returns every complete capture sequence for the side to move as (path, captured) pairs. A sequence only
+        ends when the capturing piece has no further jump, promoting along the way the same way play_game does.
+        Regular pieces are expanded only when the bulk test finds a jump for them
+
+        :return: List of tuples
+        """
+        own, foe = self._sides()
+        empty = ~(self._black | self._white) & FULL
+        kings = own & (self._kings | self._triple_kings)
+        moves = []
+        pieces = kings | jumpers(own & ~kings, self._turn, foe, empty)
+        while pieces:
+            low = pieces & -pieces
+            pieces ^= low
+            chains(low, self._kind(low), self._turn, foe, empty | low, [low.bit_length() - 1], 0, moves)
+        return moves
+
+    def legal_moves(self):
+        """
+        Returns all legal moves for the side to move. Captures are mandatory, so simple moves are only
+        returned when no capture is available
+
+        :return: List of (path, captured) tuples, path being square indices
+        """
+        # captures are generated once, capture_moves only expands the pieces that have a jump
+        moves = self.capture_moves()
+        if moves:
+            return moves
+        return self.simple_moves()
+
+    def play(self, move):
+        """
+        Applies a (path, captured) move from legal_moves in place, promoting the piece and passing the turn
+
+        :param move: Tuple (path, captured)
+        :return: PieceType code the piece ends the move as
+        """
+        kind = self.apply(move)
+        self._turn = OPPONENT[self._turn]
+        return kind
+
+    def apply(self, move):
+        """
+        Moves the piece of the side to move along a (path, captured) move and takes the captured pieces off,
+        promoting the piece on the way, without passing the turn. Used for the single steps of play_game
+
+        :param move: Tuple (path, captured)
+        :return: PieceType code the piece ends the move as
+        """
+        path, captured = move
+        start = 1 << path[0]
+        end = 1 << path[-1]
+        kind = self._kind(start)
+        for square in path[1:]:
+            kind = promote(kind, self._turn, square)
+        keep = ~(start | captured)
+        self._kings &= keep
+        self._triple_kings &= keep
+        if self._turn == BLACK:
+            self._black = (self._black & keep) | end
+            self._white &= keep
+        else:
+            self._white = (self._white & keep) | end
+            self._black &= keep
+        if kind == KING:
+            self._kings |= end
+        elif kind == TRIPLE_KING:
+            self._triple_kings |= end
+        return kind
+
+    def pass_turn(self):
+        """
+        Gives the move to the other side
+
+        :return: None
+        """
+        self._turn = OPPONENT[self._turn]
+
+    def remove(self, mask):
+        """
+        Takes the pieces on the squares of a mask off the board
+
+        :param mask: Int
+        :return: None
+        """
+        keep = ~mask
+        self._black &= keep
+        self._white &= keep
+        self._kings &= keep
+        self._triple_kings &= keep
+
+    def winner(self):
+        """
+        Returns the winning color when the side to move has no pieces or no legal moves, otherwise None
+
+        :return: "Black", "White" or None
+        """
+        own, foe = self._sides()
+        if own and self.legal_moves():
+            return None
+        return COLOR_NAMES[OPPONENT[self._turn]]
+
+    @staticmethod
+    def move_positions(move):
+        """
+        Translates a (path, captured) move into the list of (row, column) squares play_game expects
+
+        :param move: Tuple (path, captured)
+        :return: List of tuples
+        """
+        return [POSITION_OF[square] for square in move[0]]
+
+
+def shift(mask, direction):
+    """
+    Moves every bit of a mask one diagonal step in the given direction, dropping bits that leave the board.
+    Loops that shift in a known direction call the SHIFTS entry directly
+
+    :param mask: Int
+    :param direction: Int (NW, NE, SW or SE)
+    :return: Int
+    """
+    return SHIFTS[direction](mask)
+
+
+def shift_nw(mask):
+    """
+    Shift in the NW direction
+
+    :param mask: Int
+    :return: Int
+    """
+    return ((mask & EVEN_ROWS) >> 4) | ((mask & ODD_NOT_LEFT) >> 5)
+
+
+def shift_ne(mask):
+    """
+    Shift in the NE direction
+
+    :param mask: Int
+    :return: Int
+    """
+    return ((mask & EVEN_NOT_RIGHT) >> 3) | ((mask & ODD_ROWS) >> 4)
+
+
+def shift_sw(mask):
+    """
+    Shift in the SW direction
+
+    :param mask: Int
+    :return: Int
+    """
+    return (((mask & EVEN_ROWS) << 4) | ((mask & ODD_NOT_LEFT) << 3)) & FULL
+
+
+def shift_se(mask):
+    """
+    Shift in the SE direction
+
+    :param mask: Int
+    :return: Int
+    """
+    return (((mask & EVEN_NOT_RIGHT) << 5) | ((mask & ODD_ROWS) << 4)) & FULL
+
+
+def jumpers(regulars, color, foe, empty):
+    """
+    Returns the mask of the regular pieces that have a jump, tested in bulk: an adjacent foe forward with an
+    empty square right behind it
+
+    :param regulars: Int
+    :param color: Color code
+    :param foe: Int
+    :param empty: Int
+    :return: Int
+    """
+    found = 0
+    for direction in FORWARD[color]:
+        back = SHIFTS[OPPOSITE[direction]]
+        found |= back(back(empty) & foe)
+    return found & regulars
+
+
+def promote(kind, color, square):
+    """
+    Returns the type a piece has after landing on a square: Regular pieces crown on the far row,
+    Kings become TripleKings back on their own starting row
+
+    :param kind: PieceType code
+    :param color: Color code
+    :param square: Int
+    :return: PieceType code
+    """
+    bit = 1 << square
+    if kind == REGULAR and bit & CROWN_ROW[color]:
+        return KING
+    if kind == KING and bit & CROWN_ROW[OPPONENT[color]]:
+        return TRIPLE_KING
+    return kind
+
+
+def hops(bit, kind, color, foe, empty):
+    """
+    Returns the single jumps a piece can make from a square as (landing, captured) mask pairs.
+    Regular: adjacent foe forward with the square behind it empty.
+    King: any distance along a diagonal over exactly one foe, landing on any empty square behind it.
+    TripleKing: any distance, passing over friendly pieces, capturing one or two foes.
+
+    :param bit: Int, single bit mask of the moving piece
+    :param kind: PieceType code
+    :param color: Color code
+    :param foe: Int
+    :param empty: Int
+    :return: List of tuples
+    """
+    found = []
+    if kind == REGULAR:
+        for middle, landing in JUMPS[color][bit.bit_length() - 1]:
+            if middle & foe and landing & empty:
+                found.append((landing, middle))
+    elif kind == KING:
+        for ray in RAYS[bit.bit_length() - 1]:
+            captured = 0
+            for square in ray:
+                if square & empty:
+                    if captured:
+                        found.append((square, captured))
+                elif square & foe and not captured:
+                    captured = square
+                else:
+                    # a friendly piece or a second foe blocks the diagonal
+                    break
+    else:
+        for ray in RAYS[bit.bit_length() - 1]:
+            captured = 0
+            count = 0
+            for square in ray:
+                if square & foe:
+                    count += 1
+                    if count > 2:
+                        break
+                    captured |= square
+                elif square & empty:
+                    if count:
+                        found.append((square, captured))
+    return found
+
+
+def chains(bit, kind, color, foe, empty, path, captured, moves):
+    """
+    Depth first expansion of capture sequences from a piece, appending every finished sequence to moves.
+    Captured pieces are taken off as they are jumped, matching play_game
+
+    :param bit: Int, current square of the moving piece
+    :param kind: PieceType code
+    :param color: Color code
+    :param foe: Int
+    :param empty: Int, includes the moving piece's own square
+    :param path: List of square indices visited so far
+    :param captured: Int, mask of pieces taken so far
+    :param moves: List to append (path, captured) tuples to
+    :return: None
+    """
+    jumps = hops(bit, kind, color, foe, empty)
+    if not jumps:
+        if len(path) > 1:
+            moves.append((tuple(path), captured))
+        return
+    for landing, taken in jumps:
+        square = landing.bit_length() - 1
+        path.append(square)
+        chains(landing, promote(kind, color, square), color, foe & ~taken, empty | taken, path, captured | taken,
+               moves)
+        path.pop()
+
+
+def encode_move(move):
+    """
+    Packs a move given as a list of (row, column) squares into one integer, 6 bits per square
+    (square index + 1), first square in the lowest bits. Moves of more than 10 squares don't fit in
+    64 bits and are encoded as 0, meaning no move
+
+    :param move: List of tuples
+    :return: Int
+    """
+    if len(move) > 10:
+        return 0
+    code = 0
+    for shift_by, position in enumerate(move):
+        code |= (SQUARE_OF[position] + 1) << (6 * shift_by)
+    return code
+
+
+def decode_move(code):
+    """
+    Unpacks an integer from encode_move back into a list of (row, column) squares
+
+    :param code: Int
+    :return: List of tuples (empty for 0)
+    """
+    move = []
+    while code:
+        move.append(POSITION_OF[(code & 63) - 1])
+        code >>= 6
+    return move
+
+
+# Square numbering and masks, built once at import
+SQUARE_OF = {}
+POSITION_OF = []
+for _row in range(8):
+    for _column in range(8):
+        if (_row + _column) % 2 == 1:
+            SQUARE_OF[(_row, _column)] = len(POSITION_OF)
+            POSITION_OF.append((_row, _column))
+
+FULL = (1 << 32) - 1
+ROW_MASKS = [0b1111 << (4 * _row) for _row in range(8)]
+EVEN_ROWS = ROW_MASKS[0] | ROW_MASKS[2] | ROW_MASKS[4] | ROW_MASKS[6]
+ODD_ROWS = FULL & ~EVEN_ROWS
+# column 0 only holds odd row squares, column 7 only even row squares
+LEFT_EDGE = sum(1 << SQUARE_OF[(_row, 0)] for _row in range(1, 8, 2))
+RIGHT_EDGE = sum(1 << SQUARE_OF[(_row, 7)] for _row in range(0, 8, 2))
+ODD_NOT_LEFT = ODD_ROWS & ~LEFT_EDGE
+EVEN_NOT_RIGHT = EVEN_ROWS & ~RIGHT_EDGE
+
+NW, NE, SW, SE = 0, 1, 2, 3
+DIRECTIONS = (NW, NE, SW, SE)
+OPPOSITE = {NW: SE, NE: SW, SW: NE, SE: NW}
+# indexed by Color code: Black moves up the board (towards row 0), White moves down
+FORWARD = ((NW, NE), (SW, SE))
+CROWN_ROW = (ROW_MASKS[0], ROW_MASKS[7])
+# the other color by name, for callers working with get_turn()
+OTHER = {"Black": "White", "White": "Black"}
+# bulk shift per direction
+SHIFTS = (shift_nw, shift_ne, shift_sw, shift_se)
+# per direction and square: the square index one step away, None off the board
+STEPS = tuple([None] * 32 for _direction in DIRECTIONS)
+# per square: the bits along each diagonal, nearest first, for King and TripleKing jumps
+RAYS = []
+# per color and square: (foe bit, landing bit) of each forward jump a Regular piece can make on the board
+JUMPS = ([], [])
+for _square in range(32):
+    _rays = []
+    for _direction in DIRECTIONS:
+        _ray = []
+        _bit = shift(1 << _square, _direction)
+        while _bit:
+            _ray.append(_bit)
+            _bit = shift(_bit, _direction)
+        if _ray:
+            STEPS[_direction][_square] = _ray[0].bit_length() - 1
+        _rays.append(tuple(_ray))
+    RAYS.append(tuple(_ray for _ray in _rays if _ray))
+    for _color in (BLACK, WHITE):
+        JUMPS[_color].append(tuple((_rays[_direction][0], _rays[_direction][1]) for _direction in FORWARD[_color]
+                                   if len(_rays[_direction]) > 1))
@@ -1,8 +1,9 @@
+from Codes import BLACK, WHITE, COLOR_NAMES
 from Token import Token
 
 class CheckerBoard:
     """Class simulating a checkerboard object. Has methods to create a board as well as fill it with white and black
-    tokens to begin gameplay"""
+    tokens to begin gameplay. Squares hold the color names ("OK" when empty), tokens are created with Color codes"""
     def __init__(self):
         # initiate board with "OK" for valid black squares and None for invalid white squares
         new_board = self.filler("OK", None)
@@ -56,13 +57,13 @@ class CheckerBoard:
         for row in range(3):
             for column in range(8):
                 if self._board[row][column] == "OK":
-                    self._board[row][column] = "White"
-                    white_tokens.append(Token((row, column), "White"))
+                    self._board[row][column] = COLOR_NAMES[WHITE]
+                    white_tokens.append(Token((row, column), WHITE))
         # set Black
         black_tokens = []
         for row in range(3):
             for column in range (8):
                 if self._board[row + 5][column] == "OK":
-                    self._board[row + 5][column] = "Black"
-                    black_tokens.append(Token((row + 5, column), "Black"))
+                    self._board[row + 5][column] = COLOR_NAMES[BLACK]
+                    black_tokens.append(Token((row + 5, column), BLACK))
         return [white_tokens, black_tokens]
\ No newline at end of file
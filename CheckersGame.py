@@ -1,48 +1,342 @@
-import os
+import struct
+import Instrumentation
+from BitBoard import BitBoard, SQUARE_OF, POSITION_OF, FULL, hops
 from CheckerBoard import CheckerBoard
+from Codes import BLACK, WHITE, REGULAR, KING, TRIPLE_KING, CAPTURE, COLOR_NAMES, COLOR_CODES, OPPONENT, CROWN_ROWS, \
+    EMPTY, SQUARE_NAMES
 from Colors import ColorsBg, ColorsFg
-from Exceptions import IncorrectColorPieceError, OutofTurn, InvalidSquare, InvalidPlayer
+from Evaluation import PIECE_SCORES, position_score
+from Exceptions import IncorrectColorPieceError, OutofTurn, InvalidSquare, InvalidPlayer, InvalidBoardState
+from GameRecord import STEP, PROMOTED, CONTINUES, BETWEEN
 from Player import Player
+from Renderer import BoardRenderer, board_squares, board_text, CLEAR_SCREEN
+from Token import Token, RAYS
+from Zobrist import PIECE_KEYS, WHITE_TO_MOVE, position_hash
+
+# to_bytes snapshot layout: header (magic, version, turn, backend index, black and white token counts), then one
+# byte per token (square | type << 5) in token list order, then per color a player entry (present, king,
+# triple king and capture counts, name length) followed by the UTF-8 name, then the game record length and bytes
+SNAPSHOT_MAGIC = b"LBCS"
+SNAPSHOT_VERSION = 1
+SNAPSHOT_HEADER = struct.Struct("<4sHBBBB")
+SNAPSHOT_PLAYER = struct.Struct("<BHHHH")
+SNAPSHOT_RECORD = struct.Struct("<I")
+# get_checker_details strings, indexed by Color then PieceType code
+CHECKER_DETAILS = (("Black", "Black_king", "Black_Triple_King"), ("White", "White_king", "White_Triple_King"))
+# game state backends: Token objects and a square code grid, or BitBoard masks (BitBoardCheckers)
+BACKENDS = ("objects", "bitboard")
+# square codes of an empty board, None for light squares
+EMPTY_GRID = tuple(tuple(None if (row + column) % 2 == 0 else EMPTY for column in range(8)) for row in range(8))
+# Zobrist keys and piece-square scores indexed by Color, PieceType and square index, for BitBoardCheckers
+SQUARE_KEYS = tuple(tuple(tuple(PIECE_KEYS[color, piece_type][position] for position in POSITION_OF)
+                          for piece_type in (REGULAR, KING, TRIPLE_KING)) for color in (BLACK, WHITE))
+SQUARE_SCORES = tuple(tuple(tuple(PIECE_SCORES[color, piece_type][position] for position in POSITION_OF)
+                            for piece_type in (REGULAR, KING, TRIPLE_KING)) for color in (BLACK, WHITE))
 
 
 class Checkers:
     """
     information about the  board and the players. Board initialized when this object is created.
     position is: (row, column)
+    Colors, token types and the turn are handled as the Color and PieceType codes internally, players and
+    token lists are indexed by Color. The board grid holds square codes (the Color code of the piece on a
+    square, EMPTY or None for light squares), get_board_dm translates it back to the color names and the
+    public methods take and return strings as before.
+    Checkers(backend="bitboard") creates a BitBoardCheckers instead, which keeps the position in BitBoard masks
+    behind the same methods.
     """
-    def __init__(self):
-        # initialized as "Black" for first move
-        self._current_turn = "Black"
+    _backend = "objects"
+
+    def __new__(cls, debug=False, backend="objects"):
+        if backend not in BACKENDS:
+            raise ValueError("Backend can only be one of " + ", ".join(BACKENDS))
+        if backend == "bitboard" and cls is Checkers:
+            cls = BitBoardCheckers
+        return super().__new__(cls)
+
+    def __init__(self, debug=False, backend="objects"):
+        # debug mode checks the board against the tokens after every move
+        self._debug = debug
         self._players = {}
         self._player_objects = {}
-        self._tokens = {
-            "Black": [],
-            "White": [],
-        }
         # Initialize a CheckerBoard to set up the game
         board = CheckerBoard()
         pieces = board.start_setup()
+        # initialized as "Black" for first move
+        self._load_pieces(pieces[0], pieces[1], BLACK)
+
+    @classmethod
+    def from_bitboard(cls, bitboard, debug=False, backend="objects"):
+        """
+        Creates a game, without players, set up with the position of a BitBoard instead of the starting layout.
+        Used to rebuild positions sent in compact form, e.g. to search workers
+
+        :param bitboard: BitBoard object
+        :param debug: Bool
+        :param backend: String, one of BACKENDS
+        :return: Checkers object
+        """
+        game = cls.__new__(cls, backend=backend)
+        game._debug = debug
+        game._players = {}
+        game._player_objects = {}
+        white_tokens = []
+        black_tokens = []
+        for position in POSITION_OF:
+            piece = bitboard.get_piece(position)
+            if piece is None:
+                continue
+            token = Token(position, piece[0])
+            if piece[1] != "Regular":
+                token.change_type(piece[1])
+            if piece[0] == "White":
+                white_tokens.append(token)
+            else:
+                black_tokens.append(token)
+        game._load_pieces(white_tokens, black_tokens, bitboard.get_turn())
+        return game
+
+    @classmethod
+    def from_bytes(cls, data, debug=False, backend=None):
+        """
+        Restores a game saved by to_bytes: pieces, turn, players with their counts and the game record. Tokens are
+        rebuilt straight from the snapshot, the starting layout isn't set up and no moves are replayed.
+        Raises ValueError if the data isn't a snapshot of this version, is cut short, holds an unknown piece type,
+        two pieces on one square or a Regular piece on the row it should have been crowned on
+
+        :param data: Bytes
+        :param debug: Bool
+        :param backend: String, one of BACKENDS, or None for the backend the game was saved from
+        :return: Checkers object
+        """
+        try:
+            magic, version, turn, saved_backend, black_count, white_count = SNAPSHOT_HEADER.unpack_from(data, 0)
+        except struct.error:
+            raise ValueError("Not a game snapshot")
+        if magic != SNAPSHOT_MAGIC or version != SNAPSHOT_VERSION or turn > WHITE or saved_backend >= len(BACKENDS):
+            raise ValueError("Not a version " + str(SNAPSHOT_VERSION) + " game snapshot")
+        offset = SNAPSHOT_HEADER.size
+        if len(data) < offset + black_count + white_count:
+            raise ValueError("Truncated game snapshot")
+        tokens = ([], [])
+        squares = set()
+        for color, count in ((BLACK, black_count), (WHITE, white_count)):
+            for packed in data[offset:offset + count]:
+                if packed >> 5 > TRIPLE_KING:
+                    raise ValueError("Unknown piece type in game snapshot: " + str(packed >> 5))
+                position = POSITION_OF[packed & 31]
+                if position in squares:
+                    raise ValueError("Two pieces on " + str(position) + " in game snapshot")
+                if packed >> 5 == REGULAR and position[0] == CROWN_ROWS[color]:
+                    raise ValueError("Regular piece on its crowning row at " + str(position) + " in game snapshot")
+                squares.add(position)
+                token = Token(position, color)
+                if packed >> 5:
+                    token.change_type(packed >> 5)
+                tokens[color].append(token)
+            offset += count
+        game = cls.__new__(cls, backend=BACKENDS[saved_backend] if backend is None else backend)
+        game._debug = debug
+        game._players = {}
+        game._player_objects = {}
+        game._load_pieces(tokens[WHITE], tokens[BLACK], turn)
+        try:
+            for color in (BLACK, WHITE):
+                present, kings, triple_kings, captures, length = SNAPSHOT_PLAYER.unpack_from(data, offset)
+                offset += SNAPSHOT_PLAYER.size
+                if present:
+                    if len(data) < offset + length:
+                        raise ValueError("Truncated game snapshot")
+                    name = bytes(data[offset:offset + length]).decode("utf-8")
+                    offset += length
+                    player = Player(name, color)
+                    player.set_counts((kings, triple_kings, captures))
+                    game._players[color] = name
+                    game._player_objects[color] = player
+            length = SNAPSHOT_RECORD.unpack_from(data, offset)[0]
+        except struct.error:
+            raise ValueError("Truncated game snapshot")
+        offset += SNAPSHOT_RECORD.size
+        if len(data) < offset + length:
+            raise ValueError("Truncated game snapshot")
+        game._log = bytearray(data[offset:offset + length])
+        return game
+
+    @classmethod
+    def from_file(cls, path, debug=False, backend=None):
+        """
+        Restores a game saved by to_file
+
+        :param path: String
+        :param debug: Bool
+        :param backend: String, one of BACKENDS, or None for the backend the game was saved from
+        :return: Checkers object
+        """
+        with open(path, "rb") as snapshot:
+            return cls.from_bytes(snapshot.read(), debug, backend)
+
+    def to_bytes(self):
+        """
+        Returns a compact snapshot of the full game state (pieces, turn, players and their counts and game
+        record) for from_bytes, e.g. to suspend an idle game
+
+        :return: Bytes
+        """
+        tokens = (self.get_black_tokens(), self.get_white_tokens())
+        parts = [SNAPSHOT_HEADER.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION, self.get_turn_code(),
+                                      BACKENDS.index(self._backend), len(tokens[BLACK]), len(tokens[WHITE]))]
+        for color in (BLACK, WHITE):
+            parts.append(bytes([SQUARE_OF[token.get_position()] | token.get_type_code() << 5
+                                for token in tokens[color]]))
+        for color in (BLACK, WHITE):
+            player = self._player_objects.get(color)
+            if player is None:
+                parts.append(SNAPSHOT_PLAYER.pack(0, 0, 0, 0, 0))
+            else:
+                name = player.get_name().encode("utf-8")
+                parts.append(SNAPSHOT_PLAYER.pack(1, *player.get_counts(), len(name)))
+                parts.append(name)
+        parts.append(SNAPSHOT_RECORD.pack(len(self._log)))
+        parts.append(self._log)
+        return b"".join(parts)
+
+    def to_file(self, path):
+        """
+        Saves the to_bytes snapshot of the game to a file
+
+        :param path: String
+        :return: None
+        """
+        with open(path, "wb") as snapshot:
+            snapshot.write(self.to_bytes())
+
+    def _load_pieces(self, white_tokens, black_tokens, turn):
+        """
+        Sets the game state from lists of tokens and the color to move
+
+        :param white_tokens: List of Token objects
+        :param black_tokens: List of Token objects
+        :param turn: "Black" or "White", or a Color code
+        :return: None
+        """
+        self._current_turn = COLOR_CODES[turn]
+        # token lists indexed by Color
+        self._tokens = ([], [])
         # fill white pieces
-        for item in pieces[0]:
-            self._tokens["White"].append(item)
+        for item in white_tokens:
+            self._tokens[WHITE].append(item)
         # fill black pieces
-        for item in pieces[1]:
-            self._tokens["Black"].append(item)
-        self._current_board = board.get_board()
+        for item in black_tokens:
+            self._tokens[BLACK].append(item)
+        # square codes, light squares None
+        self._current_board = [list(row) for row in EMPTY_GRID]
+        # square to Token index, kept in sync on every move and capture
+        self._token_at = {}
+        for color in (BLACK, WHITE):
+            for token in self._tokens[color]:
+                self._token_at[token.get_position()] = token
+                self._current_board[token.get_position()[0]][token.get_position()[1]] = color
+        # binary GameRecord steps of the play_game calls made since the pieces were set
+        self._log = bytearray()
+        # 64-bit Zobrist key of the position, updated with every change to the pieces or turn
+        self._hash = position_hash(self._token_at.values(), self._current_turn)
+        # static score from Black's side (Evaluation module), updated along with the hash
+        self._score = position_score(self._token_at.values())
 
     def get_board_dm(self):
         """
-        Get method for testing getting the self._current_board data member for the Checkers class
+        Get method for testing getting the self._current_board data member for the Checkers class, as a new
+        board of color names: "Black", "White", "OK" for empty dark squares and None for light squares
+
+        :return: Array of arrays
+        """
+        return [[square if square is None else SQUARE_NAMES[square] for square in row]
+                for row in self._current_board]
+
+    def get_board_codes(self):
+        """
+        Returns the board grid itself: the Color code of the piece on each dark square, EMPTY for empty ones and
+        None for light squares. It is the game's own grid and must not be changed
 
         :return: Array of arrays
         """
         return self._current_board
 
+    def get_record(self):
+        """
+        Returns the game record of every successful play_game call since the game was set up, 4 bytes per
+        call (from square, to square, captures, flags) as read by the GameRecord module
+
+        :return: Bytes
+        """
+        return bytes(self._log)
+
+    def get_hash(self):
+        """
+        Get method for the 64-bit Zobrist key of the current position (piece colors, types, squares and the
+        side to move), e.g. for transposition tables or repetition detection
+
+        :return: Int
+        """
+        return self._hash
+
+    def get_backend(self):
+        """
+        Returns the backend holding the game state, one of BACKENDS
+
+        :return: String
+        """
+        return self._backend
+
+    def get_player(self, color):
+        """
+        Returns the Player object playing a color, or None if nobody plays it yet
+
+        :param color: "Black" or "White", or a Color code
+        :return: Player object or None
+        """
+        return self._player_objects.get(COLOR_CODES[color])
+
+    def get_players(self):
+        """
+        Returns the names of the players created so far, keyed by their color
+
+        :return: Dictionary of "Black"/"White" to String
+        """
+        return {COLOR_NAMES[color]: name for color, name in self._players.items()}
+
+    @staticmethod
+    def stats():
+        """
+        Returns the call counts and times of the instrumented methods and the engine node counts recorded in
+        this process, for all games. Recording is off until Instrumentation.enable() is called
+
+        :return: Dictionary, see Instrumentation.stats
+        """
+        return Instrumentation.stats()
+
+    def get_score(self):
+        """
+        Returns the static score of the position from Black's side: material and piece-square values of the
+        pieces in play, kept up to date as pieces move, promote and are captured
+
+        :return: Int
+        """
+        return self._score
+
     def get_turn(self):
         """
         Get method to display color who's turn it currently is
         :return: "Black" or "White"
         """
+        return COLOR_NAMES[self._current_turn]
+
+    def get_turn_code(self):
+        """
+        Get method for the color to move as a Color code
+
+        :return: Color
+        """
         return self._current_turn
 
     def print_moves(self, position):
@@ -52,40 +346,95 @@ class Checkers:
         :param position: Tuple (row, column)
         :return: Nothing
         """
-        for pieces in self._tokens[self._current_turn]:
-            if pieces.get_position() == position:
-                moves = pieces.get_possible_moves()
-                print("Jumps possible: ", pieces.possible_jumps(moves, self._current_board))
+        pieces = self.get_token(position)
+        if pieces is not None and pieces.get_color_code() == self.get_turn_code():
+            moves = pieces.get_possible_moves()
+            print("Jumps possible: ", pieces.possible_jumps(moves, self.get_board_codes()))
 
     def remove_token(self, location, foe_color, my_color):
         """
         Method to remove tokens in play during a capture move. Updates player counts when necessary
         :param location: Tuple (row, column)
-        :param foe_color: String
-        :param my_color: String
+        :param foe_color: String or Color
+        :param my_color: String or Color
         :return: Nothing
         """
-        removal_index = 0
-        removal_type = ""
-        for index, value in enumerate(self._tokens[foe_color]):
-            if value.get_position() == location:
-                removal_index = index
-                if value.get_type() == "King":
-                    removal_type = "King"
-                elif value.get_type() == "TripeKing":
-                    removal_type = "TripleKing"
-                break
-        self._tokens[foe_color].pop(removal_index)
+        if location in self._token_at:
+            self._take_token(location, COLOR_CODES[foe_color], COLOR_CODES[my_color])
+
+    def _take_token(self, location, foe_color, my_color):
+        """
+        Removes the token on location from play and updates player counts. Returns where it was in the
+        token list so unmake_move can put it back in the same place
+
+        :param location: Tuple (row, column)
+        :param foe_color: Color
+        :param my_color: Color
+        :return: Tuple (Int index in the foe's token list, Token object)
+        """
+        removed = self._token_at.pop(location)
+        removal_index = self._tokens[foe_color].index(removed)
+        del self._tokens[foe_color][removal_index]
         row, column = location
         #print("removed: ", location)
-        self._current_board[row][column] = "OK"
+        self._current_board[row][column] = EMPTY
+        self._hash ^= PIECE_KEYS[foe_color, removed.get_type_code()][location]
+        self._score -= PIECE_SCORES[foe_color, removed.get_type_code()][location]
 
         # update player's capture count
-        self._player_objects[my_color].add_count("Capture")
+        self._update_count(my_color, CAPTURE, 1)
 
         # if a king or triple king is captured, update counts
-        if removal_type != "":
-            self._player_objects[foe_color].remove_count(removal_type)
+        if removed.get_type_code() != REGULAR:
+            self._update_count(foe_color, removed.get_type_code(), -1)
+        return removal_index, removed
+
+    def _update_count(self, color, count_type, change):
+        """
+        Adds to (change 1) or removes from (change -1) a player's count. Games searched without
+        players created skip the counts
+
+        :param color: Color
+        :param count_type: Count code (KING, TRIPLE_KING or CAPTURE)
+        :param change: Int
+        :return: None
+        """
+        player = self._player_objects.get(color)
+        if player is None:
+            return
+        if change > 0:
+            player.add_count(count_type)
+        else:
+            player.remove_count(count_type)
+
+    def get_token(self, position):
+        """
+        Returns the Token on a position, or None if the square is empty
+
+        :param position: Tuple (row, column)
+        :return: Token object or None
+        """
+        return self._token_at.get(position)
+
+    def _move_token(self, token, destination):
+        """
+        Moves a token to a new square, updating only the two board squares involved and keeping the
+        square to Token index in sync
+
+        :param token: Token object
+        :param destination: Tuple (row, column)
+        :return: None
+        """
+        row, column = token.get_position()
+        self._current_board[row][column] = EMPTY
+        del self._token_at[(row, column)]
+        self._current_board[destination[0]][destination[1]] = token.get_color_code()
+        self._token_at[destination] = token
+        keys = PIECE_KEYS[token.get_color_code(), token.get_type_code()]
+        self._hash ^= keys[(row, column)] ^ keys[destination]
+        scores = PIECE_SCORES[token.get_color_code(), token.get_type_code()]
+        self._score += scores[destination] - scores[(row, column)]
+        token.change_position(destination)
 
     def get_white_tokens(self):
         """
@@ -93,7 +442,7 @@ class Checkers:
 
         :return: List
         """
-        return self._tokens["White"]
+        return self._tokens[WHITE]
 
     def get_black_tokens(self):
         """
@@ -101,7 +450,15 @@ class Checkers:
 
         :return: List
         """
-        return self._tokens["Black"]
+        return self._tokens[BLACK]
+
+    def to_bitboard(self):
+        """
+        Returns a BitBoard snapshot of the current position for fast move generation, e.g. for bot play
+
+        :return: BitBoard object
+        """
+        return BitBoard.from_checkers(self)
 
     def setup(self):
         """
@@ -109,10 +466,10 @@ class Checkers:
 
         :return: None
         """
-        for player in self._tokens:
-            for piece in self._tokens[player]:
+        for tokens in self._tokens:
+            for piece in tokens:
                 x, y = piece.get_position()
-                self._current_board[x][y] = piece.get_color()
+                self._current_board[x][y] = piece.get_color_code()
 
     def change_turn(self):
         """
@@ -120,10 +477,8 @@ class Checkers:
 
         :return: None
         """
-        if self._current_turn == "Black":
-            self._current_turn = "White"
-        elif self._current_turn == "White":
-            self._current_turn = "Black"
+        self._current_turn = OPPONENT[self._current_turn]
+        self._hash ^= WHITE_TO_MOVE
         return
 
     def valid_player(self, player_name):
@@ -133,7 +488,7 @@ class Checkers:
         :param player_name: String
         :return: Bool
         """
-        if self._players[self._current_turn] == player_name:
+        if self._players[self.get_turn_code()] == player_name:
             return True
         return False
 
@@ -144,6 +499,17 @@ class Checkers:
         :param position: Tuple (row, column)
         :return: String for black square position, None otherwise
         """
+        square = self._color_at(position)
+        return None if square is None else SQUARE_NAMES[square]
+
+    def _color_at(self, position):
+        """
+        Returns the square code of a position: the Color code of the piece on it, EMPTY or None for a light square.
+        Raises IndexError outside the board
+
+        :param position: Tuple (row, column)
+        :return: Color, EMPTY or None
+        """
         return self._current_board[position[0]][position[1]]
 
     def get_color(self, name):
@@ -155,7 +521,7 @@ class Checkers:
         """
         for key, value in self._players.items():
             if value == name:
-                return key
+                return COLOR_NAMES[key]
 
     def valid_square_location(self, position):
         """
@@ -166,10 +532,10 @@ class Checkers:
         """
         try:
             # Space is a white square
-            if self._current_board[position[0]][position[1]] is None:
+            if self._color_at(position) is None:
                 return False
             # Space is a black square
-            elif self._current_board[position[0]][position[1]]:
+            else:
                 return True
             # outside of the board
         except IndexError:
@@ -187,14 +553,14 @@ class Checkers:
         :return: Player object
         """
         if piece_color.lower() == "black":
-            self._players["Black"] = player_name
-            new_player = Player(player_name,"Black")
-            self._player_objects["Black"] = new_player
+            self._players[BLACK] = player_name
+            new_player = Player(player_name, BLACK)
+            self._player_objects[BLACK] = new_player
             return new_player
         elif piece_color.lower() == "white":
-            self._players["White"] = player_name
-            new_player = Player(player_name, "White")
-            self._player_objects["White"] = new_player
+            self._players[WHITE] = player_name
+            new_player = Player(player_name, WHITE)
+            self._player_objects[WHITE] = new_player
             return new_player
         else:
             raise IncorrectColorPieceError("Piece color can only be 'White' or 'Black'!")
@@ -212,7 +578,7 @@ class Checkers:
         changes turn at the end of the call. If a piece moves to the opposite end of its respective side,
         it changes the token’s type to “King”. If Token is of type “King” and it reaches
         it’s original side’s starting row, it changes to type “TripleKing”.
-        Uses change_location to move.
+        Uses _play_step to move, which only updates the squares that change.
         Assumes that players will move according to the rules and prioritize a capture move if it’s possible
 
         :param player_name: String, needs to correspond to a valid player in self._players
@@ -234,161 +600,275 @@ class Checkers:
             # raises InvalidSquare if a white "None" square
             if not check_start or not check_dest:
                 raise InvalidSquare("Not a valid choice!")
-            current_player = self.get_color(player_name)
-            square_owner = self.get_square_details(starting_square_location)
+            square_owner = self._color_at(starting_square_location)
+            turn = self.get_turn_code()
 
             # raises InvalidSquare if current player is not the owner of the starting location
-            if current_player != square_owner:
+            if square_owner != turn:
                 raise InvalidSquare("This is not your piece!")
 
-            # starting_square_location should match one of the current pieces in play
-            for tokens in self._tokens[self._current_turn]:
-                if tokens.get_position() == starting_square_location:
-
-                    #print("Pre-Move_______")
-                    moves = tokens.get_possible_moves()
-
-                    # test to translate moves visually
-                    #print("Post-Move______")
-                    captures = 0
-                    if self._current_turn == "Black":
-                        foe = "White"
-                    elif self._current_turn == "White":
-                        foe = "Black"
-
-                    for diagonal in moves:
-                        # find the relevant move list
-                        if destination_square_location not in diagonal:
-                            pass
-                        elif destination_square_location in diagonal:
-                            translated_list = []
-                            index = 0
-                            for square in range(len(diagonal)):
-                                if diagonal[square] != destination_square_location:
-                                    continue
-                                else:
-                                    # index position of the selection destination within the moves list
-                                    index = square
-
-                            if tokens.get_type() == "Regular":
-                                # found the destination, and it's not the first of the list, indicating capture
-                                if index > 0:
-                                    # since it needs to be adjacent and only 1 before
-                                    captured_piece = diagonal[index - 1]
-                                    tokens.change_position(destination_square_location)
-                                    # remove the capture piece from the board
-                                    self.remove_token(captured_piece, foe, self._current_turn)
-                                    # increase capture count
-                                    captures += 1
-
-                                # found destination, not a capture move
-                                elif index == 0:
-                                    # change current position
-                                    tokens.change_position(destination_square_location)
-
-                                # update old position with empty space available
-                                x,y = starting_square_location
-                                self._current_board[x][y] = "OK"
-
-                                # now check if promotion
-                                if self._current_turn == "Black":
-                                    if tokens.get_position()[0] == 0:
-                                        tokens.change_type("King")
-                                        # add to player's count
-                                        self._player_objects["Black"].add_count("King")
-                                if self._current_turn == "White":
-                                    if tokens.get_position()[0] == 7:
-                                        tokens.change_type("King")
-                                        # add to player's count
-                                        self._player_objects["White"].add_count("King")
-
-                                # refresh board by updating from piece object locations
-                                self.setup()
-
-                                # redefine moves for new position
-                                moves = tokens.get_possible_moves()
-
-                                # non capture move
-                                if tokens.get_type() == "Regular":
-                                    if captures == 0:
-                                        self.change_turn()
-                                    else:
-                                        # capture move, but no jumps available
-                                        if tokens.possible_jumps(moves, self._current_board) == 0:
-                                            self.change_turn()
-
-                                    return captures
-                                elif tokens.get_type() == "King":
-                                    if tokens.possible_jumps(moves, self._current_board) == 0:
-                                        self.change_turn()
-                                    return captures
-
-                            elif tokens.get_type() == "King" or tokens.get_type() == "TripleKing":
-                                # moving adjacent, not a capture/jump move:
-                                if index == 0:
-                                    tokens.change_position(destination_square_location)
-
-                                # Jump was made
-                                elif index > 0:
-                                    jumped_pieces = diagonal[:index]
-                                    for position in range(len(jumped_pieces)):
-                                        current = jumped_pieces[position]
-                                        # coordinate locations of current piece in list
-                                        cur_x, cur_y = current
-                                        board_square = self._current_board[cur_x][cur_y]
-                                        # update position
-                                        tokens.change_position(destination_square_location)
-                                        # skip open space since a king can jump any to capture
-                                        # when used with a TripleKing, skip friendlies as well
-                                        if board_square == "OK" or board_square == self._current_turn:
-                                            continue
-                                        elif board_square == foe:
-                                            # clear it from the board
-                                            self._current_board[cur_x][cur_y] = "OK"
-                                            # remove from play
-                                            self.remove_token(current, foe, self._current_turn)
-                                            captures += 1
-
-                                # update old position with empty space available
-                                x, y = starting_square_location
-                                self._current_board[x][y] = "OK"
-
-                                # now check if promotion
-                                if tokens.get_type() == "King":
-                                    if self._current_turn == "Black":
-                                        if tokens.get_position()[0] == 7:
-                                            tokens.change_type("TripleKing")
-                                            # add to player's count
-                                            self._player_objects["Black"].add_count("TripleKing")
-                                            # remove the old count
-                                            self._player_objects["Black"].remove_count("King")
-                                    if self._current_turn == "White":
-                                        if tokens.get_position()[0] == 0:
-                                            tokens.change_type("TripleKing")
-                                            # add to player's count
-                                            self._player_objects["White"].add_count("TripleKing")
-                                            # remove the old count
-                                            self._player_objects["White"].remove_count("King")
-
-                                # refresh board by updating from piece object locations
-                                self.setup()
-
-                                # redefine moves for new position
-                                moves = tokens.get_possible_moves()
-
-                                # non capture move
-                                if tokens.possible_jumps(moves, self._current_board) != 0:
-                                    if captures == 0:
-                                        # jumps possible but wasn't a jump move prior
-                                        self.change_turn()
-                                        return captures
-                                    elif captures > 0:
-                                        # don't switch turns with jumps possible after a capture move
-                                        return captures
-                                # no jumps possible
-                                elif tokens.possible_jumps(moves, self._current_board) == 0:
-                                    self.change_turn()
-                                    return captures
+            captures, promoted = self._play_step(starting_square_location, destination_square_location)
+            if captures is not None:
+                flags = PROMOTED if promoted else 0
+                if self.get_turn_code() == turn:
+                    flags |= CONTINUES
+                self._log += STEP.pack(SQUARE_OF[starting_square_location], SQUARE_OF[destination_square_location],
+                                       captures, flags)
+            if self._debug:
+                self.check_board()
+            return captures
+
+    def play_move(self, player_name, move):
+        """
+        Plays a complete move from legal_moves through play_game, one call per jump, and returns the
+        total number of enemy pieces captured
+
+        :param player_name: String
+        :param move: List of tuples (row, column), [start, landing, ...]
+        :return: Int
+        """
+        captures = 0
+        for start, destination in zip(move, move[1:]):
+            captures += self.play_game(player_name, start, destination)
+        return captures
+
+    def _play_step(self, starting_square_location, destination_square_location):
+        """
+        Moves the token on the starting square to a destination on one of its diagonals for play_game. Captures the
+        foes it jumps, checks for promotion and changes turn unless the token can keep capturing after a capture.
+        Only the squares the move changes are updated on the board
+
+        :param starting_square_location: Tuple (row, column) of a token of the current player
+        :param destination_square_location: Tuple (row, column)
+        :return: Tuple (Int: Number of enemy pieces captured, None if the destination is not on the token's
+                 diagonals, Bool: whether the token was promoted)
+        """
+        # starting_square_location should match one of the current pieces in play
+        tokens = self._token_at[starting_square_location]
+        start_type = tokens.get_type_code()
+        foe = OPPONENT[self._current_turn]
+        board = self._current_board
+        for diagonal in tokens.get_possible_moves():
+            # find the relevant move list
+            if destination_square_location not in diagonal:
+                continue
+            # index position of the selection destination within the moves list
+            index = diagonal.index(destination_square_location)
+
+            if tokens.get_type_code() == REGULAR:
+                # not the first of the list indicates a capture, and it needs to be adjacent and only 1 before
+                jumped_pieces = diagonal[index - 1:index]
+            else:
+                # a king can jump any open space to capture, a TripleKing skips friendlies as well
+                jumped_pieces = diagonal[:index]
+
+            # moving clears the old square and fills the destination
+            self._move_token(tokens, destination_square_location)
+            captures = 0
+            for current in jumped_pieces:
+                if board[current[0]][current[1]] == foe:
+                    # remove from play, clearing it from the board
+                    self._take_token(current, foe, self._current_turn)
+                    captures += 1
+
+            # now check if promotion
+            self._promote(tokens)
+
+            # non capture move, or a capture move with no further jumps available
+            # (a piece just crowned keeps jumping as a King)
+            if captures == 0 or not tokens.jump_moves(tokens.get_possible_moves(), board):
+                self.change_turn()
+            return captures, tokens.get_type_code() != start_type
+        return None, False
+
+    def check_board(self):
+        """
+        Debug check that the board, position hash and score agree with the tokens in play and the square to Token index.
+        Called after every play_game when the game was created with debug=True.
+        Raises InvalidBoardState on the first mismatch found
+
+        :return: None
+        """
+        if self._hash != position_hash(self._token_at.values(), self._current_turn):
+            raise InvalidBoardState("Position hash out of sync with the tokens")
+        if self._score != position_score(self._token_at.values()):
+            raise InvalidBoardState("Position score out of sync with the tokens")
+        total = 0
+        for color in (BLACK, WHITE):
+            for token in self._tokens[color]:
+                total += 1
+                if token.get_color_code() != color or self._token_at.get(token.get_position()) is not token:
+                    raise InvalidBoardState("Token index out of sync at " + str(token.get_position()))
+        if total != len(self._token_at):
+            raise InvalidBoardState("Token index holds tokens that are no longer in play")
+        for row in range(8):
+            for column in range(8):
+                if (row + column) % 2 == 0:
+                    expected = None
+                elif (row, column) in self._token_at:
+                    expected = self._token_at[(row, column)].get_color_code()
+                else:
+                    expected = EMPTY
+                if self._current_board[row][column] != expected:
+                    raise InvalidBoardState("Board square " + str((row, column)) + " does not match the tokens")
+
+    def _promotion_type(self, token):
+        """
+        Returns the type a token is promoted to on its current square, or None if it isn't promoted.
+        Regular tokens become KING on the opposite end of the board, Kings become
+        TRIPLE_KING back on their own starting row
+
+        :param token: Token object
+        :return: PieceType or None
+        """
+        row = token.get_position()[0]
+        piece_type = token.get_type_code()
+        if piece_type == REGULAR:
+            if row == CROWN_ROWS[token.get_color_code()]:
+                return KING
+        elif piece_type == KING:
+            if row == CROWN_ROWS[OPPONENT[token.get_color_code()]]:
+                return TRIPLE_KING
+        return None
+
+    def _promote(self, token):
+        """
+        Promotes a token if it reached a promotion row and updates its player's counts
+
+        :param token: Token object
+        :return: None
+        """
+        new_type = self._promotion_type(token)
+        if new_type is None:
+            return
+        color = token.get_color_code()
+        self._hash ^= PIECE_KEYS[color, token.get_type_code()][token.get_position()] \
+            ^ PIECE_KEYS[color, new_type][token.get_position()]
+        self._score += PIECE_SCORES[color, new_type][token.get_position()] \
+            - PIECE_SCORES[color, token.get_type_code()][token.get_position()]
+        token.change_type(new_type)
+        # add to player's count
+        self._update_count(color, new_type, 1)
+        if new_type == TRIPLE_KING:
+            # remove the old count
+            self._update_count(color, KING, -1)
+
+    def legal_moves(self):
+        """
+        Returns every complete legal move for the side to move, following the same rules play_game applies.
+        Each move is a list of squares [start, landing, ...]: a single step, or a capture sequence that only
+        ends once the capturing piece has no further jump. Captures are mandatory, so when any capture is
+        available only capture sequences are returned. Play a move by calling play_game for each
+        consecutive pair of squares
+
+        :return: List of lists of tuples (row, column)
+        """
+        captures = []
+        simple = []
+        board = self._current_board
+        for token in self._tokens[self._current_turn]:
+            moves = token.get_possible_moves()
+            jumps = token.jump_moves(moves, board)
+            if jumps:
+                self._capture_sequences(token, jumps, [token.get_position()], captures)
+            elif not captures:
+                for diagonal in moves:
+                    if diagonal and board[diagonal[0][0]][diagonal[0][1]] == EMPTY:
+                        simple.append([token.get_position(), diagonal[0]])
+        if captures:
+            return captures
+        return simple
+
+    def make_move(self, move):
+        """
+        Plays a complete move from legal_moves without the player checks of play_game, for lookahead
+        searches. Returns a small undo record that unmake_move uses to take the move back exactly,
+        so a search never has to copy the game
+
+        :param move: List of tuples (row, column), [start, landing, ...]
+        :return: Tuple undo record
+        """
+        token = self._token_at[move[0]]
+        color = self._current_turn
+        foe = OPPONENT[color]
+        counts = tuple(player.get_counts() for player in self._player_objects.values())
+        record = (token, move[0], token.get_type_code(), [], color, counts, self._hash, self._score)
+        for start, destination in zip(move, move[1:]):
+            for row, column in squares_between(start, destination):
+                if self._current_board[row][column] == foe:
+                    record[3].append(self._take_token((row, column), foe, color))
+            self._move_token(token, destination)
+            self._promote(token)
+        self.change_turn()
+        if self._debug:
+            self.check_board()
+        return record
+
+    def unmake_move(self, record):
+        """
+        Takes back the move a make_move call returned the undo record for, restoring the board, tokens,
+        square index, turn and player counts. Moves must be taken back in reverse order
+
+        :param record: Tuple undo record from make_move
+        :return: None
+        """
+        token, start, start_type, captured, color, counts, position_key, score = record
+        self._move_token(token, start)
+        token.change_type(start_type)
+        # put captured tokens back in reverse order so each lands at its old place in the list
+        for removal_index, removed in reversed(captured):
+            position = removed.get_position()
+            self._tokens[removed.get_color_code()].insert(removal_index, removed)
+            self._token_at[position] = removed
+            self._current_board[position[0]][position[1]] = removed.get_color_code()
+        self._current_turn = color
+        self._hash = position_key
+        self._score = score
+        for player, player_counts in zip(self._player_objects.values(), counts):
+            player.set_counts(player_counts)
+        if self._debug:
+            self.check_board()
+
+    def _capture_sequences(self, token, jumps, path, sequences):
+        """
+        Depth first search of the capture sequences starting with the given jumps. The jumps are applied to
+        the board and token temporarily, with the same promotions play_game makes, and undone afterwards
+
+        :param token: Token object making the captures
+        :param jumps: List of (destination, captured squares) pairs from Token.jump_moves
+        :param path: List of squares visited so far
+        :param sequences: List the finished sequences are added to
+        :return: None
+        """
+        board = self._current_board
+        start = token.get_position()
+        start_type = token.get_type_code()
+        color = token.get_color_code()
+        foe = OPPONENT[color]
+        for destination, captured in jumps:
+            board[start[0]][start[1]] = EMPTY
+            for row, column in captured:
+                board[row][column] = EMPTY
+            board[destination[0]][destination[1]] = color
+            token.change_position(destination)
+            new_type = self._promotion_type(token)
+            if new_type is not None:
+                token.change_type(new_type)
+            path.append(destination)
+
+            further = token.jump_moves(token.get_possible_moves(), board)
+            if further:
+                self._capture_sequences(token, further, path, sequences)
+            else:
+                sequences.append(list(path))
+
+            path.pop()
+            token.change_type(start_type)
+            token.change_position(start)
+            board[destination[0]][destination[1]] = EMPTY
+            for row, column in captured:
+                board[row][column] = foe
+            board[start[0]][start[1]] = color
 
     def get_checker_details(self, square_location):
         """
@@ -402,25 +882,10 @@ class Checkers:
         if row not in range(8) or column not in range(8):
             raise InvalidSquare("Not a valid square location!")
 
-        selected = self._current_board[row][column]
-        if selected is None or selected == "OK":
+        piece = self._token_at.get(square_location)
+        if piece is None:
             return None
-        for piece in self.get_white_tokens():
-            if piece.get_position() == square_location:
-                if piece.get_type() == "Regular":
-                    return "White"
-                elif piece.get_type() == "King":
-                    return "White_king"
-                elif piece.get_type() == "TripleKing":
-                    return "White_Triple_King"
-        for piece in self.get_black_tokens():
-            if piece.get_position() == square_location:
-                if piece.get_type() == "Regular":
-                    return "Black"
-                elif piece.get_type() == "King":
-                    return "Black_king"
-                elif piece.get_type() == "TripleKing":
-                    return "Black_Triple_King"
+        return CHECKER_DETAILS[piece.get_color_code()][piece.get_type_code()]
 
     def print_board(self):
         """
@@ -431,9 +896,9 @@ class Checkers:
         # update self._current_board with current positions, for posterity
         self.setup()
         board_array = []
-        for row in range(len(self._current_board)):
+        for row in range(8):
             new_row = []
-            for square in range(len(self._current_board[row])):
+            for square in range(8):
                 if self.get_checker_details((row,square)) is None:
                     new_row.append("None")
                 else:
@@ -444,62 +909,30 @@ class Checkers:
     def print_color_board(self):
         """
         Uses ANSI escape codes in classes ColorsFg and ColorsBg to print a colored, stacked representation
-        of the Array of arrays checkerboard, with numbered rows and columns
+        of the Array of arrays checkerboard, with numbered rows and columns. The board is built as one string
+        by the Renderer module and printed at once
 
         :return: None, printed to console
         """
-        row_num = 0
-        print("    0    1    2    3    4    5    6    7")
-        for row in range(8):
-            print(row_num, end=" ")
-            row_num += 1
-            for piece in range(8):
-                current = self._current_board[row][piece]
-                if current == "White":
-                    for token in self._tokens["White"]:
-                        if token.get_position() == (row, piece):
-                            piece_type = token.get_type()
-                            break
-                    if piece_type == "Regular":
-                        display = "W"
-                    elif piece_type == "King":
-                        display = "K"
-                    elif piece_type == "TripleKing":
-                        display = "T"
-                    print(ColorsBg.black, ColorsFg.lightgrey, display, ' \x1b[0m', end="")
-                elif current == "Black":
-                    for token in self._tokens["Black"]:
-                        if token.get_position() == (row, piece):
-                            piece_type = token.get_type()
-                            break
-                    if piece_type == "Regular":
-                        display = "B"
-                    elif piece_type == "King":
-                        display = "K"
-                    elif piece_type == "TripleKing":
-                        display = "T"
-                    print(ColorsBg.black, ColorsFg.cyan, display, ' \x1b[0m', end="")
-                elif current == "OK":
-                    print(ColorsBg.black, ColorsFg.lightgrey, " ", ' \x1b[0m', end="")
-                elif current is None:
-                    print(ColorsBg.lightgrey, "  ", ' \x1b[0m', end="")
-            print("")
-        print("    0    1    2    3    4    5    6    7")
+        print(board_text(board_squares(self)))
 
     def game_winner(self):
         """
         If the game has not ended returns 'Game has not ended', otherwise returns the name of the winner
-        Utilizes the amount of tokens currently in play (len == 0 is the loser) to determine winner
+        Utilizes the amount of tokens currently in play (len == 0 is the loser) to determine winner.
+        A player whose turn it is and who has no legal move left also loses
 
         :return: String
         """
-        black_count = len(self._tokens["Black"])
-        white_count = len(self._tokens["White"])
+        black_count = len(self.get_black_tokens())
+        white_count = len(self.get_white_tokens())
 
         if black_count == 0:
-            return self._players["White"]
+            return self._players[WHITE]
         elif white_count == 0:
-            return self._players["Black"]
+            return self._players[BLACK]
+        elif not self.legal_moves():
+            return self._players[OPPONENT[self.get_turn_code()]]
         else:
             return "Game has not ended"
 
@@ -515,36 +948,404 @@ class Checkers:
         return row, column
 
 
+class BitBoardCheckers(Checkers):
+    """
+    Checkers game keeping the position in BitBoard masks instead of Token objects and a square grid, created by
+    Checkers(backend="bitboard"). legal_moves, make_move/unmake_move and play_game work on the masks and the hash,
+    score and player counts are updated from the squares a move changes. Tokens and boards returned by the
+    accessors are built from the masks on each call and changing them doesn't change the game
+    """
+    _backend = "bitboard"
+
+    def _load_pieces(self, white_tokens, black_tokens, turn):
+        """
+        Sets the game state from lists of tokens and the color to move
+
+        :param white_tokens: List of Token objects
+        :param black_tokens: List of Token objects
+        :param turn: "Black" or "White", or a Color code
+        :return: None
+        """
+        tokens = list(black_tokens) + list(white_tokens)
+        self._board = BitBoard.from_tokens(tokens, turn)
+        # binary GameRecord steps of the play_game calls made since the pieces were set
+        self._log = bytearray()
+        self._hash = position_hash(tokens, turn)
+        self._score = position_score(tokens)
+
+    def get_board_dm(self):
+        """
+        Returns a new board of color names: "Black", "White", "OK" for empty dark squares and None for light squares
+
+        :return: Array of arrays
+        """
+        return self._board.to_board()
+
+    def get_board_codes(self):
+        """
+        Returns a new grid of square codes built from the masks: the Color code of the piece on each dark square,
+        EMPTY for empty ones and None for light squares
+
+        :return: Array of arrays
+        """
+        black, white = self._board.get_masks()[:2]
+        board = [list(row) for row in EMPTY_GRID]
+        for color, mask in ((BLACK, black), (WHITE, white)):
+            while mask:
+                low = mask & -mask
+                mask ^= low
+                row, column = POSITION_OF[low.bit_length() - 1]
+                board[row][column] = color
+        return board
+
+    def get_turn(self):
+        """
+        Get method to display color who's turn it currently is
+        :return: "Black" or "White"
+        """
+        return self._board.get_turn()
+
+    def get_turn_code(self):
+        """
+        Get method for the color to move as a Color code
+
+        :return: Color
+        """
+        return self._board.get_turn_code()
+
+    def remove_token(self, location, foe_color, my_color):
+        """
+        Method to remove tokens in play during a capture move. Updates player counts when necessary
+        :param location: Tuple (row, column)
+        :param foe_color: String or Color
+        :param my_color: String or Color
+        :return: Nothing
+        """
+        piece = self._board.piece_codes(SQUARE_OF[location]) if location in SQUARE_OF else None
+        if piece is None:
+            return
+        before = self._board.get_masks()
+        self._board.remove(1 << SQUARE_OF[location])
+        self._taken(before, COLOR_CODES[my_color], 1 << SQUARE_OF[location])
+
+    def _taken(self, before, color, captured):
+        """
+        Takes the captured pieces out of the hash and score and updates the player counts for them
+
+        :param before: Tuple of masks (black, white, kings, triple_kings) before the capture
+        :param color: Color code of the capturing side
+        :param captured: Int mask of the pieces taken
+        :return: None
+        """
+        foe = OPPONENT[color]
+        keys = SQUARE_KEYS[foe]
+        scores = SQUARE_SCORES[foe]
+        while captured:
+            low = captured & -captured
+            captured ^= low
+            square = low.bit_length() - 1
+            piece_type = TRIPLE_KING if before[3] & low else KING if before[2] & low else REGULAR
+            self._hash ^= keys[piece_type][square]
+            self._score -= scores[piece_type][square]
+            self._update_count(color, CAPTURE, 1)
+            if piece_type != REGULAR:
+                self._update_count(foe, piece_type, -1)
+
+    def _moved(self, color, start, end, start_type, end_type):
+        """
+        Moves a piece in the hash and score from its start square and type to its end square and type and
+        updates its player's counts for a promotion
+
+        :param color: Color code
+        :param start: Int square index
+        :param end: Int square index
+        :param start_type: PieceType code
+        :param end_type: PieceType code
+        :return: None
+        """
+        keys = SQUARE_KEYS[color]
+        scores = SQUARE_SCORES[color]
+        self._hash ^= keys[start_type][start] ^ keys[end_type][end]
+        self._score += scores[end_type][end] - scores[start_type][start]
+        for new_type in range(start_type + 1, end_type + 1):
+            self._update_count(color, new_type, 1)
+            if new_type == TRIPLE_KING:
+                self._update_count(color, KING, -1)
+
+    def get_token(self, position):
+        """
+        Returns a Token for the piece on a position, or None if the square is empty
+
+        :param position: Tuple (row, column)
+        :return: Token object or None
+        """
+        piece = self._board.piece_codes(SQUARE_OF[position]) if position in SQUARE_OF else None
+        if piece is None:
+            return None
+        token = Token(position, piece[0])
+        if piece[1] != REGULAR:
+            token.change_type(piece[1])
+        return token
+
+    def _color_tokens(self, color):
+        """
+        Returns Tokens for the pieces of one color, in square order
+
+        :param color: Color
+        :return: List
+        """
+        mask = self._board.get_masks()[color]
+        tokens = []
+        while mask:
+            low = mask & -mask
+            mask ^= low
+            tokens.append(self.get_token(POSITION_OF[low.bit_length() - 1]))
+        return tokens
+
+    def get_white_tokens(self):
+        """
+        Returns Tokens for the white pieces currently in play
+
+        :return: List
+        """
+        return self._color_tokens(WHITE)
+
+    def get_black_tokens(self):
+        """
+        Returns Tokens for the black pieces currently in play
+
+        :return: List
+        """
+        return self._color_tokens(BLACK)
+
+    def to_bitboard(self):
+        """
+        Returns a copy of the game's BitBoard
+
+        :return: BitBoard object
+        """
+        return self._board.copy()
+
+    def setup(self):
+        """
+        Nothing to fill in, the boards are built from the masks when they are asked for
+
+        :return: None
+        """
+
+    def change_turn(self):
+        """
+        Function to change the current turn's color
+
+        :return: None
+        """
+        self._board.pass_turn()
+        self._hash ^= WHITE_TO_MOVE
+
+    def _color_at(self, position):
+        """
+        Returns the square code of a position: the Color code of the piece on it, EMPTY or None for a light square.
+        Raises IndexError outside the board
+
+        :param position: Tuple (row, column)
+        :return: Color, EMPTY or None
+        """
+        row, column = position
+        if EMPTY_GRID[row][column] is None:
+            return None
+        # negative indices wrap around like they do on the square grid
+        bit = 1 << SQUARE_OF[row % 8, column % 8]
+        black, white = self._board.get_masks()[:2]
+        return BLACK if black & bit else WHITE if white & bit else EMPTY
+
+    def _play_step(self, starting_square_location, destination_square_location):
+        """
+        Moves the piece on the starting square to a destination on one of its diagonals for play_game, with the
+        same rules as Checkers._play_step. Captures the foes it jumps, promotes it and changes turn unless the
+        piece can keep capturing after a capture
+
+        :param starting_square_location: Tuple (row, column) of a piece of the current player
+        :param destination_square_location: Tuple (row, column)
+        :return: Tuple (Int: Number of enemy pieces captured, None if the destination is not on the piece's
+                 diagonals, Bool: whether the piece was promoted)
+        """
+        board = self._board
+        before = board.get_masks()
+        color = board.get_turn_code()
+        start = SQUARE_OF[starting_square_location]
+        end = SQUARE_OF[destination_square_location]
+        bit = 1 << start
+        start_type = TRIPLE_KING if before[3] & bit else KING if before[2] & bit else REGULAR
+        row_step = destination_square_location[0] - starting_square_location[0]
+        if abs(row_step) != abs(destination_square_location[1] - starting_square_location[1]):
+            return None, False
+        # Regular pieces only move forward: up the board for Black, down for White
+        if start_type == REGULAR and (row_step < 0) != (color == BLACK):
+            return None, False
+        captured = 0
+        if abs(row_step) > 1:
+            jumped_pieces = squares_between(starting_square_location, destination_square_location)
+            if start_type == REGULAR:
+                # a capture jumps the one square before the destination
+                jumped_pieces = jumped_pieces[-1:]
+            for current in jumped_pieces:
+                captured |= 1 << SQUARE_OF[current]
+            captured &= before[OPPONENT[color]]
+        end_type = board.apply(((start, end), captured))
+        self._moved(color, start, end, start_type, end_type)
+        if not captured:
+            self.change_turn()
+            return 0, end_type != start_type
+
+        # a capture move only ends the turn with no further jumps available
+        self._taken(before, color, captured)
+        black, white = board.get_masks()[:2]
+        if not hops(1 << end, end_type, color, (black, white)[OPPONENT[color]], ~(black | white) & FULL):
+            self.change_turn()
+        return bin(captured).count("1"), end_type != start_type
+
+    def check_board(self):
+        """
+        Debug check that the masks don't overlap and the position hash and score agree with the pieces in play.
+        Raises InvalidBoardState on the first mismatch found
+
+        :return: None
+        """
+        black, white, kings, triple_kings = self._board.get_masks()
+        if black & white or kings & triple_kings or (kings | triple_kings) & ~(black | white):
+            raise InvalidBoardState("Piece masks overlap")
+        tokens = self.get_black_tokens() + self.get_white_tokens()
+        if self._hash != position_hash(tokens, self.get_turn_code()):
+            raise InvalidBoardState("Position hash out of sync with the pieces")
+        if self._score != position_score(tokens):
+            raise InvalidBoardState("Position score out of sync with the pieces")
+
+    def legal_moves(self):
+        """
+        Returns every complete legal move for the side to move, generated on the masks. Same moves and move
+        format as Checkers.legal_moves
+
+        :return: List of lists of tuples (row, column)
+        """
+        return [[POSITION_OF[square] for square in path] for path, captured in self._board.legal_moves()]
+
+    def make_move(self, move):
+        """
+        Plays a complete move from legal_moves without the player checks of play_game, for lookahead
+        searches. Returns the undo record for unmake_move
+
+        :param move: List of tuples (row, column), [start, landing, ...]
+        :return: Tuple undo record
+        """
+        board = self._board
+        # black, white, kings, triple_kings and the turn before the move
+        key = board.key()
+        color = key[4]
+        counts = tuple(player.get_counts() for player in self._player_objects.values()) if self._player_objects else ()
+        record = (key, counts, self._hash, self._score)
+        path = [SQUARE_OF[position] for position in move]
+        start = 1 << path[0]
+        start_type = TRIPLE_KING if key[3] & start else KING if key[2] & start else REGULAR
+        captured = 0
+        for origin, destination in zip(path, path[1:]):
+            captured |= BETWEEN[origin][destination]
+        captured &= key[OPPONENT[color]]
+        end_type = board.play((path, captured))
+        if captured:
+            self._taken(key, color, captured)
+        self._moved(color, path[0], path[-1], start_type, end_type)
+        self._hash ^= WHITE_TO_MOVE
+        if self._debug:
+            self.check_board()
+        return record
+
+    def unmake_move(self, record):
+        """
+        Takes back the move a make_move call returned the undo record for. Moves must be taken back in
+        reverse order
+
+        :param record: Tuple undo record from make_move
+        :return: None
+        """
+        key, counts, self._hash, self._score = record
+        self._board.restore(key)
+        for player, player_counts in zip(self._player_objects.values(), counts):
+            player.set_counts(player_counts)
+        if self._debug:
+            self.check_board()
+
+    def get_checker_details(self, square_location):
+        """
+        Takes a position on the board and returns the type of token currently on it or None if empty
+        Raises InvalidSquare exception if the location tuple is outside the bounds of the board.
+
+        :param square_location: Tuple (row, column)
+        :return: String or None
+        """
+        row, column = square_location
+        if row not in range(8) or column not in range(8):
+            raise InvalidSquare("Not a valid square location!")
+        piece = self._board.piece_codes(SQUARE_OF[square_location]) if square_location in SQUARE_OF else None
+        if piece is None:
+            return None
+        return CHECKER_DETAILS[piece[0]][piece[1]]
+
+
+def squares_between(start, destination):
+    """
+    Returns the squares strictly between two squares on the same diagonal
+
+    :param start: Tuple (row, column)
+    :param destination: Tuple (row, column)
+    :return: List of tuples
+    """
+    distance = abs(destination[0] - start[0])
+    direction = ((destination[0] > start[0]) * 2 - 1, (destination[1] > start[1]) * 2 - 1)
+    return RAYS[start, direction][:distance - 1]
+
+
 if __name__ == "__main__":
+    from Engine import AlphaBetaEngine
+
     # clear screen
-    os.system('clear')
+    print(CLEAR_SCREEN, end="")
 
     game = Checkers()
     player1_name = input("Enter a name for player 1: ")
     player1_color = input("Enter your color (Black or White): ")
+    player1_cpu = input("Is player 1 a CPU opponent? (y/n)").lower() == "y"
     player2_name = input("Enter a name for player 2: ")
     player2_color = input("Enter your color (Black or White, can not be same as player 1): ")
+    player2_cpu = input("Is player 2 a CPU opponent? (y/n)").lower() == "y"
     player1 = game.create_player(player1_name, player1_color)
     player2 = game.create_player(player2_name, player2_color)
-
+    # CPU players are keyed by name, each with its own engine and a one second budget per move
+    cpu_players = {}
+    if player1_cpu:
+        cpu_players[player1_name] = AlphaBetaEngine(time_limit=1.0)
+    if player2_cpu:
+        cpu_players[player2_name] = AlphaBetaEngine(time_limit=1.0)
+
+    # redraws only what changed each turn, in one write
+    renderer = BoardRenderer()
     while game.game_winner() == "Game has not ended":
-        # clear screen
-        os.system('clear')
-
         if game.get_turn() == player1.get_checker_color():
             current_player = player1.get_name()
         else:
             current_player = player2.get_name()
-        print("=====================================")
-        print("Current player is: ", game.get_turn())
-        print("Player 1: ", player1_name, "|", player1_color)
-        print("Captured: ", player1.get_captured_pieces_count())
-        print("Player 2: ", player2_name, "|", player2_color)
-        print("Captured: ", player2.get_captured_pieces_count())
-        print("=====================================")
 
         # display board
-        game.print_color_board()
+        renderer.draw(game, ["=====================================",
+                             "Current player is:  " + game.get_turn(),
+                             "Player 1:  " + player1_name + " | " + player1_color,
+                             "Captured:  " + str(player1.get_captured_pieces_count()),
+                             "Player 2:  " + player2_name + " | " + player2_color,
+                             "Captured:  " + str(player2.get_captured_pieces_count()),
+                             "====================================="])
+
+        if current_player in cpu_players:
+            cpu_players[current_player].play(game, current_player)
+            continue
 
         check = input("What to check possible jumps? (y/n)")
         if check.lower() == "y":
@@ -555,4 +1356,4 @@ if __name__ == "__main__":
         destination_move = game.input_translate(input("   Where are you moving it to? (row, column): "))
         game.play_game(current_player, start_move, destination_move)
 
-    print(game.game_winner())
\ No newline at end of file
+    print(game.game_winner())
@@ -1,6 +1,33 @@
+import asyncio
+import contextlib
+import io
+import json
+import os
+import tempfile
+import time
 import unittest
-from CheckersGame import Token, CheckerBoard, Checkers, Player, ColorsFg, ColorsBg, \
-    IncorrectColorPieceError, OutofTurn, InvalidSquare, InvalidPlayer
+import Instrumentation
+from Codes import Color, PieceType, CAPTURE, EMPTY
+from Zobrist import position_hash
+from BitBoard import encode_move, SQUARE_OF
+from TranspositionTable import TranspositionTable, EXACT, LOWER, UPPER
+from Engine import AlphaBetaEngine, WIN
+from Evaluation import evaluate, position_score, square_score, MOBILITY_BONUS, BACK_RANK_GUARD
+from Tablebase import Tablebase, generate, WON, LOST
+from OpeningBook import OpeningBook, build, lower_bound, HEADER as BOOK_HEADER, RECORD as BOOK_RECORD, \
+    MAGIC as BOOK_MAGIC, VERSION as BOOK_VERSION
+from GameRecord import GameRecordWriter, read_games, replay, final_position, decode_steps, PROMOTED, \
+    CONTINUES
+from Perft import check_fixtures, divide, run, load_fixtures, from_fixture, perft
+from Benchmark import BENCHMARKS, run_benchmarks, compare
+from MCTS import MCTSEngine
+from Renderer import BoardRenderer, board_squares, board_text, move_to, CLEAR_SCREEN, PIECE_SQUARES, \
+    DARK_SQUARE
+from Server import GameServer
+from Simulator import RandomBot, play_one, simulate
+from BatchBoard import BatchBoard, np
+from CheckersGame import Token, CheckerBoard, Checkers, BitBoardCheckers, Player, ColorsFg, ColorsBg, BitBoard, \
+    IncorrectColorPieceError, OutofTurn, InvalidSquare, InvalidPlayer, InvalidBoardState
 
 
 class TokenTest(unittest.TestCase):
@@ -48,6 +75,28 @@ class TokenTest(unittest.TestCase):
 
         self.assertIn([(4, 3), (3, 2), (2, 1), (1, 0)], moves1)
 
+    def test_move_tables(self):
+        token1 = Token((1, 2), "Black")
+        token2 = Token((0, 7), "White")
+        token2.change_type("King")
+
+        self.assertEqual(token1.get_possible_moves(), [[(0, 1)], [(0, 3)]])
+        self.assertIs(token1.get_possible_moves(), token1.get_possible_moves())
+        self.assertIn([(1, 6), (2, 5), (3, 4), (4, 3), (5, 2), (6, 1), (7, 0)], token2.get_possible_moves())
+
+    def test_codes(self):
+        token1 = Token((1, 2), Color.WHITE)
+        token1.change_type(PieceType.TRIPLE_KING)
+        token2 = Token((1, 2), "White")
+        token2.change_type("TripleKing")
+
+        self.assertFalse(hasattr(token1, "__dict__"))
+        self.assertEqual(token1.get_color(), "White")
+        self.assertEqual(token1.get_type(), "TripleKing")
+        self.assertEqual(token2.get_color_code(), Color.WHITE)
+        self.assertEqual(token2.get_type_code(), PieceType.TRIPLE_KING)
+        self.assertRaises(KeyError, Token, (1, 2), "Red")
+
     def test_possible_jumps(self):
         game = Checkers()
         player1 = game.create_player("A", "black")
@@ -132,6 +181,20 @@ class PlayerTest(unittest.TestCase):
         self.assertEqual(player1.get_captured_pieces_count(), 1)
         self.assertEqual(player1.get_triple_king_count(), 3)
 
+    def test_player_codes(self):
+        player1 = Player("Larry", Color.BLACK)
+
+        player1.add_count(CAPTURE)
+        player1.add_count(PieceType.KING)
+        player1.remove_count("King")
+        player1.add_count(PieceType.TRIPLE_KING)
+
+        self.assertEqual(player1.get_checker_color(), "Black")
+        self.assertEqual(player1.get_color_code(), Color.BLACK)
+        self.assertEqual(player1.get_counts(), (0, 1, 1))
+        self.assertRaises(AttributeError, player1.add_count, "Regular")
+        self.assertRaises(AttributeError, player1.remove_count, CAPTURE)
+
 
 class ColorsFgTest(unittest.TestCase):
 
@@ -147,6 +210,45 @@ class ColorsBgTest(unittest.TestCase):
         self.assertEqual(ColorsBg.green, '\033[42m')
 
 
+class RendererTest(unittest.TestCase):
+
+    def test_board_text(self):
+        game = Checkers()
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            game.print_color_board()
+        lines = output.getvalue().split("\n")
+
+        self.assertEqual(len(lines), 11)
+        self.assertEqual(lines[0], "    0    1    2    3    4    5    6    7")
+        self.assertTrue(lines[1].startswith("0 "))
+        self.assertIn(" W  ", lines[1])
+        self.assertEqual(output.getvalue(), board_text(board_squares(game)) + "\n")
+
+    def test_diff_frames(self):
+        game = Checkers()
+        game.create_player("A", "black")
+        game.create_player("B", "white")
+        output = io.StringIO()
+        renderer = BoardRenderer(output)
+        renderer.draw(game, ["Turn: Black"])
+        first = output.getvalue()
+        game.play_game("A", (5, 4), (4, 5))
+        frame = renderer.render(game, ["Turn: White"])
+
+        self.assertTrue(first.startswith(CLEAR_SCREEN))
+        self.assertNotIn(CLEAR_SCREEN, frame)
+        # status line, the two squares of the move and the cursor parked under the board
+        self.assertIn(move_to(1, 1), frame)
+        self.assertIn(move_to(8, 23) + DARK_SQUARE, frame)
+        self.assertIn(move_to(7, 28) + PIECE_SQUARES[0][0], frame)
+        self.assertEqual(frame.count("\x1b[40m"), 2)
+        self.assertEqual(renderer.render(game, ["Turn: White"]), move_to(12, 1) + "\x1b[J")
+
+        renderer.reset()
+        self.assertTrue(renderer.render(game, ["Turn: White"]).startswith(CLEAR_SCREEN))
+
+
 class CheckersTest(unittest.TestCase):
 
     def test_checkers_init(self):
@@ -230,6 +332,147 @@ class CheckersTest(unittest.TestCase):
         self.assertEqual(player1.get_king_count(), 0)
         self.assertIsNone(game.get_checker_details((7, 6)))
 
+    def test_token_registry(self):
+        game = Checkers()
+        player1 = game.create_player("Bob", "White")
+        game.create_player("Booth", "Black")
+
+        game.play_game("Booth", (5, 4), (4, 5))
+        game.play_game("Bob", (2, 5), (3, 4))
+        game.play_game("Booth", (4, 5), (3, 6))
+        game.play_game("Bob", (2, 7), (4, 5))
+
+        self.assertIsNone(game.get_token((3, 6)))
+        self.assertIsNone(game.get_token((2, 7)))
+        self.assertEqual(game.get_token((4, 5)).get_color(), "White")
+        for token in game.get_white_tokens() + game.get_black_tokens():
+            self.assertIs(game.get_token(token.get_position()), token)
+
+        triple = game.get_token((4, 5))
+        triple.change_type("TripleKing")
+        player1.add_count("TripleKing")
+        game.remove_token((4, 5), "White", "Black")
+
+        self.assertEqual(player1.get_triple_king_count(), 0)
+        self.assertNotIn(triple, game.get_white_tokens())
+
+    def test_legal_moves(self):
+        game = Checkers()
+        game.create_player("Bob", "White")
+        game.create_player("Booth", "Black")
+
+        self.assertEqual(len(game.legal_moves()), 7)
+        self.assertIn([(5, 0), (4, 1)], game.legal_moves())
+
+        game.play_game("Booth", (5, 4), (4, 5))
+        game.play_game("Bob", (2, 5), (3, 4))
+        game.play_game("Booth", (4, 5), (3, 6))
+
+        # capture is mandatory
+        self.assertEqual(game.legal_moves(), [[(2, 7), (4, 5)]])
+
+    def test_legal_moves_sequences(self):
+        game = Checkers()
+        game.create_player("Bob", "White")
+        game.create_player("Booth", "Black")
+        game.play_game("Booth", (5, 2), (4, 1))
+        game.play_game("Bob", (2, 5), (3, 6))
+        game.play_game("Booth", (5, 4), (4, 3))
+        game.play_game("Bob", (2, 3), (3, 2))
+        game.play_game("Booth", (4, 1), (2, 3))
+        moves = game.legal_moves()
+
+        self.assertEqual(moves, [[(1, 2), (3, 4), (5, 2)], [(1, 4), (3, 2), (5, 4)]])
+
+        # the turn only passes once the whole sequence has been played
+        self.assertEqual(game.play_game("Bob", (1, 2), (3, 4)), 1)
+        self.assertEqual(game.get_turn(), "White")
+        self.assertEqual(game.play_game("Bob", (3, 4), (5, 2)), 1)
+        self.assertEqual(game.get_turn(), "Black")
+
+    def test_debug_board_check(self):
+        game = Checkers(debug=True)
+        game.create_player("Bob", "White")
+        game.create_player("Booth", "Black")
+        game.play_game("Booth", (5, 4), (4, 5))
+        game.play_game("Bob", (2, 5), (3, 4))
+        game.play_game("Booth", (4, 5), (3, 6))
+        game.play_game("Bob", (2, 7), (4, 5))
+
+        self.assertEqual(game.get_board_dm()[2][7], "OK")
+        self.assertEqual(game.get_board_dm()[3][6], "OK")
+        self.assertEqual(game.get_board_dm()[4][5], "White")
+
+        game.get_board_codes()[4][5] = EMPTY
+        self.assertRaises(InvalidBoardState, game.check_board)
+
+    def test_board_codes(self):
+        game = Checkers()
+        game.create_player("Bob", "White")
+        game.create_player("Booth", "Black")
+        game.play_game("Booth", (5, 4), (4, 5))
+        codes = game.get_board_codes()
+
+        self.assertEqual((codes[0][0], codes[4][5], codes[5][4], codes[2][1]), (None, Color.BLACK, EMPTY, Color.WHITE))
+        self.assertEqual(game.get_board_dm()[5][4], "OK")
+        self.assertEqual(game.get_square_details((4, 5)), "Black")
+        token = game.get_token((2, 3))
+        self.assertEqual(token.possible_jumps(token.get_possible_moves(), codes),
+                         token.possible_jumps(token.get_possible_moves(), game.get_board_dm()))
+
+    def test_make_unmake_move(self):
+        game = Checkers(debug=True)
+        player1 = game.create_player("Bob", "White")
+        game.create_player("Booth", "Black")
+        game.play_game("Booth", (5, 2), (4, 1))
+        game.play_game("Bob", (2, 5), (3, 6))
+        game.play_game("Booth", (5, 4), (4, 3))
+        game.play_game("Bob", (2, 3), (3, 2))
+        game.play_game("Booth", (4, 1), (2, 3))
+        board = [row[:] for row in game.get_board_dm()]
+        black_tokens = list(game.get_black_tokens())
+
+        record = game.make_move([(1, 2), (3, 4), (5, 2)])
+
+        self.assertEqual(game.get_turn(), "Black")
+        self.assertEqual(player1.get_captured_pieces_count(), 2)
+        self.assertEqual(game.get_checker_details((5, 2)), "White")
+        self.assertIsNone(game.get_token((4, 3)))
+
+        game.unmake_move(record)
+
+        self.assertEqual(game.get_turn(), "White")
+        self.assertEqual(player1.get_captured_pieces_count(), 0)
+        self.assertEqual(game.get_board_dm(), board)
+        self.assertEqual(game.get_black_tokens(), black_tokens)
+        self.assertIn(game.get_token((4, 3)), black_tokens)
+
+    def test_position_hash(self):
+        game = Checkers()
+        game.create_player("Bob", "White")
+        game.create_player("Booth", "Black")
+        start = game.get_hash()
+
+        game.play_game("Booth", (5, 4), (4, 5))
+        game.play_game("Bob", (2, 5), (3, 4))
+        moved = game.get_hash()
+        game.play_game("Booth", (4, 5), (3, 6))
+        record = game.make_move([(2, 7), (4, 5)])
+
+        self.assertNotEqual(start, moved)
+        self.assertEqual(game.get_hash(), position_hash(game.get_black_tokens() + game.get_white_tokens(), "Black"))
+
+        game.unmake_move(record)
+        other = Checkers()
+        other.create_player("Bob", "White")
+        other.create_player("Booth", "Black")
+        other.play_game("Booth", (5, 4), (4, 5))
+        other.play_game("Bob", (2, 5), (3, 4))
+        other.play_game("Booth", (4, 5), (3, 6))
+
+        self.assertEqual(game.get_hash(), other.get_hash())
+        self.assertEqual(Checkers().get_hash(), start)
+
     def test_game_winner(self):
         game = Checkers()
         player1 = game.create_player("Bob", "White")
@@ -243,5 +486,771 @@ class CheckersTest(unittest.TestCase):
         self.assertEqual(game.game_winner(), "Game has not ended")
 
 
+class BitBoardTest(unittest.TestCase):
+
+    def test_start_position(self):
+        game = Checkers()
+        board = game.to_bitboard()
+
+        self.assertEqual(board.key(), BitBoard.start_position().key())
+        self.assertEqual(board.to_board(), game.get_board_dm())
+        self.assertEqual(board.piece_count("White"), 12)
+        self.assertEqual(len(board.legal_moves()), 7)
+
+    def test_capture_and_play(self):
+        game = Checkers()
+        game.create_player("A", "black")
+        game.create_player("B", "white")
+        game.play_game("A", (5, 4), (4, 5))
+        game.play_game("B", (2, 5), (3, 4))
+        game.play_game("A", (4, 5), (3, 6))
+        board = game.to_bitboard()
+        moves = [BitBoard.move_positions(move) for move in board.legal_moves()]
+
+        self.assertEqual(moves, [[(2, 7), (4, 5)]])
+
+        board.play(board.legal_moves()[0])
+        game.play_game("B", (2, 7), (4, 5))
+
+        self.assertEqual(board.key(), game.to_bitboard().key())
+        self.assertEqual(board.get_piece((4, 5)), ("White", "Regular"))
+        self.assertIsNone(board.get_piece((3, 6)))
+
+    def test_king_capture_chain(self):
+        # black king on (7, 2) with white pieces on (5, 4) and (2, 5)
+        white = (1 << 22) | (1 << 10)
+        board = BitBoard(black=1 << 29, white=white, kings=1 << 29, turn="Black")
+        moves = [BitBoard.move_positions(move) for move in board.legal_moves()]
+
+        self.assertTrue(board.has_captures())
+        self.assertEqual(len(moves), 4)
+        self.assertIn([(7, 2), (3, 6), (0, 3)], moves)
+        board.play(board.legal_moves()[2])
+        self.assertEqual(board.get_piece((0, 3)), ("Black", "King"))
+        self.assertEqual(board.winner(), "Black")
+
+
+class BitBoardCheckersTest(unittest.TestCase):
+
+    def test_backend(self):
+        game = Checkers(backend="bitboard")
+
+        self.assertIsInstance(game, BitBoardCheckers)
+        self.assertEqual(game.get_backend(), "bitboard")
+        self.assertEqual(Checkers().get_backend(), "objects")
+        self.assertEqual(game.get_board_dm(), Checkers().get_board_dm())
+        self.assertEqual(game.get_hash(), Checkers().get_hash())
+        self.assertRaises(ValueError, Checkers, backend="table")
+
+    def test_matches_objects(self):
+        games = [Checkers(debug=True), Checkers(debug=True, backend="bitboard")]
+        players = [(game.create_player("A", "black"), game.create_player("B", "white")) for game in games]
+        bot = RandomBot(3)
+        for ply in range(120):
+            moves = sorted(games[0].legal_moves())
+            self.assertEqual(sorted(games[1].legal_moves()), moves)
+            if not moves:
+                break
+            move = bot.choose_move(games[0])
+            name = "A" if games[0].get_turn() == "Black" else "B"
+            self.assertEqual(games[1].play_move(name, move), games[0].play_move(name, move))
+            for check in ("get_board_dm", "get_board_codes", "get_turn", "get_hash", "get_score", "get_record",
+                          "print_board", "game_winner"):
+                self.assertEqual(getattr(games[1], check)(), getattr(games[0], check)())
+            self.assertEqual([player.get_counts() for player in players[1]],
+                             [player.get_counts() for player in players[0]])
+
+    def test_play_game_errors(self):
+        game = Checkers(backend="bitboard")
+        game.create_player("A", "black")
+        game.create_player("B", "white")
+
+        self.assertRaises(OutofTurn, game.play_game, "B", (2, 1), (3, 0))
+        self.assertRaises(InvalidSquare, game.play_game, "A", (8, 1), (4, 0))
+        self.assertRaises(InvalidSquare, game.play_game, "A", (5, 5), (4, 4))
+        self.assertRaises(InvalidSquare, game.play_game, "A", (2, 1), (3, 0))
+        self.assertIsNone(game.play_game("A", (5, 0), (4, 3)))
+        self.assertEqual(game.play_game("A", (5, 0), (4, 1)), 0)
+        self.assertEqual(game.get_turn(), "White")
+
+    def test_perft(self):
+        for entry in load_fixtures():
+            game = Checkers.from_bitboard(from_fixture(entry), debug=True, backend="bitboard")
+
+            self.assertEqual(perft(game, 3), entry["counts"][2])
+            self.assertEqual(game.to_bitboard().key(), from_fixture(entry).key())
+
+    def test_snapshot(self):
+        game = Checkers(backend="bitboard")
+        game.create_player("A", "black")
+        game.create_player("B", "white")
+        game.play_game("A", (5, 4), (4, 5))
+        restored = Checkers.from_bytes(game.to_bytes())
+        objects = Checkers.from_bytes(game.to_bytes(), backend="objects")
+
+        self.assertEqual(restored.get_backend(), "bitboard")
+        self.assertEqual(restored.to_bytes(), game.to_bytes())
+        self.assertEqual(objects.get_backend(), "objects")
+        self.assertEqual(objects.get_hash(), game.get_hash())
+        self.assertEqual(objects.get_players(), game.get_players())
+
+    def test_engine_backends(self):
+        scores = [AlphaBetaEngine(time_limit=30, max_depth=3, backend=backend).search(Checkers())[1:]
+                  for backend in ("objects", "bitboard")]
+
+        self.assertEqual(scores[0], scores[1])
+
+
+class SnapshotTest(unittest.TestCase):
+
+    def setUp(self):
+        self.game = Checkers()
+        self.game.create_player("A", "black")
+        self.game.create_player("B", "white")
+        self.game.play_game("A", (5, 4), (4, 5))
+        self.game.play_game("B", (2, 5), (3, 4))
+        self.game.play_game("A", (4, 5), (3, 6))
+        self.game.play_game("B", (2, 7), (4, 5))
+
+    def test_round_trip(self):
+        game = Checkers.from_bytes(self.game.to_bytes())
+
+        self.assertEqual(game.get_board_dm(), self.game.get_board_dm())
+        self.assertEqual([token.get_position() for token in game.get_white_tokens()],
+                         [token.get_position() for token in self.game.get_white_tokens()])
+        self.assertEqual(game.get_turn(), "Black")
+        self.assertEqual(game.get_hash(), self.game.get_hash())
+        self.assertEqual(game.get_record(), self.game.get_record())
+        self.assertEqual(game.get_player("White").get_captured_pieces_count(), 1)
+        self.assertIsNone(Checkers().get_player(Color.WHITE))
+        self.assertEqual(game.legal_moves(), self.game.legal_moves())
+        self.assertRaises(OutofTurn, game.play_game, "B", (4, 5), (5, 4))
+        game.play_game("A", (5, 6), (3, 4))
+        self.assertIsNone(game.get_checker_details((4, 5)))
+
+    def test_file(self):
+        directory = tempfile.TemporaryDirectory()
+        path = os.path.join(directory.name, "game.bin")
+        Checkers.from_bitboard(self.game.to_bitboard()).to_file(path)
+        game = Checkers.from_file(path)
+        directory.cleanup()
+
+        self.assertEqual(game.get_players(), {})
+        self.assertEqual(game.to_bitboard().key(), self.game.to_bitboard().key())
+
+    def test_bad_data(self):
+        data = self.game.to_bytes()
+
+        self.assertRaises(ValueError, Checkers.from_bytes, b"LBGR" + data[4:])
+        self.assertRaises(ValueError, Checkers.from_bytes, data[:40])
+        self.assertRaises(ValueError, Checkers.from_bytes, b"")
+        # header, then one byte per token: square index in the low 5 bits, type code above
+        self.assertRaises(ValueError, Checkers.from_bytes, data[:14])
+        self.assertRaises(ValueError, Checkers.from_bytes, data[:10] + bytes([data[10] | 3 << 5]) + data[11:])
+        self.assertRaises(ValueError, Checkers.from_bytes, data[:-1])
+        # the first two black pieces on the same square, then a black Regular piece on row 0
+        self.assertRaises(ValueError, Checkers.from_bytes, data[:10] + data[10:11] * 2 + data[12:])
+        data = Checkers.from_bitboard(BitBoard(black=1 << SQUARE_OF[(7, 2)], white=1 << SQUARE_OF[(2, 1)])).to_bytes()
+        self.assertRaises(ValueError, Checkers.from_bytes, data[:10] + bytes([SQUARE_OF[(0, 1)]]) + data[11:])
+        self.assertEqual(Checkers.from_bytes(data[:10] + bytes([SQUARE_OF[(0, 1)] | 1 << 5]) + data[11:])
+                         .get_checker_details((0, 1)), "Black_king")
+
+
+class TranspositionTableTest(unittest.TestCase):
+
+    def test_store_probe(self):
+        table = TranspositionTable(size_mb=1)
+        game = Checkers()
+        table.store(game.get_hash(), 4, 120, EXACT, [(5, 0), (4, 1)])
+
+        self.assertEqual(table.probe(game.get_hash()), (4, 120, EXACT, [(5, 0), (4, 1)]))
+        self.assertIsNone(table.probe(game.get_hash() ^ 1))
+        self.assertLessEqual(table.get_memory(), 1024 * 1024)
+        self.assertEqual(table.get_stats()["hits"], 1)
+
+    def test_replacement(self):
+        deep = TranspositionTable(size_mb=0.001)
+        always = TranspositionTable(size_mb=0.001, replacement="always")
+        # keys that land in the same bucket of both tables
+        step = deep.get_size() // 2 * always.get_size()
+        for table in (deep, always):
+            table.store(5, 8, 10, LOWER, None)
+            table.store(5 + step, 2, 20, UPPER, None)
+            table.store(5 + 2 * step, 1, 30, EXACT, None)
+
+        # the deep result survives in its own slot, the shallow ones share the other
+        self.assertEqual(deep.probe(5), (8, 10, LOWER, []))
+        self.assertIsNone(deep.probe(5 + step))
+        self.assertEqual(deep.probe(5 + 2 * step), (1, 30, EXACT, []))
+        self.assertIsNone(always.probe(5))
+        self.assertRaises(ValueError, TranspositionTable, 1, "never")
+
+    def test_from_bitboard(self):
+        game = Checkers()
+        game.create_player("A", "black")
+        game.create_player("B", "white")
+        game.play_game("A", (5, 4), (4, 5))
+        board = game.to_bitboard()
+        copy = Checkers.from_bitboard(board, debug=True)
+
+        self.assertEqual(copy.get_board_dm(), game.get_board_dm())
+        self.assertEqual(copy.get_hash(), game.get_hash())
+        self.assertEqual(copy.get_turn(), "White")
+        self.assertEqual(copy.to_bitboard().key(), board.key())
+
+
+class EvaluationTest(unittest.TestCase):
+
+    def test_start_position(self):
+        game = Checkers()
+
+        self.assertEqual(game.get_score(), 0)
+        self.assertEqual(evaluate(game), 0)
+        self.assertEqual(evaluate(game, game.legal_moves()), 7 * MOBILITY_BONUS)
+
+    def test_square_scores(self):
+        self.assertEqual(square_score(Color.BLACK, PieceType.REGULAR, (7, 0)), 100 + BACK_RANK_GUARD)
+        self.assertEqual(square_score(Color.WHITE, PieceType.REGULAR, (0, 1)), 100 + BACK_RANK_GUARD)
+        self.assertGreater(square_score(Color.BLACK, PieceType.REGULAR, (3, 4)),
+                           square_score(Color.BLACK, PieceType.REGULAR, (5, 4)))
+        self.assertGreater(square_score(Color.WHITE, PieceType.KING, (3, 4)),
+                           square_score(Color.WHITE, PieceType.KING, (0, 7)))
+
+    def test_incremental_score(self):
+        game = Checkers()
+        game.create_player("A", "black")
+        game.create_player("B", "white")
+        game.play_game("A", (5, 4), (4, 5))
+        game.play_game("B", (2, 5), (3, 4))
+        game.play_game("A", (4, 5), (3, 6))
+        score = game.get_score()
+        self.assertEqual(score, position_score(game.get_black_tokens() + game.get_white_tokens()))
+
+        record = game.make_move(game.legal_moves()[0])
+        self.assertEqual(game.get_score(), position_score(game.get_black_tokens() + game.get_white_tokens()))
+        self.assertLess(game.get_score(), score - 100)
+        self.assertEqual(evaluate(game), game.get_score())
+        game.unmake_move(record)
+        self.assertEqual(game.get_score(), score)
+        self.assertEqual(evaluate(game), -score)
+
+
+class AlphaBetaEngineTest(unittest.TestCase):
+
+    def test_choose_move(self):
+        game = Checkers()
+        game.create_player("Bob", "White")
+        game.create_player("Booth", "Black")
+        engine = AlphaBetaEngine(time_limit=0.2)
+        move = engine.choose_move(game)
+
+        self.assertIn(move, game.legal_moves())
+        self.assertGreater(engine.get_stats()["depth"], 1)
+        self.assertLess(engine.get_stats()["seconds"], 0.5)
+
+    def test_play(self):
+        game = Checkers()
+        game.create_player("Bob", "White")
+        game.create_player("Booth", "Black")
+        engine = AlphaBetaEngine(time_limit=0.05, max_depth=3)
+        for turn in range(6):
+            engine.play(game, game.get_turn() == "Black" and "Booth" or "Bob")
+
+        self.assertEqual(game.get_turn(), "Black")
+        self.assertEqual(game.game_winner(), "Game has not ended")
+        self.assertLessEqual(engine.get_stats()["depth"], 3)
+
+    def test_root_split(self):
+        game = Checkers()
+        engine = AlphaBetaEngine(time_limit=0.5, max_depth=64, workers=2)
+        try:
+            move, score, depth = engine.search(game)
+        finally:
+            engine.close()
+
+        self.assertIn(move, game.legal_moves())
+        self.assertGreaterEqual(depth, 1)
+        # the pool is started with the engine, not inside the first search's budget
+        self.assertLess(engine.get_stats()["seconds"], 0.6)
+
+    def test_search_moves_stores_lower_bound(self):
+        game = Checkers()
+        engine = AlphaBetaEngine(time_limit=0.2, max_depth=3)
+        iterations, nodes = engine.search_moves(game, game.legal_moves()[:2])
+
+        self.assertEqual(engine.get_entry(game)[2], LOWER)
+        engine.search(game)
+        self.assertEqual(engine.get_entry(game)[2], EXACT)
+
+
+class MCTSEngineTest(unittest.TestCase):
+
+    def test_search_and_reuse(self):
+        game = Checkers()
+        game.create_player("Bob", "White")
+        game.create_player("Booth", "Black")
+        engine = MCTSEngine(playouts=60, time_limit=None, bias=0.5, max_rollout=40, seed=3)
+        move = engine.choose_move(game)
+
+        self.assertIn(move, game.legal_moves())
+        self.assertEqual(engine.get_stats()["rollouts"], 60)
+        self.assertFalse(engine.get_stats()["reused"])
+
+        game.play_move("Booth", move)
+        game.play_move("Bob", game.legal_moves()[0])
+        engine.choose_move(game)
+
+        self.assertTrue(engine.get_stats()["reused"])
+        self.assertGreater(engine.get_stats()["tree_visits"], 60)
+        self.assertRaises(ValueError, MCTSEngine, None, None)
+
+    def test_no_playouts_finished(self):
+        game = Checkers()
+        for engine in (MCTSEngine(time_limit=0.00001, seed=1), MCTSEngine(playouts=0, time_limit=None, seed=1)):
+            self.assertIn(engine.choose_move(game), game.legal_moves())
+            self.assertEqual(engine.get_stats()["rollouts"], 1)
+
+
+class SimulatorTest(unittest.TestCase):
+
+    def test_play_one(self):
+        winner, plies = play_one(RandomBot(1), RandomBot(2), 400)
+
+        self.assertIn(winner, ("Black", "White", None))
+        self.assertGreater(plies, 0)
+        self.assertEqual(play_one(RandomBot(1), RandomBot(2), 400), (winner, plies))
+        self.assertEqual(play_one(RandomBot(1), RandomBot(2), 3), (None, 3))
+
+    def test_simulate(self):
+        options = {"games": 6, "black": "random", "white": "random", "workers": 2, "max_moves": 200,
+                   "time_limit": 0.01, "max_depth": 2, "playouts": 10, "table_mb": 1, "seed": 0, "backend": "bitboard"}
+        report = simulate(options)
+
+        self.assertEqual(report["games"], 6)
+        self.assertEqual(report["black_wins"] + report["white_wins"] + report["draws"], 6)
+        self.assertGreater(report["moves_per_second"], 0)
+
+
+@unittest.skipIf(np is None, "NumPy is not installed")
+class BatchBoardTest(unittest.TestCase):
+
+    def test_matches_bitboard(self):
+        start = BitBoard.start_position()
+        king_capture = BitBoard(black=1 << 29, white=(1 << 22) | (1 << 10), kings=1 << 29, turn="Black")
+        triple = BitBoard(black=1 << 0, white=(1 << 5) | (1 << 14), triple_kings=1 << 0, turn="Black")
+        blocked = BitBoard(black=1 << 4, white=1 << 0, turn="Black")
+        batch = BatchBoard.from_bitboards([start, king_capture, triple, blocked])
+        legal = batch.legal_mask()
+
+        for index, board in enumerate([start, king_capture, triple, blocked]):
+            self.assertEqual(sorted(set(int(square) for square in legal[index].nonzero()[0])),
+                             sorted(set(path[0] for path, captured in board.legal_moves())))
+            self.assertEqual(batch.to_bitboard(index).key(), board.key())
+        self.assertEqual(batch.has_captures().tolist(), [False, True, True, False])
+        self.assertEqual(batch.piece_counts().tolist(), [[12, 12], [1, 2], [1, 2], [1, 1]])
+        self.assertEqual(batch.winners().tolist(), [0, 0, 0, -1])
+
+    def test_set_bitboard(self):
+        batch = BatchBoard.start_positions(3)
+        board = BitBoard.start_position()
+        board.play(board.legal_moves()[0])
+        batch.set_bitboard(1, board)
+
+        self.assertEqual(batch.to_bitboard(1).key(), board.key())
+        self.assertEqual(batch.get_turns().tolist(), [1, -1, 1])
+        self.assertEqual(int(batch.legal_mask()[1].sum()), len(board.legal_moves()))
+
+
+class TablebaseTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.directory = tempfile.TemporaryDirectory()
+        cls.path = os.path.join(cls.directory.name, "tablebase.bin")
+        cls.stats = generate(2, cls.path)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.directory.cleanup()
+
+    def test_probe(self):
+        tablebase = Tablebase(self.path)
+
+        self.assertEqual(self.stats["positions"], (os.path.getsize(self.path) - 8) // 2)
+        self.assertEqual(tablebase.get_pieces(), 2)
+        self.assertEqual(tablebase.probe(BitBoard(black=1 << 21, white=1 << 17)), (WON, 1))
+        self.assertEqual(tablebase.probe(BitBoard(black=1 << 21, white=1 << 17, turn="White")), (WON, 1))
+        self.assertEqual(tablebase.probe(BitBoard(black=1 << 21, turn="White")), (LOST, 0))
+        self.assertIsNone(tablebase.probe(BitBoard.start_position()))
+
+        game = Checkers.from_bitboard(BitBoard(black=1 << 29, white=1 << 0, kings=1 << 29))
+        self.assertEqual(tablebase.probe_game(game), (WON, 7))
+        tablebase.close()
+
+    def test_engine_uses_tablebase(self):
+        game = Checkers.from_bitboard(BitBoard(black=1 << 29, white=1 << 0, kings=1 << 29))
+        engine = AlphaBetaEngine(time_limit=0.5, tablebase=self.path)
+        try:
+            move, score, depth = engine.search(game)
+        finally:
+            engine.close()
+
+        self.assertIn(move, game.legal_moves())
+        self.assertEqual(score, WIN - 7)
+
+    def test_bad_file(self):
+        path = os.path.join(self.directory.name, "bad.bin")
+        with open(path, "wb") as output:
+            output.write(bytes(16))
+        self.assertRaises(ValueError, Tablebase, path)
+
+
+class OpeningBookTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "openings.bin")
+        self.options = {"games": 20, "plies": 6, "bot": "random", "explore": 0.0, "workers": 1, "max_moves": 200,
+                        "time_limit": 0.01, "max_depth": 2, "playouts": 10, "table_mb": 1, "seed": 0}
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_build_and_lookup(self):
+        stats = build(self.path, self.options)
+        book = OpeningBook(self.path)
+        game = Checkers()
+        entries = book.lookup(game.get_hash())
+
+        self.assertEqual(stats["games"], 20)
+        self.assertEqual(book.get_size(), stats["records"])
+        self.assertEqual(sum(games for move, games, wins, draws in entries), 20)
+        for move, games, wins, draws in entries:
+            self.assertIn(move, game.legal_moves())
+            self.assertLessEqual(wins + draws, games)
+        self.assertIn(book.choose(game), game.legal_moves())
+        self.assertIsNone(book.choose(game, min_games=21))
+        self.assertEqual(book.lookup(12345), [])
+        book.close()
+
+    def test_engine_uses_book(self):
+        build(self.path, self.options)
+        game = Checkers()
+        engine = AlphaBetaEngine(time_limit=0.05, book=self.path)
+        try:
+            move = engine.choose_move(game)
+        finally:
+            engine.close()
+
+        self.assertIn(move, game.legal_moves())
+        self.assertTrue(engine.get_stats()["book"])
+        self.assertEqual(engine.get_stats()["nodes"], 0)
+
+    def test_choose_by_confidence(self):
+        game = Checkers()
+        lucky, proven = [encode_move(move) for move in game.legal_moves()[:2]]
+        # one win in one game against 90 wins in 100 games
+        records = sorted([(game.get_hash(), lucky, 1, 1, 0), (game.get_hash(), proven, 100, 90, 0)])
+        with open(self.path, "wb") as output:
+            output.write(BOOK_HEADER.pack(BOOK_MAGIC, BOOK_VERSION, len(records)))
+            for record in records:
+                output.write(BOOK_RECORD.pack(*record))
+        book = OpeningBook(self.path)
+        try:
+            self.assertEqual(book.choose(game), game.legal_moves()[1])
+        finally:
+            book.close()
+        self.assertLess(lower_bound(1, 1), lower_bound(90, 100))
+        self.assertAlmostEqual(lower_bound(50, 100), 0.4038, places=3)
+
+        engine = AlphaBetaEngine(time_limit=0.05, book=self.path, book_min_games=101)
+        try:
+            engine.choose_move(game)
+        finally:
+            engine.close()
+        self.assertFalse(engine.get_stats()["book"])
+
+
+class GameRecordTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "games.lbgr")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_record_and_replay(self):
+        game = Checkers()
+        game.create_player("A", "black")
+        game.create_player("B", "white")
+        game.play_game("A", (5, 4), (4, 5))
+        game.play_game("B", (2, 5), (3, 4))
+        game.play_game("A", (4, 5), (3, 6))
+        game.play_game("B", (2, 7), (4, 5))
+        steps = decode_steps(game.get_record())
+
+        self.assertEqual(len(game.get_record()), 16)
+        self.assertEqual(steps[3], (11, 18, 1, 0))
+        self.assertEqual(len(list(replay(steps))), 4)
+        self.assertEqual(final_position(game.get_record()).key(), game.to_bitboard().key())
+
+    def test_flags(self):
+        # black king on (7, 2) and piece on (1, 2), white pieces on (5, 4), (2, 5) and (0, 7)
+        board = BitBoard(black=(1 << 29) | (1 << 5), white=(1 << 22) | (1 << 10) | (1 << 3), kings=1 << 29,
+                         turn="Black")
+        game = Checkers.from_bitboard(board)
+        game.create_player("A", "black")
+        game.create_player("B", "white")
+        game.play_game("A", (7, 2), (3, 6))
+        game.play_game("A", (3, 6), (1, 4))
+        game.play_game("B", (0, 7), (1, 6))
+        game.play_game("A", (1, 2), (0, 1))
+        steps = decode_steps(game.get_record())
+
+        self.assertEqual(steps[0][2:], (1, CONTINUES))
+        self.assertEqual(steps[1][2:], (1, 0))
+        self.assertEqual(steps[3][2:], (0, PROMOTED))
+        self.assertEqual(final_position(steps, board.key()).get_piece((0, 1)), ("Black", "King"))
+        self.assertEqual(final_position(steps, board.key()).key(), game.to_bitboard().key())
+
+    def test_write_and_read(self):
+        games = [(RandomBot(seed), RandomBot(seed + 1)) for seed in range(3)]
+        records = []
+        with GameRecordWriter(self.path) as writer:
+            for black, white in games:
+                game = Checkers()
+                game.create_player("Black", "Black")
+                game.create_player("White", "White")
+                for ply in range(30):
+                    game.play_move(game.get_turn(), black.choose_move(game) if game.get_turn() == "Black"
+                                   else white.choose_move(game))
+                writer.write_game(game.get_record(), None)
+                records.append((game.get_record(), game.to_bitboard().key()))
+        with GameRecordWriter(self.path, append=True) as writer:
+            writer.write_game([], "White")
+        read = list(read_games(self.path))
+
+        self.assertEqual(len(read), 4)
+        self.assertEqual(read[3], ("White", []))
+        for (winner, steps), (record, key) in zip(read, records):
+            self.assertIsNone(winner)
+            self.assertEqual(steps, decode_steps(record))
+            self.assertEqual(final_position(steps).key(), key)
+
+    def test_bad_file(self):
+        with open(self.path, "wb") as output:
+            output.write(bytes(16))
+        self.assertRaises(ValueError, list, read_games(self.path))
+
+
+class ServerTest(unittest.IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.server = GameServer(idle_seconds=60, suspend_dir=self.directory.name)
+        listener = await self.server.start(port=0)
+        self.port = listener.sockets[0].getsockname()[1]
+        self.connections = []
+
+    async def asyncTearDown(self):
+        for reader, writer in self.connections:
+            writer.close()
+        await self.server.close()
+        self.directory.cleanup()
+
+    async def connect(self):
+        connection = await asyncio.open_connection("127.0.0.1", self.port)
+        self.connections.append(connection)
+        return connection
+
+    async def request(self, connection, message):
+        reader, writer = connection
+        writer.write(json.dumps(message).encode() + b"\n")
+        line = json.loads(await reader.readline())
+        while "event" in line:
+            line = json.loads(await reader.readline())
+        return line
+
+    async def test_two_players(self):
+        first = await self.connect()
+        second = await self.connect()
+        game = (await self.request(first, {"op": "create", "name": "A", "color": "black"}))["game"]
+        move = {"op": "move", "game": game, "from": [5, 4], "to": [4, 5]}
+
+        self.assertEqual((await self.request(first, move))["error"], "not_ready")
+        self.assertEqual((await self.request(second, {"op": "join", "game": game, "name": "B"}))["color"], "White")
+        self.assertEqual((await self.request(second, move))["error"], "out_of_turn")
+        self.assertEqual((await self.request(first, dict(move, to=[3, 6])))["error"], "illegal_move")
+        self.assertEqual((await self.request(first, dict(move, to=[9, 5])))["error"], "invalid_square")
+        self.assertEqual((await self.request(first, dict(move, to=[-3, 2])))["error"], "invalid_square")
+        self.assertEqual((await self.request(first, dict(move, to=[4, 4])))["error"], "invalid_square")
+        self.assertEqual((await self.request(first, move))["turn"], "White")
+        event = json.loads(await second[0].readline())
+        self.assertEqual((event["event"], event["to"]), ("moved", [4, 5]))
+
+        self.assertEqual(self.server.suspend_idle(now=time.monotonic() + 120), 1)
+        self.assertEqual(self.server.get_active_count(), 0)
+        state = await self.request(second, {"op": "state", "game": game})
+        self.assertEqual(state["board"][4][5], "Black")
+        self.assertEqual(state["players"], {"Black": "A", "White": "B"})
+
+    async def test_bad_requests(self):
+        connection = await self.connect()
+
+        self.assertEqual((await self.request(connection, {"op": "state", "game": 99}))["error"], "unknown_game")
+        self.assertEqual((await self.request(connection, {"op": "fly"}))["error"], "bad_request")
+        self.assertEqual((await self.request(connection, {"op": "create", "name": "A", "color": "red"}))["error"],
+                         "invalid_color")
+        self.assertEqual((await self.request(connection, {"op": "create", "name": "A", "color": 1}))["error"],
+                         "bad_request")
+        self.assertEqual((await self.request(connection, {"op": "create", "name": None, "color": "black"}))["error"],
+                         "bad_request")
+        connection[1].write(b"not json\n")
+        self.assertEqual(json.loads(await connection[0].readline())["error"], "bad_request")
+
+    async def test_no_suspend_mid_chain(self):
+        connection = await self.connect()
+        game = (await self.request(connection, {"op": "create", "name": "A", "color": "black"}))["game"]
+        self.server.get_session(game).chain = (3, 6)
+
+        self.assertEqual(self.server.suspend_idle(now=time.monotonic() + 120), 0)
+        self.server.get_session(game).chain = None
+        self.assertEqual(self.server.suspend_idle(now=time.monotonic() + 120), 1)
+
+    async def test_expire(self):
+        first = await self.connect()
+        second = await self.connect()
+        left = (await self.request(first, {"op": "create", "name": "A", "color": "black"}))["game"]
+        kept = (await self.request(second, {"op": "create", "name": "B", "color": "black"}))["game"]
+        self.assertEqual(self.server.suspend_idle(now=time.monotonic() + 120), 2)
+        first[1].close()
+        await first[1].wait_closed()
+        for attempt in range(100):
+            if not self.server.get_session(left).clients:
+                break
+            await asyncio.sleep(0.01)
+
+        self.assertEqual(self.server.expire(now=time.monotonic() + 120), 1)
+        self.assertIsNone(self.server.get_session(left))
+        self.assertEqual(os.listdir(self.directory.name), [str(kept) + ".game"])
+        self.assertEqual((await self.request(second, {"op": "state", "game": left}))["error"], "unknown_game")
+
+    async def test_bot_error(self):
+        # the executor builds the bot from these options, so the missing max_depth makes the bot move fail
+        server = GameServer(bot_options={"time_limit": 0.1})
+        listener = await server.start(port=0)
+        try:
+            connection = await asyncio.open_connection("127.0.0.1", listener.sockets[0].getsockname()[1])
+            self.connections.append(connection)
+            with self.assertLogs("Server", "ERROR"):
+                created = await self.request(connection, {"op": "create", "name": "A", "color": "white",
+                                                          "bot": "alphabeta"})
+                event = json.loads(await connection[0].readline())
+        finally:
+            await server.close()
+
+        self.assertEqual((event["event"], event["game"], event["error"]), ("error", created["game"], "bot_failed"))
+
+    async def test_bot_game(self):
+        connection = await self.connect()
+        created = await self.request(connection, {"op": "create", "name": "A", "color": "white", "bot": "random"})
+        event = json.loads(await connection[0].readline())
+
+        self.assertEqual(event["turn"], "White")
+        state = await self.request(connection, {"op": "state", "game": created["game"]})
+        self.assertEqual(state["players"]["Black"], "CPU")
+        self.assertEqual(state["turn"], "White")
+
+
+class InstrumentationTest(unittest.TestCase):
+
+    def tearDown(self):
+        Instrumentation.disable()
+        Instrumentation.reset()
+
+    def play(self):
+        game = Checkers()
+        game.create_player("A", "black")
+        game.create_player("B", "white")
+        game.play_game("A", (5, 4), (4, 5))
+        game.play_game("B", (2, 5), (3, 4))
+        game.play_game("A", (4, 5), (3, 6))
+        game.play_game("B", (2, 7), (4, 5))
+        return game
+
+    def test_disabled(self):
+        original = Checkers.play_game
+        self.play()
+
+        self.assertFalse(Checkers.stats()["enabled"])
+        self.assertEqual(Checkers.stats()["functions"], {})
+        Instrumentation.enable()
+        self.assertIsNot(Checkers.play_game, original)
+        Instrumentation.disable()
+        self.assertIs(Checkers.play_game, original)
+
+    def test_enabled(self):
+        Instrumentation.enable()
+        game = self.play()
+        stats = game.stats()
+
+        self.assertEqual(stats["functions"]["Checkers.play_game"]["calls"], 4)
+        self.assertEqual(stats["functions"]["Checkers._take_token"]["calls"], 1)
+        self.assertGreater(stats["functions"]["Token.get_possible_moves"]["calls"], 4)
+        AlphaBetaEngine(time_limit=1.0, max_depth=2).search(game)
+        stats = game.stats()
+        self.assertEqual(stats["counts"]["alphabeta.searches"], 1)
+        self.assertGreater(stats["counts"]["alphabeta.nodes"], 0)
+
+    def test_dump(self):
+        Instrumentation.enable()
+        self.play()
+        directory = tempfile.TemporaryDirectory()
+        path = os.path.join(directory.name, "stats.json")
+        Instrumentation.dump(path)
+        with open(path) as stats_file:
+            stats = json.load(stats_file)
+        directory.cleanup()
+
+        self.assertTrue(stats["enabled"])
+        self.assertEqual(stats["functions"]["Checkers.play_game"]["calls"], 4)
+
+
+class PerftTest(unittest.TestCase):
+
+    def test_fixtures(self):
+        self.assertEqual(check_fixtures(backend="checkers", max_depth=4), [])
+        self.assertEqual(check_fixtures(backend="bitboard", max_depth=4), [])
+
+    def test_divide(self):
+        for entry in load_fixtures():
+            board = from_fixture(entry)
+            checkers = divide(board, 3, "checkers")
+
+            self.assertEqual(checkers, divide(board, 3, "bitboard"))
+            self.assertEqual(sum(checkers.values()), entry["counts"][2])
+            self.assertEqual(run(board, 3, "bitboard")["nodes"], entry["counts"][2])
+
+
+class BenchmarkTest(unittest.TestCase):
+
+    def test_run_benchmarks(self):
+        report = run_benchmarks(list(BENCHMARKS), repeat=1, number=1)
+
+        self.assertEqual(set(report["results"]), set(BENCHMARKS))
+        for result in report["results"].values():
+            self.assertGreater(result["seconds"], 0)
+            self.assertEqual(result["number"], 1)
+
+    def test_compare(self):
+        baseline = {"results": {"play_game": {"seconds": 1.0}, "full_game": {"seconds": 1.0}}}
+        current = {"results": {"play_game": {"seconds": 1.05}, "full_game": {"seconds": 1.5},
+                               "possible_jumps": {"seconds": 2.0}}}
+
+        self.assertEqual(compare(baseline, current, 0.1), [("full_game", 1.0, 1.5, 1.5)])
+        self.assertEqual(compare(baseline, current, 0.6), [])
+
+
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
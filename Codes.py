@@ -0,0 +1,49 @@
+from enum import IntEnum
+
+
+class Color(IntEnum):
+    """Small-int piece and player colors, also used as list indexes"""
+    BLACK = 0
+    WHITE = 1
+
+
+class PieceType(IntEnum):
+    """Small-int token types, in promotion order"""
+    REGULAR = 0
+    KING = 1
+    TRIPLE_KING = 2
+
+
+# Plain int copies of the codes, used internally: looking up and operating on IntEnum members goes through
+# the enum machinery, which is too slow for the checks made on every move
+BLACK = int(Color.BLACK)
+WHITE = int(Color.WHITE)
+REGULAR = int(PieceType.REGULAR)
+KING = int(PieceType.KING)
+TRIPLE_KING = int(PieceType.TRIPLE_KING)
+# player count code for captures, next to the KING and TRIPLE_KING counts
+CAPTURE = 3
+
+# names returned by the string accessors, indexed by code
+COLOR_NAMES = ("Black", "White")
+TYPE_NAMES = ("Regular", "King", "TripleKing")
+
+# code lookups accepting the name, the plain int code or the IntEnum member
+COLOR_CODES = {"Black": BLACK, "White": WHITE, BLACK: BLACK, WHITE: WHITE,
+               Color.BLACK: BLACK, Color.WHITE: WHITE}
+TYPE_CODES = {"Regular": REGULAR, "King": KING, "TripleKing": TRIPLE_KING,
+              REGULAR: REGULAR, KING: KING, TRIPLE_KING: TRIPLE_KING,
+              PieceType.REGULAR: REGULAR, PieceType.KING: KING, PieceType.TRIPLE_KING: TRIPLE_KING}
+COUNT_CODES = {"King": KING, "TripleKing": TRIPLE_KING, "Capture": CAPTURE, KING: KING, TRIPLE_KING: TRIPLE_KING,
+               CAPTURE: CAPTURE, PieceType.KING: KING, PieceType.TRIPLE_KING: TRIPLE_KING}
+
+# code of an empty dark square in a board grid, whose other squares hold the Color code of their piece (light
+# squares are None), and the names get_board_dm shows for the three
+EMPTY = 2
+SQUARE_NAMES = ("Black", "White", "OK")
+SQUARE_CODES = {"Black": BLACK, "White": WHITE, "OK": EMPTY, None: None}
+
+# the other color, indexed by code
+OPPONENT = (WHITE, BLACK)
+# row where each color's Regular pieces are crowned, and Kings become TripleKings on the other one
+CROWN_ROWS = (0, 7)
@@ -0,0 +1,482 @@
+import time
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeout
+from BitBoard import BitBoard, SQUARE_OF, POSITION_OF
+from CheckersGame import Checkers, BACKENDS
+from Evaluation import evaluate
+from Exceptions import SearchTimeout
+from Instrumentation import record_count
+from OpeningBook import OpeningBook
+from Tablebase import Tablebase, WON, LOST
+from TranspositionTable import TranspositionTable, EXACT, LOWER, UPPER
+
+# score for a won position, reduced by the number of plies it takes to get there
+WIN = 100000
+# scores above this are treated as forced wins or losses
+WIN_BOUND = WIN - 1000
+
+
+class AlphaBetaEngine:
+    """CPU opponent searching a Checkers game with negamax alpha-beta, iterative deepening, a quiescence search
+    over captures and a transposition table. Each move is searched in place with make_move/unmake_move and is
+    bounded by a wall-clock budget in seconds: the move from the last completed depth is played.
+    With workers > 1 the root moves are split across a process pool, each worker deepening its share of them.
+    The pool is started and warmed up when the engine is created, outside any move's budget. The position is sent
+    to the workers as BitBoard masks and the moves as square indices. Call close() to shut the pool down.
+    Given the path of a tablebase file, positions it covers are scored from the file instead of searched. Given
+    the path of an opening book file, positions in the book are played from it without searching, using book moves
+    played in at least book_min_games games (OpeningBook.choose). Positions are searched on a copy of the game
+    with the given Checkers backend, BitBoard masks by default, unless the game already uses that backend"""
+    def __init__(self, time_limit=1.0, max_depth=64, table_mb=16, workers=1, tablebase=None, book=None,
+                 backend="bitboard", book_min_games=1):
+        if backend not in BACKENDS:
+            raise ValueError("Backend can only be one of " + ", ".join(BACKENDS))
+        self._time_limit = time_limit
+        self._max_depth = max_depth
+        self._table_mb = table_mb
+        self._table = TranspositionTable(table_mb)
+        self._workers = workers
+        self._tablebase_path = tablebase
+        self._tablebase = Tablebase(tablebase) if tablebase is not None else None
+        self._book = OpeningBook(book) if book is not None else None
+        self._book_min_games = book_min_games
+        self._backend = backend
+        self._pool = None
+        self._deadline = 0.0
+        self._nodes = 0
+        self._path = []
+        self._stats = {}
+        if workers > 1:
+            self._start_pool()
+
+    def _start_pool(self):
+        """
+        Starts the worker process pool and waits until every worker is up and has imported this module, so
+        searches don't pay for it
+
+        :return: None
+        """
+        self._pool = ProcessPoolExecutor(self._workers)
+        for future in [self._pool.submit(warm_worker) for worker in range(self._workers)]:
+            future.result()
+
+    def set_time_limit(self, time_limit):
+        """
+        Changes the time budget per move
+
+        :param time_limit: Float, seconds
+        :return: None
+        """
+        self._time_limit = time_limit
+
+    def close(self):
+        """
+        Shuts down the worker process pool, if one was started, and closes the tablebase and opening book files
+
+        :return: None
+        """
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+        if self._tablebase is not None:
+            self._tablebase.close()
+            self._tablebase = None
+        if self._book is not None:
+            self._book.close()
+            self._book = None
+
+    def get_entry(self, game):
+        """
+        Returns the transposition table entry stored for the current position of a game, or None
+
+        :param game: Checkers object
+        :return: Tuple (depth, score, bound, move) or None
+        """
+        return self._table.probe(game.get_hash())
+
+    def get_stats(self):
+        """
+        Returns statistics of the last search: nodes, completed depth, score, seconds, nodes per second and
+        whether the move came from the opening book
+
+        :return: Dictionary
+        """
+        return self._stats
+
+    def choose_move(self, game):
+        """
+        Searches the current position of a game and returns the best move found within the time budget,
+        as a list of squares for Checkers.play_move, or None if the side to move has no legal move
+
+        :param game: Checkers object
+        :return: List of tuples or None
+        """
+        return self.search(game)[0]
+
+    def play(self, game, player_name):
+        """
+        Chooses a move for the player whose turn it is and plays it through play_game
+
+        :param game: Checkers object
+        :param player_name: String
+        :return: Int captures, or None if there was no legal move
+        """
+        move = self.choose_move(game)
+        if move is None:
+            return None
+        return game.play_move(player_name, move)
+
+    def search(self, game):
+        """
+        Iterative deepening driver. Searches depth 1, 2, ... until the time budget runs out or max_depth
+        is reached and returns the result of the deepest completed iteration. A book move is returned with
+        depth 0 without searching
+
+        :param game: Checkers object
+        :return: Tuple (move or None, score, depth)
+        """
+        if self._workers > 1 and self._pool is None:
+            # restarted after close(), before the clock starts
+            self._start_pool()
+        start = time.perf_counter()
+        self._deadline = start + self._time_limit
+        self._nodes = 0
+        if game.get_backend() != self._backend:
+            game = Checkers.from_bitboard(game.to_bitboard(), backend=self._backend)
+        moves = game.legal_moves()
+        best = (moves[0] if moves else None, 0, 0)
+        book_move = None
+        if len(moves) > 1 and self._book is not None:
+            book_move = self._book.choose(game, self._book_min_games)
+        if book_move is not None:
+            best = (book_move, 0, 0)
+        elif len(moves) > 1:
+            if self._workers > 1:
+                iterations = self._split_search(game, moves)
+            else:
+                iterations = self.deepen(game, moves)
+            if iterations:
+                best = iterations[-1]
+        elapsed = time.perf_counter() - start
+        self._stats = {"nodes": self._nodes, "depth": best[2], "score": best[1], "seconds": elapsed,
+                       "nps": self._nodes / elapsed if elapsed else 0.0, "book": book_move is not None}
+        record_count("alphabeta.searches")
+        record_count("alphabeta.nodes", self._nodes)
+        return best
+
+    def deepen(self, game, moves, bound=EXACT):
+        """
+        Runs iterative deepening over the given root moves until the deadline or max_depth and returns the
+        (move, score, depth) result of every completed depth, deepest last
+
+        :param game: Checkers object
+        :param moves: List of legal moves to search at the root
+        :param bound: Bound the root scores are stored with, LOWER when moves is only part of the legal moves
+        :return: List of tuples
+        """
+        self._path = []
+        iterations = []
+        for depth in range(1, self._max_depth + 1):
+            try:
+                score, move = self._root(game, moves, depth, bound)
+            except SearchTimeout:
+                break
+            iterations.append((move, score, depth))
+            # a forced win or loss won't change with more depth
+            if abs(score) > WIN_BOUND:
+                break
+        return iterations
+
+    def _split_search(self, game, moves):
+        """
+        Root split: deals the root moves out to the worker processes, which deepen their share until the
+        deadline. Results are collected until the deadline, a worker that hasn't answered by then is left out.
+        Returns the best result per depth over the depths every answering worker completed, an empty list if
+        none answered
+
+        :param game: Checkers object
+        :param moves: List of legal moves
+        :return: List of (move, score, depth) tuples
+        """
+        position = game.to_bitboard().key()
+        squares = [tuple(SQUARE_OF[square] for square in move) for move in moves]
+        # leave time to collect the results before the deadline
+        budget = max((self._deadline - time.perf_counter()) * 0.9 - 0.02, 0.01)
+        futures = [self._pool.submit(search_root_moves, position, squares[worker::self._workers], budget,
+                                     self._max_depth, self._table_mb, self._tablebase_path, self._backend)
+                   for worker in range(min(self._workers, len(moves)))]
+        results = []
+        for future in futures:
+            try:
+                results.append(future.result(timeout=max(self._deadline - time.perf_counter(), 0.0)))
+            except FutureTimeout:
+                future.cancel()
+        self._nodes = sum(nodes for found, nodes in results)
+        if not results:
+            return []
+        iterations = []
+        for index in range(min(len(found) for found, nodes in results)):
+            square_move, score, depth = max((found[index] for found, nodes in results), key=lambda item: item[1])
+            iterations.append(([POSITION_OF[square] for square in square_move], score, depth))
+        return iterations
+
+    def search_moves(self, game, moves):
+        """
+        Deepens only the given root moves within the time budget, as a worker of a root split search does. The
+        best of a share of the root moves is only a lower bound on the position's score, so that is what is
+        stored for the root
+
+        :param game: Checkers object
+        :param moves: List of legal moves
+        :return: Tuple (List of (move, score, depth) tuples, Int nodes searched)
+        """
+        self._deadline = time.perf_counter() + self._time_limit
+        self._nodes = 0
+        return self.deepen(game, moves, LOWER), self._nodes
+
+    def _root(self, game, moves, depth, bound=EXACT):
+        """
+        Searches every root move to the given depth, the previous iteration's best move first
+
+        :param game: Checkers object
+        :param moves: List of legal moves
+        :param depth: Int
+        :param bound: Bound the root score is stored with
+        :return: Tuple (score, move)
+        """
+        alpha = -WIN - 1
+        best_move = None
+        for move in self._order(moves, self._table.probe(game.get_hash())):
+            record = game.make_move(move)
+            try:
+                score = -self._negamax(game, depth - 1, -WIN - 1, -alpha, 1)
+            finally:
+                game.unmake_move(record)
+            if score > alpha:
+                alpha = score
+                best_move = move
+        self._table.store(game.get_hash(), depth, alpha, bound, best_move)
+        return alpha, best_move
+
+    def _negamax(self, game, depth, alpha, beta, ply):
+        """
+        Negamax alpha-beta search returning the score of the position for the side to move
+
+        :param game: Checkers object
+        :param depth: Int, remaining depth
+        :param alpha: Int
+        :param beta: Int
+        :param ply: Int, distance from the root
+        :return: Int
+        """
+        self._nodes += 1
+        if time.perf_counter() > self._deadline:
+            raise SearchTimeout("Search time budget used up")
+        key = game.get_hash()
+        # a position repeated along the current line is scored as a draw
+        if key in self._path:
+            return 0
+        if self._tablebase is not None:
+            found = self._tablebase.probe_game(game)
+            if found is not None:
+                return tablebase_score(found, ply)
+        if depth <= 0:
+            return self._quiescence(game, alpha, beta, ply)
+
+        entry = self._table.probe(key)
+        if entry is not None and entry[0] >= depth:
+            score = from_table(entry[1], ply)
+            if entry[2] == EXACT:
+                return score
+            if entry[2] == LOWER and score >= beta:
+                return score
+            if entry[2] == UPPER and score <= alpha:
+                return score
+
+        moves = game.legal_moves()
+        if not moves:
+            return -WIN + ply
+
+        original_alpha = alpha
+        best_score = -WIN - 1
+        best_move = None
+        self._path.append(key)
+        try:
+            for move in self._order(moves, entry):
+                record = game.make_move(move)
+                try:
+                    score = -self._negamax(game, depth - 1, -beta, -alpha, ply + 1)
+                finally:
+                    game.unmake_move(record)
+                if score > best_score:
+                    best_score = score
+                    best_move = move
+                if score > alpha:
+                    alpha = score
+                if alpha >= beta:
+                    break
+        finally:
+            self._path.pop()
+
+        if best_score <= original_alpha:
+            bound = UPPER
+        elif best_score >= beta:
+            bound = LOWER
+        else:
+            bound = EXACT
+        self._table.store(key, depth, to_table(best_score, ply), bound, best_move)
+        return best_score
+
+    def _quiescence(self, game, alpha, beta, ply):
+        """
+        Resolves pending captures before evaluating. Captures are mandatory, so a position with captures
+        available is searched through them, any other position is evaluated as it stands
+
+        :param game: Checkers object
+        :param alpha: Int
+        :param beta: Int
+        :param ply: Int
+        :return: Int
+        """
+        moves = game.legal_moves()
+        if not moves:
+            return -WIN + ply
+        if not is_capture(moves[0]):
+            return self.evaluate(game, moves)
+        best_score = -WIN - 1
+        for move in self._order(moves, None):
+            record = game.make_move(move)
+            try:
+                self._nodes += 1
+                if time.perf_counter() > self._deadline:
+                    raise SearchTimeout("Search time budget used up")
+                score = -self._quiescence(game, -beta, -alpha, ply + 1)
+            finally:
+                game.unmake_move(record)
+            if score > best_score:
+                best_score = score
+            if score > alpha:
+                alpha = score
+            if alpha >= beta:
+                break
+        return best_score
+
+    def evaluate(self, game, moves=None):
+        """
+        Static evaluation of a position for the side to move: the game's incrementally kept material and
+        piece-square score, plus mobility when the legal moves are known (Evaluation module)
+
+        :param game: Checkers object
+        :param moves: List of legal moves or None
+        :return: Int
+        """
+        return evaluate(game, moves)
+
+    def _order(self, moves, entry):
+        """
+        Orders moves for searching: the transposition table's best move first, then longer capture sequences
+
+        :param moves: List of legal moves
+        :param entry: Transposition table entry or None
+        :return: List of legal moves
+        """
+        ordered = sorted(moves, key=len, reverse=True)
+        if entry is not None and entry[3] in ordered:
+            ordered.remove(entry[3])
+            ordered.insert(0, entry[3])
+        return ordered
+
+
+def is_capture(move):
+    """
+    Returns True if a move from legal_moves is a capture: simple moves only go one square
+
+    :param move: List of tuples
+    :return: Bool
+    """
+    return len(move) > 2 or abs(move[1][0] - move[0][0]) > 1
+
+
+def tablebase_score(found, ply):
+    """
+    Converts a tablebase result into a search score, wins and losses counted from the root like mates found
+    by the search
+
+    :param found: Tuple (result, distance) from Tablebase
+    :param ply: Int
+    :return: Int
+    """
+    result, distance = found
+    if result == WON:
+        return WIN - ply - distance
+    if result == LOST:
+        return -WIN + ply + distance
+    return 0
+
+
+def to_table(score, ply):
+    """
+    Converts a win/loss score to be relative to the stored position instead of the root
+
+    :param score: Int
+    :param ply: Int
+    :return: Int
+    """
+    if score > WIN_BOUND:
+        return score + ply
+    if score < -WIN_BOUND:
+        return score - ply
+    return score
+
+
+def from_table(score, ply):
+    """
+    Converts a stored win/loss score back to be relative to the root
+
+    :param score: Int
+    :param ply: Int
+    :return: Int
+    """
+    if score > WIN_BOUND:
+        return score - ply
+    if score < -WIN_BOUND:
+        return score + ply
+    return score
+
+
+# engines kept by each worker process between searches, so their transposition tables carry over
+_worker_engines = {}
+
+
+def warm_worker():
+    """
+    Worker process entry point run when the pool starts: unpickling it imports this module and its dependencies
+
+    :return: None
+    """
+
+
+def search_root_moves(position, moves, time_limit, max_depth, table_mb, tablebase=None, backend="bitboard"):
+    """
+    Worker process entry point for the root split search. Rebuilds the position from BitBoard masks and
+    deepens the given root moves
+
+    :param position: Tuple from BitBoard.key()
+    :param moves: List of moves as tuples of square indices
+    :param time_limit: Float, seconds
+    :param max_depth: Int
+    :param table_mb: Int
+    :param tablebase: String path of a tablebase file or None
+    :param backend: String, Checkers backend to search with
+    :return: Tuple (List of (move, score, depth) with moves as square indices, Int nodes searched)
+    """
+    engine = _worker_engines.get((max_depth, table_mb, tablebase, backend))
+    if engine is None:
+        engine = AlphaBetaEngine(time_limit, max_depth, table_mb, tablebase=tablebase, backend=backend)
+        _worker_engines[max_depth, table_mb, tablebase, backend] = engine
+    engine.set_time_limit(time_limit)
+    board = BitBoard()
+    board.restore(position)
+    game = Checkers.from_bitboard(board, backend=backend)
+    iterations, nodes = engine.search_moves(game, [[POSITION_OF[square] for square in move] for move in moves])
+    found = [(tuple(SQUARE_OF[square] for square in move), score, depth) for move, score, depth in iterations]
+    return found, nodes
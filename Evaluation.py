@@ -0,0 +1,81 @@
+from Codes import BLACK, WHITE, REGULAR, COLOR_NAMES, TYPE_NAMES, OPPONENT, CROWN_ROWS
+
+# material by PieceType code
+PIECE_VALUES = (100, 250, 400)
+# Regular pieces: per row advanced towards the crown row, on the four middle columns, and on their own back row,
+# where they keep the other side from crowning
+ADVANCE_BONUS = 4
+CENTER_BONUS = 4
+BACK_RANK_GUARD = 15
+# Kings and TripleKings: per step closer to the middle of the board
+KING_CENTER_BONUS = 5
+# per legal move of the side to move
+MOBILITY_BONUS = 3
+
+
+def square_score(color, piece_type, position):
+    """
+    Returns the value of one piece on a square for its own side: material plus its piece-square bonus
+
+    :param color: Color code
+    :param piece_type: PieceType code
+    :param position: Tuple (row, column)
+    :return: Int
+    """
+    row, column = position
+    score = PIECE_VALUES[piece_type]
+    if piece_type == REGULAR:
+        advanced = abs(row - CROWN_ROWS[OPPONENT[color]])
+        score += ADVANCE_BONUS * advanced
+        if 2 <= column <= 5:
+            score += CENTER_BONUS
+        if advanced == 0:
+            score += BACK_RANK_GUARD
+    else:
+        # 0 on the four middle squares up to 3 on the edge
+        distance = int(max(abs(row - 3.5), abs(column - 3.5)) - 0.5)
+        score += KING_CENTER_BONUS * (3 - distance)
+    return score
+
+
+def position_score(tokens):
+    """
+    Computes the static score of a position from scratch, from Black's side: the PIECE_SCORES of every token.
+    Checkers keeps the same score up to date incrementally, this is used to start it and to check it
+
+    :param tokens: Iterable of Token objects
+    :return: Int
+    """
+    score = 0
+    for token in tokens:
+        score += PIECE_SCORES[token.get_color_code(), token.get_type_code()][token.get_position()]
+    return score
+
+
+def evaluate(game, moves=None):
+    """
+    Static evaluation for the side to move: the game's incremental score, turned to the side to move, plus a
+    mobility bonus when its legal moves are already known
+
+    :param game: Checkers object
+    :param moves: List of the side to move's legal moves, or None to leave mobility out
+    :return: Int
+    """
+    score = game.get_score()
+    if game.get_turn_code() == WHITE:
+        score = -score
+    if moves is not None:
+        score += MOBILITY_BONUS * len(moves)
+    return score
+
+
+# keyed by (color, type) codes then square, signed so Black's pieces count up and White's down
+PIECE_SCORES = {}
+for _color in range(len(COLOR_NAMES)):
+    for _type in range(len(TYPE_NAMES)):
+        PIECE_SCORES[_color, _type] = {}
+        for _row in range(8):
+            for _column in range(8):
+                if (_row + _column) % 2 == 1:
+                    _value = square_score(_color, _type, (_row, _column))
+                    PIECE_SCORES[_color, _type][(_row, _column)] = _value if _color == BLACK else -_value
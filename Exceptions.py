@@ -18,4 +18,16 @@ class InvalidSquare(Exception):
 class InvalidPlayer(Exception):
     """Custom exception class used to validate player. Raised when a player name is entered in play_game
     that is not one of two recorded players in the game"""
-    pass
\ No newline at end of file
+    pass
+
+
+class InvalidBoardState(Exception):
+    """Custom exception class used by the debug board check. Raised when the board squares no longer match
+    the tokens in play"""
+    pass
+
+
+class SearchTimeout(Exception):
+    """Custom exception class used by the CPU opponent's search. Raised inside the search tree when the move's
+    time budget is used up, unwinding back to the last completed depth"""
+    pass
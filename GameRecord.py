@@ -0,0 +1,217 @@
+import argparse
+import os
+import struct
+import time
+from BitBoard import BitBoard, SQUARE_OF, POSITION_OF
+from Codes import BLACK, WHITE, COLOR_CODES
+
+MAGIC = b"LBGR"
+VERSION = 1
+# magic, version, step record size
+HEADER = struct.Struct("<4sHH")
+# one play_game call: from square, to square, pieces captured, flags. Squares are BitBoard square indexes
+STEP = struct.Struct("<BBBB")
+# step flags: the piece was promoted on landing, the same player moves again (the capture chain continues)
+PROMOTED = 1
+CONTINUES = 2
+# a from square of END marks the end of a game, its to byte holding the result
+END = 255
+NO_RESULT = 2
+RESULT_CODES = {"Black": BLACK, "White": WHITE, None: NO_RESULT}
+RESULT_NAMES = ("Black", "White", None)
+# bytes read at a time by read_games, a whole number of steps
+CHUNK_SIZE = 64 * 1024
+
+
+class GameRecordWriter:
+    """Appends games to a game record file: an 8 byte header, then each game's steps as written by
+    Checkers.get_record followed by an END step with the result. Games are written as they come, so files
+    of any number of games are built without holding them in memory"""
+    def __init__(self, path, append=False):
+        if append and os.path.exists(path) and os.path.getsize(path):
+            check_header(path)
+            self._file = open(path, "ab")
+        else:
+            self._file = open(path, "wb")
+            self._file.write(HEADER.pack(MAGIC, VERSION, STEP.size))
+        self._games = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def get_games(self):
+        """
+        Returns the number of games written by this writer
+
+        :return: Int
+        """
+        return self._games
+
+    def write_game(self, steps, winner=None):
+        """
+        Writes one game
+
+        :param steps: Bytes from Checkers.get_record, or a list of (from, to, captures, flags) tuples
+        :param winner: "Black", "White" or None for a draw or unfinished game
+        :return: None
+        """
+        if not isinstance(steps, (bytes, bytearray)):
+            steps = b"".join(STEP.pack(*step) for step in steps)
+        self._file.write(steps)
+        self._file.write(STEP.pack(END, RESULT_CODES[winner], 0, 0))
+        self._games += 1
+
+    def close(self):
+        """
+        Flushes and closes the file
+
+        :return: None
+        """
+        self._file.close()
+
+
+def check_header(path):
+    """
+    Raises ValueError unless the file starts with a game record header of this version
+
+    :param path: String
+    :return: None
+    """
+    with open(path, "rb") as stream:
+        header = stream.read(HEADER.size)
+    if len(header) != HEADER.size or HEADER.unpack(header) != (MAGIC, VERSION, STEP.size):
+        raise ValueError("Not a version " + str(VERSION) + " game record file: " + str(path))
+
+
+def read_games(path):
+    """
+    Generator streaming the games of a game record file in order, reading a chunk at a time so files much
+    larger than memory can be scanned
+
+    :param path: String
+    :return: Generator of (winner, steps) tuples, winner being "Black", "White" or None and steps a list of
+             (from, to, captures, flags) tuples
+    """
+    check_header(path)
+    with open(path, "rb") as stream:
+        stream.seek(HEADER.size)
+        steps = []
+        while True:
+            chunk = stream.read(CHUNK_SIZE)
+            if not chunk:
+                break
+            if len(chunk) % STEP.size:
+                raise ValueError("Truncated game record file: " + str(path))
+            for step in STEP.iter_unpack(chunk):
+                if step[0] == END:
+                    yield RESULT_NAMES[step[1]], steps
+                    steps = []
+                else:
+                    steps.append(step)
+
+
+def decode_steps(record):
+    """
+    Unpacks the bytes from Checkers.get_record into step tuples
+
+    :param record: Bytes
+    :return: List of (from, to, captures, flags) tuples
+    """
+    return list(STEP.iter_unpack(record))
+
+
+def replay(steps, start=None):
+    """
+    Generator rebuilding the positions of a game from its steps, yielding the BitBoard key after every
+    complete move. The pieces are moved with mask operations only, no moves are generated or checked, so the
+    steps are trusted to come from a game that was played through Checkers
+
+    :param steps: Iterable of (from, to, captures, flags) tuples, or bytes from Checkers.get_record
+    :param start: BitBoard key of the position the game started from, the starting layout by default
+    :return: Generator of (black, white, kings, triple_kings, turn code) tuples
+    """
+    if isinstance(steps, (bytes, bytearray)):
+        steps = STEP.iter_unpack(steps)
+    black, white, kings, triple_kings, turn = start or BitBoard.start_position().key()
+    sides = [black, white]
+    own = COLOR_CODES[turn]
+    for origin, destination, captures, flags in steps:
+        start_bit = 1 << origin
+        end_bit = 1 << destination
+        sides[own] ^= start_bit | end_bit
+        if captures:
+            taken = BETWEEN[origin][destination] & sides[1 - own]
+            sides[1 - own] &= ~taken
+            kings &= ~taken
+            triple_kings &= ~taken
+        if kings & start_bit:
+            kings ^= start_bit | end_bit
+        elif triple_kings & start_bit:
+            triple_kings ^= start_bit | end_bit
+        if flags & PROMOTED:
+            if kings & end_bit:
+                kings ^= end_bit
+                triple_kings |= end_bit
+            else:
+                kings |= end_bit
+        if not flags & CONTINUES:
+            own = 1 - own
+            yield sides[BLACK], sides[WHITE], kings, triple_kings, own
+
+
+def final_position(steps, start=None):
+    """
+    Returns the position at the end of a game's steps
+
+    :param steps: Iterable of step tuples or bytes from Checkers.get_record
+    :param start: BitBoard key or None for the starting layout
+    :return: BitBoard object
+    """
+    key = start or BitBoard.start_position().key()
+    for key in replay(steps, start):
+        pass
+    return BitBoard(*key)
+
+
+def _between(origin, destination):
+    """
+    Returns the mask of the squares strictly between two squares on one diagonal, 0 if they aren't on one
+
+    :param origin: Int square index
+    :param destination: Int square index
+    :return: Int
+    """
+    (row, column), (end_row, end_column) = POSITION_OF[origin], POSITION_OF[destination]
+    if origin == destination or abs(end_row - row) != abs(end_column - column):
+        return 0
+    row_step = 1 if end_row > row else -1
+    column_step = 1 if end_column > column else -1
+    mask = 0
+    for distance in range(1, abs(end_row - row)):
+        mask |= 1 << SQUARE_OF[(row + distance * row_step, column + distance * column_step)]
+    return mask
+
+
+# squares strictly between two squares, indexed [from][to]
+BETWEEN = [[_between(origin, destination) for destination in range(32)] for origin in range(32)]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Replay every game of a game record file and report totals")
+    parser.add_argument("path")
+    options = parser.parse_args()
+
+    started = time.perf_counter()
+    games = moves = 0
+    results = {"Black": 0, "White": 0, None: 0}
+    for winner, game_steps in read_games(options.path):
+        games += 1
+        results[winner] += 1
+        for position in replay(game_steps):
+            moves += 1
+    elapsed = time.perf_counter() - started
+    print("Games:", games, "Moves:", moves, "in", round(elapsed, 2), "s")
+    print("Black | White | No result:", results["Black"], "|", results["White"], "|", results[None])
@@ -0,0 +1,154 @@
+import functools
+import json
+import signal
+import time
+
+# (module, class, method) of the methods timed while instrumentation is enabled. Captures made during
+# play_game go through _take_token rather than remove_token, so both are timed. BitBoardCheckers inherits
+# play_game and has its own capture and setup methods
+TARGETS = (
+    ("CheckersGame", "Checkers", "play_game"),
+    ("CheckersGame", "Checkers", "remove_token"),
+    ("CheckersGame", "Checkers", "_take_token"),
+    ("CheckersGame", "Checkers", "setup"),
+    ("CheckersGame", "BitBoardCheckers", "remove_token"),
+    ("CheckersGame", "BitBoardCheckers", "_taken"),
+    ("CheckersGame", "BitBoardCheckers", "setup"),
+    ("Token", "Token", "get_possible_moves"),
+    ("Token", "Token", "possible_jumps"),
+)
+
+_enabled = False
+# "Class.method" to [calls, seconds]
+_timings = {}
+# counter name to total, e.g. engine nodes
+_counts = {}
+# (class, method name, original function) of the wrapped methods, to put back on disable
+_originals = []
+
+
+def enable():
+    """
+    Starts recording: replaces each TARGETS method with a wrapper counting its calls and time. Nothing is
+    wrapped while disabled, so the methods run at full speed then
+
+    :return: None
+    """
+    global _enabled
+    if _enabled:
+        return
+    for module_name, class_name, method_name in TARGETS:
+        owner = getattr(__import__(module_name), class_name)
+        original = owner.__dict__[method_name]
+        _originals.append((owner, method_name, original))
+        setattr(owner, method_name, _timed(class_name + "." + method_name, original))
+    _enabled = True
+
+
+def disable():
+    """
+    Stops recording and puts the original methods back. Recorded data is kept until reset
+
+    :return: None
+    """
+    global _enabled
+    while _originals:
+        owner, method_name, original = _originals.pop()
+        setattr(owner, method_name, original)
+    _enabled = False
+
+
+def is_enabled():
+    """
+    Returns True while instrumentation is recording
+
+    :return: Bool
+    """
+    return _enabled
+
+
+def reset():
+    """
+    Clears all recorded data
+
+    :return: None
+    """
+    for timing in _timings.values():
+        timing[0] = 0
+        timing[1] = 0.0
+    _counts.clear()
+
+
+def record_count(name, amount=1):
+    """
+    Adds to a named counter while enabled, e.g. the nodes of an engine search. Meant for calls made once per
+    search or game rather than per node
+
+    :param name: String
+    :param amount: Int
+    :return: None
+    """
+    if _enabled:
+        _counts[name] = _counts.get(name, 0) + amount
+
+
+def _timed(name, function):
+    """
+    Returns a wrapper of function adding its calls and time to the timing of name
+
+    :param name: String
+    :param function: Function
+    :return: Function
+    """
+    timing = _timings.setdefault(name, [0, 0.0])
+    perf_counter = time.perf_counter
+
+    @functools.wraps(function)
+    def timed(*args, **kwargs):
+        start = perf_counter()
+        try:
+            return function(*args, **kwargs)
+        finally:
+            timing[0] += 1
+            timing[1] += perf_counter() - start
+    return timed
+
+
+def stats():
+    """
+    Returns the data recorded in this process
+
+    :return: Dictionary with enabled, functions ("Class.method" to calls, seconds and microseconds per call) and
+             counts
+    """
+    functions = {}
+    for name, (calls, seconds) in _timings.items():
+        if calls:
+            functions[name] = {"calls": calls, "seconds": seconds, "us_per_call": seconds / calls * 1e6}
+    return {"enabled": _enabled, "functions": functions, "counts": dict(_counts)}
+
+
+def dump(path):
+    """
+    Writes stats() to a JSON file
+
+    :param path: String
+    :return: None
+    """
+    with open(path, "w") as output:
+        json.dump(stats(), output, indent=2)
+
+
+def install_signal_handlers(path):
+    """
+    Lets a running process be profiled from outside: SIGUSR1 writes stats() to path as JSON and SIGUSR2
+    switches recording on or off. Does nothing on platforms without those signals
+
+    :param path: String
+    :return: Bool, True if the handlers were installed
+    """
+    if not hasattr(signal, "SIGUSR1"):
+        return False
+    signal.signal(signal.SIGUSR1, lambda signum, frame: dump(path))
+    signal.signal(signal.SIGUSR2, lambda signum, frame: disable() if _enabled else enable())
+    return True
@@ -0,0 +1,230 @@
+import math
+import random
+import time
+from BitBoard import BitBoard, OTHER
+from Instrumentation import record_count
+
+PIECE_VALUES = {"Regular": 1, "King": 2.5, "TripleKing": 4}
+
+
+class MCTSNode:
+    """Search tree node for MCTSEngine. Wins are counted for the color that made the move into the node"""
+    __slots__ = ("move", "parent", "children", "untried", "visits", "wins", "mover", "bias", "key")
+
+    def __init__(self, move, parent, mover, key, untried, bias=0.0):
+        self.move = move
+        self.parent = parent
+        self.children = []
+        self.untried = untried
+        self.visits = 0
+        self.wins = 0.0
+        self.mover = mover
+        self.bias = bias
+        self.key = key
+
+
+class MCTSEngine:
+    """CPU opponent using Monte Carlo Tree Search with UCT selection. Rollouts play random legal moves on a
+    BitBoard, restored from the node's masks for every playout, instead of on Checkers objects. With a bias
+    above 0 the selection adds a progressive bias from a material evaluation that fades as a child gets
+    visits. Searches stop after a number of playouts or a time limit, whichever comes first. The tree is kept
+    between moves and re-rooted at the new position when it is found among the previous root's grandchildren"""
+    def __init__(self, playouts=None, time_limit=1.0, exploration=1.4, bias=0.0, max_rollout=150, seed=None):
+        if playouts is None and time_limit is None:
+            raise ValueError("Give a playout count, a time limit or both!")
+        self._playouts = playouts
+        self._time_limit = time_limit
+        self._exploration = exploration
+        self._bias = bias
+        self._max_rollout = max_rollout
+        self._random = random.Random(seed)
+        self._root = None
+        self._stats = {}
+
+    def get_stats(self):
+        """
+        Returns statistics of the last search: rollouts, seconds, rollouts per second, tree size and
+        whether the tree was reused
+
+        :return: Dictionary
+        """
+        return self._stats
+
+    def choose_move(self, game):
+        """
+        Searches the current position of a game and returns the most visited move as a list of squares for
+        Checkers.play_move, or None if the side to move has no legal move
+
+        :param game: Checkers object
+        :return: List of tuples or None
+        """
+        return self.search(game.to_bitboard())
+
+    def play(self, game, player_name):
+        """
+        Chooses a move for the player whose turn it is and plays it through play_game
+
+        :param game: Checkers object
+        :param player_name: String
+        :return: Int captures, or None if there was no legal move
+        """
+        move = self.choose_move(game)
+        if move is None:
+            return None
+        return game.play_move(player_name, move)
+
+    def search(self, board):
+        """
+        Runs playouts from a BitBoard position and returns the most visited root move as a list of squares
+
+        :param board: BitBoard object
+        :return: List of tuples or None
+        """
+        start = time.perf_counter()
+        reused = self._reroot(board.key())
+        if not reused:
+            self._root = MCTSNode(None, None, OTHER[board.get_turn()], board.key(), board.legal_moves())
+        root = self._root
+        if not root.untried and not root.children:
+            return None
+
+        deadline = None if self._time_limit is None else start + self._time_limit
+        state = BitBoard()
+        rollouts = 0
+        # at least one playout, so the root has a child to return
+        playouts = None if self._playouts is None else max(self._playouts, 1)
+        while playouts is None or rollouts < playouts:
+            if rollouts and deadline is not None and time.perf_counter() > deadline:
+                break
+            state.restore(root.key)
+            node = self._select(root, state)
+            node = self._expand(node, state)
+            winner = self._rollout(state)
+            self._backpropagate(node, winner)
+            rollouts += 1
+
+        elapsed = time.perf_counter() - start
+        self._stats = {"rollouts": rollouts, "seconds": elapsed,
+                       "rollouts_per_second": rollouts / elapsed if elapsed else 0.0,
+                       "tree_visits": root.visits, "reused": reused}
+        record_count("mcts.searches")
+        record_count("mcts.rollouts", rollouts)
+        best = max(root.children, key=lambda child: child.visits)
+        return BitBoard.move_positions(best.move)
+
+    def _reroot(self, key):
+        """
+        Moves the root to the node for the given position if the previous tree reached it, dropping the rest
+
+        :param key: Tuple from BitBoard.key()
+        :return: Bool, True if part of the old tree was kept
+        """
+        if self._root is None:
+            return False
+        candidates = [self._root]
+        for child in self._root.children:
+            candidates.append(child)
+            candidates.extend(child.children)
+        for node in candidates:
+            if node.key == key:
+                node.parent = None
+                self._root = node
+                return True
+        self._root = None
+        return False
+
+    def _select(self, node, state):
+        """
+        Walks down fully expanded nodes by UCT score (plus the progressive bias), playing their moves on state
+
+        :param node: MCTSNode
+        :param state: BitBoard object
+        :return: MCTSNode
+        """
+        while not node.untried and node.children:
+            log_visits = math.log(node.visits)
+            best_score = -1.0
+            best = None
+            for child in node.children:
+                score = child.wins / child.visits + self._exploration * math.sqrt(log_visits / child.visits)
+                if self._bias:
+                    score += self._bias * child.bias / (child.visits + 1)
+                if score > best_score:
+                    best_score = score
+                    best = child
+            node = best
+            state.play(node.move)
+        return node
+
+    def _expand(self, node, state):
+        """
+        Adds one untried move of a node as a new child and plays it on state
+
+        :param node: MCTSNode
+        :param state: BitBoard object
+        :return: MCTSNode, the new child or node itself if it has no untried moves
+        """
+        if not node.untried:
+            return node
+        move = node.untried.pop(self._random.randrange(len(node.untried)))
+        mover = state.get_turn()
+        state.play(move)
+        bias = material(state, mover) if self._bias else 0.0
+        child = MCTSNode(move, node, mover, state.key(), state.legal_moves(), bias)
+        node.children.append(child)
+        return child
+
+    def _rollout(self, state):
+        """
+        Plays random legal moves until the game ends or max_rollout plies, then scores the position by material
+
+        :param state: BitBoard object
+        :return: "Black", "White" or None for a draw
+        """
+        choice = self._random.choice
+        for ply in range(self._max_rollout):
+            moves = state.legal_moves()
+            if not moves:
+                return OTHER[state.get_turn()]
+            state.play(choice(moves))
+        score = material(state, "Black")
+        if score > 0:
+            return "Black"
+        if score < 0:
+            return "White"
+        return None
+
+    def _backpropagate(self, node, winner):
+        """
+        Adds a playout result to a node and its ancestors
+
+        :param node: MCTSNode
+        :param winner: "Black", "White" or None
+        :return: None
+        """
+        while node is not None:
+            node.visits += 1
+            if winner is None:
+                node.wins += 0.5
+            elif winner == node.mover:
+                node.wins += 1.0
+            node = node.parent
+
+
+def material(board, color):
+    """
+    Returns the material balance of a BitBoard for a color, weighted by piece type and scaled to -1..1
+
+    :param board: BitBoard object
+    :param color: "Black" or "White"
+    :return: Float
+    """
+    black, white, kings, triple_kings = board.get_masks()
+    regular = ~(kings | triple_kings)
+    score = 0.0
+    for mask, value in ((regular, PIECE_VALUES["Regular"]), (kings, PIECE_VALUES["King"]),
+                        (triple_kings, PIECE_VALUES["TripleKing"])):
+        score += value * (bin(black & mask).count("1") - bin(white & mask).count("1"))
+    if color == "White":
+        score = -score
+    return score / (12 * PIECE_VALUES["TripleKing"])
@@ -0,0 +1,225 @@
+import argparse
+import math
+import mmap
+import random
+import struct
+import time
+from concurrent.futures import ProcessPoolExecutor
+from BitBoard import encode_move, decode_move
+
+MAGIC = b"LBOB"
+VERSION = 1
+# magic, version, record count
+HEADER = struct.Struct("<4sII")
+# position hash, encoded move, games, wins and draws for the side playing the move
+RECORD = struct.Struct("<QQIII")
+# added to a bot's seed to seed the ExploringBot around it, so the two don't draw the same random numbers
+EXPLORE_SEED_OFFSET = 1 << 32
+# normal quantile of the confidence bound book moves are ranked by, 1.96 for 95%
+CONFIDENCE_Z = 1.96
+
+
+class OpeningBook:
+    """Read side of an opening book file written by build(). Records are sorted by position hash and move and
+    the file is memory-mapped, so a lookup is a binary search touching a handful of records. Each record holds
+    how often the move was played from the position in self-play and how those games went for the side
+    that played it"""
+    def __init__(self, path):
+        self._file = open(path, "rb")
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, count = HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC or version != VERSION:
+            self.close()
+            raise ValueError("Not a version " + str(VERSION) + " opening book file: " + str(path))
+        self._count = count
+
+    def get_size(self):
+        """
+        Returns the number of (position, move) records in the book
+
+        :return: Int
+        """
+        return self._count
+
+    def close(self):
+        """
+        Unmaps and closes the file
+
+        :return: None
+        """
+        self._map.close()
+        self._file.close()
+
+    def lookup(self, key):
+        """
+        Returns the book moves for a position hash with their statistics
+
+        :param key: Int, 64-bit position hash (Checkers.get_hash)
+        :return: List of (move, games, wins, draws) tuples, move being a list of squares
+        """
+        low = 0
+        high = self._count
+        while low < high:
+            middle = (low + high) // 2
+            if self._record(middle)[0] < key:
+                low = middle + 1
+            else:
+                high = middle
+        found = []
+        while low < self._count:
+            record_key, move, games, wins, draws = self._record(low)
+            if record_key != key:
+                break
+            found.append((decode_move(move), games, wins, draws))
+            low += 1
+        return found
+
+    def choose(self, game, min_games=1):
+        """
+        Returns the book move with the best score for the current position of a game, or None if the position
+        isn't in the book. Moves are ranked by the lower confidence bound of their score (wins plus half the
+        draws, per game), so a move won 90 times out of 100 ranks above one won the only time it was played.
+        Moves played fewer than min_games times, or not legal in the position because of a hash collision, are
+        skipped
+
+        :param game: Checkers object
+        :param min_games: Int
+        :return: List of tuples or None
+        """
+        legal = game.legal_moves()
+        best = None
+        best_score = None
+        for move, games, wins, draws in self.lookup(game.get_hash()):
+            if games < min_games or move not in legal:
+                continue
+            score = (lower_bound(wins + draws / 2, games), games)
+            if best_score is None or score > best_score:
+                best = move
+                best_score = score
+        return best
+
+    def _record(self, index):
+        """
+        Reads one record
+
+        :param index: Int
+        :return: Tuple (key, move, games, wins, draws)
+        """
+        return RECORD.unpack_from(self._map, HEADER.size + RECORD.size * index)
+
+
+def lower_bound(points, games, z=CONFIDENCE_Z):
+    """
+    Returns the Wilson score lower confidence bound of a move's score: the score per game it can be trusted to
+    reach given how many games it was played in
+
+    :param points: Float, wins plus half the draws
+    :param games: Int, at least 1
+    :param z: Float, normal quantile of the confidence level
+    :return: Float between 0 and 1
+    """
+    rate = points / games
+    spread = z * math.sqrt(rate * (1 - rate) / games + z * z / (4 * games * games))
+    return (rate + z * z / (2 * games) - spread) / (1 + z * z / games)
+
+
+class ExploringBot:
+    """Wraps a bot so that it plays a random legal move with the given probability, giving self-play games
+    between deterministic engines some variety"""
+    def __init__(self, bot, explore, seed=None):
+        self._bot = bot
+        self._explore = explore
+        self._random = random.Random(seed)
+
+    def choose_move(self, game):
+        """
+        Returns the wrapped bot's move, or now and then a random legal move
+
+        :param game: Checkers object
+        :return: List of tuples or None
+        """
+        if self._random.random() < self._explore:
+            moves = game.legal_moves()
+            return self._random.choice(moves) if moves else None
+        return self._bot.choose_move(game)
+
+
+def record_games(first, count, options):
+    """
+    Plays a batch of self-play games and returns the opening plies of each with the result
+
+    :param first: Int, index of the first game, used to seed the bots
+    :param count: Int
+    :param options: Dictionary of book options
+    :return: List of (winner, plies) tuples, plies being (position hash, color, move) tuples
+    """
+    # imported here, the engine itself reads opening books
+    from Simulator import make_bot, play_one
+    games = []
+    black_seed = options["seed"] + 2 * first
+    white_seed = black_seed + 1
+    black = ExploringBot(make_bot(options["bot"], black_seed, options), options["explore"],
+                         black_seed + EXPLORE_SEED_OFFSET)
+    white = ExploringBot(make_bot(options["bot"], white_seed, options), options["explore"],
+                         white_seed + EXPLORE_SEED_OFFSET)
+    for game in range(count):
+        plies = []
+        winner, length = play_one(black, white, options["max_moves"], plies)
+        games.append((winner, plies[:options["plies"]]))
+    return games
+
+
+def build(path, options):
+    """
+    Plays options["games"] self-play games, collects statistics for every move in their first options["plies"]
+    plies and writes them as a sorted opening book file
+
+    :param path: String
+    :param options: Dictionary with games, plies, bot, explore, workers, max_moves, seed and the bot settings
+        Simulator.make_bot uses (time_limit, max_depth, playouts, table_mb)
+    :return: Dictionary with the number of games, records and seconds taken
+    """
+    start = time.perf_counter()
+    games = options["games"]
+    workers = max(1, options["workers"])
+    batch = max(1, games // (workers * 4))
+    batches = [(first, min(batch, games - first)) for first in range(0, games, batch)]
+    if workers == 1:
+        played = [game for first, count in batches for game in record_games(first, count, options)]
+    else:
+        with ProcessPoolExecutor(workers) as pool:
+            futures = [pool.submit(record_games, first, count, options) for first, count in batches]
+            played = [game for future in futures for game in future.result()]
+
+    stats = {}
+    for winner, plies in played:
+        for key, color, move in plies:
+            code = encode_move(move)
+            if not code:
+                continue
+            games_played, wins, draws = stats.get((key, code), (0, 0, 0))
+            stats[key, code] = (games_played + 1, wins + (winner == color), draws + (winner is None))
+
+    with open(path, "wb") as output:
+        output.write(HEADER.pack(MAGIC, VERSION, len(stats)))
+        for key, code in sorted(stats):
+            output.write(RECORD.pack(key, code, *stats[key, code]))
+    return {"games": len(played), "records": len(stats), "seconds": time.perf_counter() - start}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build an opening book from self-play")
+    parser.add_argument("--games", type=int, default=200)
+    parser.add_argument("--plies", type=int, default=12, help="opening plies of each game to keep")
+    parser.add_argument("--bot", choices=("random", "alphabeta", "mcts"), default="alphabeta")
+    parser.add_argument("--explore", type=float, default=0.2, help="chance of a random move instead of the bot's")
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--max-moves", type=int, default=200, help="plies before a game is called a draw")
+    parser.add_argument("--time-limit", type=float, default=0.05, help="seconds per move for search bots")
+    parser.add_argument("--max-depth", type=int, default=64)
+    parser.add_argument("--playouts", type=int, default=None, help="MCTS playouts per move")
+    parser.add_argument("--table-mb", type=int, default=4)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default="openings.bin")
+    options = vars(parser.parse_args())
+    print(build(options["output"], options))
@@ -0,0 +1,170 @@
+import argparse
+import json
+import os
+import time
+from BitBoard import BitBoard, POSITION_OF, SQUARE_OF
+from CheckersGame import Checkers
+
+# reference counts checked in next to this file
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "perft_fixtures.json")
+BACKENDS = ("checkers", "bitboard")
+
+
+def perft(game, depth):
+    """
+    Counts the leaf nodes of the move tree of a Checkers game to the given depth, one full move (capture
+    sequences included) per ply, with make_move/unmake_move
+
+    :param game: Checkers object
+    :param depth: Int
+    :return: Int
+    """
+    if depth == 0:
+        return 1
+    moves = game.legal_moves()
+    if depth == 1:
+        return len(moves)
+    nodes = 0
+    for move in moves:
+        record = game.make_move(move)
+        nodes += perft(game, depth - 1)
+        game.unmake_move(record)
+    return nodes
+
+
+def perft_bitboard(board, depth):
+    """
+    Counts the leaf nodes of the move tree of a BitBoard position to the given depth
+
+    :param board: BitBoard object
+    :param depth: Int
+    :return: Int
+    """
+    if depth == 0:
+        return 1
+    moves = board.legal_moves()
+    if depth == 1:
+        return len(moves)
+    key = board.key()
+    nodes = 0
+    for move in moves:
+        board.play(move)
+        nodes += perft_bitboard(board, depth - 1)
+        board.restore(key)
+    return nodes
+
+
+def divide(board, depth, backend="checkers"):
+    """
+    Returns the perft count below each root move, to narrow down where two move generators disagree
+
+    :param board: BitBoard object with the position
+    :param depth: Int, at least 1
+    :param backend: "checkers" or "bitboard"
+    :return: Dictionary of move (tuple of square indices) to Int
+    """
+    counts = {}
+    if backend == "checkers":
+        game = Checkers.from_bitboard(board)
+        for move in game.legal_moves():
+            record = game.make_move(move)
+            counts[tuple(SQUARE_OF[square] for square in move)] = perft(game, depth - 1)
+            game.unmake_move(record)
+    else:
+        key = board.key()
+        for move in board.legal_moves():
+            board.play(move)
+            counts[move[0]] = perft_bitboard(board, depth - 1)
+            board.restore(key)
+    return counts
+
+
+def run(board, depth, backend="checkers"):
+    """
+    Runs perft on a position with the chosen backend and times it
+
+    :param board: BitBoard object
+    :param depth: Int
+    :param backend: "checkers" or "bitboard"
+    :return: Dictionary with nodes, seconds and nodes per second
+    """
+    if backend not in BACKENDS:
+        raise ValueError("Backend can only be one of " + ", ".join(BACKENDS))
+    start = time.perf_counter()
+    if backend == "checkers":
+        nodes = perft(Checkers.from_bitboard(board), depth)
+    else:
+        nodes = perft_bitboard(board.copy(), depth)
+    elapsed = time.perf_counter() - start
+    return {"nodes": nodes, "seconds": elapsed, "nps": nodes / elapsed if elapsed else 0.0}
+
+
+def from_fixture(entry):
+    """
+    Builds the BitBoard of a fixture position: turn plus lists of square indices for black, white, kings and
+    triple_kings
+
+    :param entry: Dictionary
+    :return: BitBoard object
+    """
+    masks = [sum(1 << square for square in entry.get(name, [])) for name in ("black", "white", "kings",
+                                                                             "triple_kings")]
+    return BitBoard(*masks, turn=entry["turn"])
+
+
+def load_fixtures(path=FIXTURES):
+    """
+    Reads the reference positions and their node counts
+
+    :param path: String
+    :return: List of dictionaries with name, the position and counts (node count per depth, from depth 1)
+    """
+    with open(path) as fixtures:
+        return json.load(fixtures)
+
+
+def check_fixtures(path=FIXTURES, backend="checkers", max_depth=None):
+    """
+    Runs perft on every fixture position and returns the depths where the count doesn't match the reference
+
+    :param path: String
+    :param backend: "checkers" or "bitboard"
+    :param max_depth: Int or None to check every stored depth
+    :return: List of (name, depth, expected, found) tuples, empty when everything matches
+    """
+    mismatches = []
+    for entry in load_fixtures(path):
+        board = from_fixture(entry)
+        for depth, expected in enumerate(entry["counts"], 1):
+            if max_depth is not None and depth > max_depth:
+                break
+            found = run(board, depth, backend)["nodes"]
+            if found != expected:
+                mismatches.append((entry["name"], depth, expected, found))
+    return mismatches
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Count move tree leaf nodes to check and time move generation")
+    parser.add_argument("--depth", type=int, default=6)
+    parser.add_argument("--backend", choices=BACKENDS, default="checkers")
+    parser.add_argument("--position", default="start", help="name of a fixture position")
+    parser.add_argument("--divide", action="store_true", help="print the count below each root move")
+    parser.add_argument("--check", action="store_true", help="check every fixture against its reference counts")
+    parser.add_argument("--fixtures", default=FIXTURES)
+    options = parser.parse_args()
+
+    if options.check:
+        failed = check_fixtures(options.fixtures, options.backend, options.depth)
+        for name, depth, expected, found in failed:
+            print(name, "depth", depth, "expected", expected, "found", found)
+        print("FAILED" if failed else "OK")
+    else:
+        entries = {entry["name"]: entry for entry in load_fixtures(options.fixtures)}
+        position = from_fixture(entries[options.position])
+        if options.divide:
+            for move, count in divide(position, options.depth, options.backend).items():
+                print(" -> ".join(str(POSITION_OF[square]) for square in move), count)
+        result = run(position, options.depth, options.backend)
+        print("Nodes:", result["nodes"], " Seconds:", round(result["seconds"], 3), " Nodes/sec:",
+              round(result["nps"]))
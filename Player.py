@@ -1,12 +1,17 @@
+from Codes import KING, TRIPLE_KING, CAPTURE, COLOR_NAMES, COLOR_CODES, COUNT_CODES
+
+
 class Player:
     """Simulates a player in checkers, initialized with a player_name and checker_color. Includes methods to return
-    the color, capture count, number of king pieces, and number of triple king pieces"""
+    the color, capture count, number of king pieces, and number of triple king pieces. The color is kept as a
+    Color code and the counts in a list indexed by count code (KING, TRIPLE_KING, CAPTURE)"""
+    __slots__ = ("_player_name", "_checker_color", "_counts")
+
     def __init__(self, player_name, checker_color):
         self._player_name = player_name
-        self._checker_color = checker_color
-        self._king_count = 0
-        self._triple_king_count = 0
-        self._capture_count = 0
+        self._checker_color = COLOR_CODES[checker_color]
+        # index 0 (REGULAR) is unused
+        self._counts = [0, 0, 0, 0]
 
     def get_name(self):
         """
@@ -19,39 +24,33 @@ class Player:
     def add_count(self, count_type):
         """
         General method for adding count to a player's data member records.
-        Utilizes the following identify strings:
-        self._king_count - modified with 'King'
-        self._triple_king_count - modified with 'TripleKing'
-        self._capture_count - modified with 'Capture'
+        Utilizes the following identify strings, or their codes:
+        king count - modified with 'King' (KING)
+        triple king count - modified with 'TripleKing' (TRIPLE_KING)
+        capture count - modified with 'Capture' (CAPTURE)
         otherwise raises an AttributeError for any other string entered
 
-        :param count_type: String
+        :param count_type: String or count code
         :return: None
         """
-        if count_type == "King":
-            self._king_count += 1
-        elif count_type == "TripleKing":
-            self._triple_king_count += 1
-        elif count_type == "Capture":
-            self._capture_count += 1
-        else:
+        code = COUNT_CODES.get(count_type)
+        if code is None:
             raise AttributeError("Not an accepted type!")
+        self._counts[code] += 1
 
     def remove_count(self, count_type):
         """
         Method to remove kings and triple kings from a player's count when they're captured
         raises an AttributeError if any other string is passed instead
-        Accepts "King" or "TripleKing" as input
+        Accepts "King" or "TripleKing" as input, or their codes
 
-        :param count_type: String
+        :param count_type: String or PieceType
         :return: None
         """
-        if count_type == "King":
-            self._king_count -= 1
-        elif count_type == "TripleKing":
-            self._triple_king_count -= 1
-        else:
+        code = COUNT_CODES.get(count_type)
+        if code is None or code == CAPTURE:
             raise AttributeError("Not an accepted type!")
+        self._counts[code] -= 1
 
     def get_checker_color(self):
         """
@@ -59,6 +58,14 @@ class Player:
 
         :return: String
         """
+        return COLOR_NAMES[self._checker_color]
+
+    def get_color_code(self):
+        """
+        Returns the players checker color as a Color code
+
+        :return: Color
+        """
         return self._checker_color
 
     def get_king_count(self):
@@ -67,7 +74,7 @@ class Player:
 
         :return: Int
         """
-        return self._king_count
+        return self._counts[KING]
 
     def get_triple_king_count(self):
         """
@@ -75,7 +82,7 @@ class Player:
 
         :return: Int
         """
-        return self._triple_king_count
+        return self._counts[TRIPLE_KING]
 
     def get_captured_pieces_count(self):
         """
@@ -83,4 +90,21 @@ class Player:
 
         :return: Int
         """
-        return self._capture_count
\ No newline at end of file
+        return self._counts[CAPTURE]
+
+    def get_counts(self):
+        """
+        Returns the king, triple king and capture counts together, e.g. to restore them later with set_counts
+
+        :return: Tuple (Int, Int, Int)
+        """
+        return self._counts[KING], self._counts[TRIPLE_KING], self._counts[CAPTURE]
+
+    def set_counts(self, counts):
+        """
+        Restores the king, triple king and capture counts from a tuple returned by get_counts
+
+        :param counts: Tuple (Int, Int, Int)
+        :return: None
+        """
+        self._counts[KING], self._counts[TRIPLE_KING], self._counts[CAPTURE] = counts
@@ -0,0 +1,129 @@
+import sys
+from Codes import EMPTY
+from Colors import ColorsBg, ColorsFg
+
+RESET = '\x1b[0m'
+CLEAR_SCREEN = '\x1b[H\x1b[2J'
+CLEAR_LINE = '\x1b[2K'
+CLEAR_BELOW = '\x1b[J'
+COLUMN_LABELS = "    0    1    2    3    4    5    6    7"
+# every square is 5 characters wide, after a 2 character row label
+SQUARE_WIDTH = 5
+ROW_LABEL_WIDTH = 2
+
+# squares as drawn by print_color_board: light squares, empty dark squares, and pieces indexed by Color then
+# PieceType code
+LIGHT_SQUARE = ColorsBg.lightgrey + "     " + RESET
+DARK_SQUARE = ColorsBg.black + " " + ColorsFg.lightgrey + "    " + RESET
+PIECE_SQUARES = tuple(tuple(ColorsBg.black + " " + foreground + " " + letter + "  " + RESET for letter in letters)
+                      for foreground, letters in ((ColorsFg.cyan, "BKT"), (ColorsFg.lightgrey, "WKT")))
+
+
+def board_squares(game):
+    """
+    Returns the drawn text of the 64 squares of a game's board, row by row
+
+    :param game: Checkers object
+    :return: List of strings
+    """
+    board = game.get_board_codes()
+    squares = []
+    for row in range(8):
+        for column in range(8):
+            current = board[row][column]
+            if current is None:
+                squares.append(LIGHT_SQUARE)
+            elif current == EMPTY:
+                squares.append(DARK_SQUARE)
+            else:
+                token = game.get_token((row, column))
+                squares.append(PIECE_SQUARES[current][token.get_type_code()])
+    return squares
+
+
+def board_text(squares):
+    """
+    Joins drawn squares into the full board with numbered rows and columns, as one string
+
+    :param squares: List of 64 strings from board_squares
+    :return: String
+    """
+    lines = [COLUMN_LABELS]
+    for row in range(8):
+        lines.append(str(row) + " " + "".join(squares[8 * row:8 * row + 8]))
+    lines.append(COLUMN_LABELS)
+    return "\n".join(lines)
+
+
+def move_to(line, column):
+    """
+    Returns the escape sequence moving the cursor to a 1-based line and column
+
+    :param line: Int
+    :param column: Int
+    :return: String
+    """
+    return '\x1b[' + str(line) + ';' + str(column) + 'H'
+
+
+class BoardRenderer:
+    """Draws a game to a terminal stream, a few status lines above the board. The first frame clears the
+    screen and draws everything; later frames move the cursor to the squares and status lines that changed
+    since the previous frame and redraw only those. Each frame is built in one string and written with a
+    single write, then the cursor is left under the board with the rest of the screen cleared for prompts"""
+    def __init__(self, stream=None):
+        self._stream = stream if stream is not None else sys.stdout
+        self._squares = None
+        self._status = None
+
+    def reset(self):
+        """
+        Forgets the previous frame so the next one is drawn in full, e.g. after other output scrolled the screen
+
+        :return: None
+        """
+        self._squares = None
+        self._status = None
+
+    def render(self, game, status=()):
+        """
+        Returns the text of the next frame and remembers it as drawn
+
+        :param game: Checkers object
+        :param status: List of strings shown above the board
+        :return: String
+        """
+        squares = board_squares(game)
+        status = list(status)
+        if self._squares is None or len(status) != len(self._status):
+            parts = [CLEAR_SCREEN]
+            for line in status:
+                parts.append(line + "\n")
+            parts.append(board_text(squares) + "\n")
+        else:
+            parts = []
+            for index, line in enumerate(status):
+                if line != self._status[index]:
+                    parts.append(move_to(index + 1, 1) + CLEAR_LINE + line)
+            # the board starts under the status lines and the column labels
+            first_line = len(status) + 2
+            for index, square in enumerate(squares):
+                if square != self._squares[index]:
+                    parts.append(move_to(first_line + index // 8, ROW_LABEL_WIDTH + 1 + SQUARE_WIDTH * (index % 8))
+                                 + square)
+            parts.append(move_to(first_line + 9, 1))
+        parts.append(CLEAR_BELOW)
+        self._squares = squares
+        self._status = status
+        return "".join(parts)
+
+    def draw(self, game, status=()):
+        """
+        Writes the next frame to the stream in one write
+
+        :param game: Checkers object
+        :param status: List of strings shown above the board
+        :return: None
+        """
+        self._stream.write(self.render(game, status))
+        self._stream.flush()
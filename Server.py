@@ -0,0 +1,579 @@
+import argparse
+import asyncio
+import functools
+import itertools
+import json
+import logging
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from BitBoard import SQUARE_OF
+from CheckersGame import Checkers, BACKENDS
+from Codes import BLACK, WHITE, COLOR_NAMES, OPPONENT
+from Exceptions import IncorrectColorPieceError, OutofTurn, InvalidSquare, InvalidPlayer
+from Instrumentation import install_signal_handlers
+from Simulator import BOTS, make_bot
+
+# protocol error codes for the game's exceptions
+ERROR_CODES = {
+    OutofTurn: "out_of_turn",
+    InvalidSquare: "invalid_square",
+    InvalidPlayer: "invalid_player",
+    IncorrectColorPieceError: "invalid_color",
+}
+# name the server plays bot moves under
+BOT_NAME = "CPU"
+# bots built in each executor process, reused for every move they are asked for
+_worker_bots = {}
+logger = logging.getLogger(__name__)
+
+
+class ProtocolError(Exception):
+    """Raised while handling a request that can't be served, carrying the protocol error code sent back"""
+    def __init__(self, code, message):
+        super().__init__(message)
+        self.code = code
+
+
+class Session:
+    """A hosted game: the Checkers object while active, or its to_bytes snapshot (in memory or in a file) while
+    suspended, plus the bot playing one side, if any, and the connections to notify of moves"""
+    __slots__ = ("game", "snapshot", "path", "bot", "bot_color", "chain", "clients", "last_used", "busy")
+
+    def __init__(self, game, bot=None, bot_color=None):
+        self.game = game
+        self.snapshot = None
+        self.path = None
+        self.bot = bot
+        self.bot_color = bot_color
+        # square the current capture chain continues from, None between moves
+        self.chain = None
+        self.clients = set()
+        self.last_used = time.monotonic()
+        # a bot move is being computed, the session can't be suspended
+        self.busy = False
+
+
+class GameServer:
+    """Asyncio TCP server hosting many Checkers games in one process. Clients send one JSON request per line
+    and get one JSON response per line:
+
+    {"op": "create", "name": ..., "color": "black", "bot": null}  -> {"ok": true, "game": id, "color": ...}
+    {"op": "join", "game": id, "name": ...}                      -> {"ok": true, "game": id, "color": ...}
+    {"op": "move", "game": id, "from": [row, column], "to": [row, column]}  -> state after the step
+    {"op": "state", "game": id}                                  -> board, turn, players and winner
+    {"op": "stats"}                                              -> Checkers.stats() and game counts
+
+    Moves are played as the player the connection created or joined the game as. Errors come back as
+    {"ok": false, "error": code, "message": ...}, the game's exceptions mapped through ERROR_CODES. Other
+    connections in the game get {"event": "moved", ...} lines. Bot moves are computed in an executor so the
+    event loop keeps serving, and games idle for idle_seconds are suspended to their to_bytes snapshot. Seats
+    belong to the connection that took them, so games no connection plays in any more and finished games idle
+    for idle_seconds are removed. A bot move that fails is logged and sent to the game's connections as
+    {"event": "error", ...}. Games are hosted on the given Checkers backend"""
+    def __init__(self, idle_seconds=300.0, suspend_dir=None, workers=1, bot_options=None, backend="objects"):
+        if backend not in BACKENDS:
+            raise ValueError("Backend can only be one of " + ", ".join(BACKENDS))
+        self._sessions = {}
+        self._backend = backend
+        self._ids = itertools.count(1)
+        self._idle_seconds = idle_seconds
+        self._suspend_dir = suspend_dir
+        # spawned rather than forked, so worker processes don't inherit the sockets of open connections
+        self._executor = ProcessPoolExecutor(max(1, workers), mp_context=multiprocessing.get_context("spawn"))
+        self._bot_options = bot_options or {"time_limit": 0.5, "max_depth": 64, "playouts": None, "table_mb": 4}
+        self._server = None
+        self._sweeper = None
+        # running bot moves, kept so they aren't garbage collected and their errors are retrieved
+        self._bot_tasks = set()
+
+    def get_session_count(self):
+        """
+        Returns the number of hosted games, suspended ones included
+
+        :return: Int
+        """
+        return len(self._sessions)
+
+    def get_session(self, game_id):
+        """
+        Returns the Session of a hosted game, suspended or not, or None if there is no such game
+
+        :param game_id: Int
+        :return: Session object or None
+        """
+        return self._sessions.get(game_id)
+
+    def get_active_count(self):
+        """
+        Returns the number of hosted games currently held as Checkers objects
+
+        :return: Int
+        """
+        return sum(1 for session in self._sessions.values() if session.game is not None)
+
+    async def start(self, host="127.0.0.1", port=8765):
+        """
+        Starts listening and the idle game sweep
+
+        :param host: String
+        :param port: Int, 0 picks a free port
+        :return: asyncio Server object
+        """
+        self._server = await asyncio.start_server(self.handle_connection, host, port)
+        self._sweeper = asyncio.ensure_future(self._sweep())
+        return self._server
+
+    async def close(self):
+        """
+        Stops listening, the sweep and the bot executor
+
+        :return: None
+        """
+        if self._sweeper is not None:
+            self._sweeper.cancel()
+        for task in list(self._bot_tasks):
+            task.cancel()
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        self._executor.shutdown(wait=False)
+
+    async def handle_connection(self, reader, writer):
+        """
+        Serves one client connection until it closes
+
+        :param reader: asyncio StreamReader
+        :param writer: asyncio StreamWriter
+        :return: None
+        """
+        # game id to the player name this connection plays as
+        seats = {}
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                try:
+                    request = json.loads(line)
+                    if not isinstance(request, dict):
+                        raise ValueError("Requests must be JSON objects")
+                    response = await self.handle(request, seats, writer)
+                except ProtocolError as error:
+                    response = {"ok": False, "error": error.code, "message": str(error)}
+                except tuple(ERROR_CODES) as error:
+                    response = {"ok": False, "error": ERROR_CODES[type(error)], "message": str(error)}
+                except (KeyError, TypeError, ValueError) as error:
+                    response = {"ok": False, "error": "bad_request", "message": str(error)}
+                send(writer, response)
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            for game_id in seats:
+                session = self._sessions.get(game_id)
+                if session is not None:
+                    session.clients.discard(writer)
+            writer.close()
+
+    async def handle(self, request, seats, writer):
+        """
+        Handles one request from a connection
+
+        :param request: Dictionary
+        :param seats: Dictionary of game id to player name for the connection
+        :param writer: asyncio StreamWriter of the connection
+        :return: Dictionary response
+        """
+        operation = request["op"]
+        if operation == "create":
+            return await self._create(request, seats, writer)
+        if operation == "join":
+            return self._join(request, seats, writer)
+        if operation == "move":
+            return await self._move(request, seats)
+        if operation == "state":
+            game_id = request["game"]
+            return dict(state(self._resume(game_id).game), ok=True, game=game_id)
+        if operation == "stats":
+            return dict(Checkers.stats(), ok=True, games=self.get_session_count(), active=self.get_active_count())
+        raise ProtocolError("bad_request", "Unknown op: " + str(operation))
+
+    async def _create(self, request, seats, writer):
+        """
+        Creates a game with the client in the color asked for, against a bot if one is named
+
+        :param request: Dictionary with name, color and optionally bot
+        :param seats: Dictionary
+        :param writer: asyncio StreamWriter
+        :return: Dictionary response
+        """
+        bot = request.get("bot")
+        if bot is not None and bot not in BOTS:
+            raise ProtocolError("bad_request", "Bot can only be one of " + ", ".join(BOTS))
+        name = text_field(request, "name")
+        if bot is not None and name == BOT_NAME:
+            raise ProtocolError("name_taken", "This name is used by the bot")
+        game = Checkers(backend=self._backend)
+        color = game.create_player(name, text_field(request, "color")).get_color_code()
+        session = Session(game)
+        if bot is not None:
+            session.bot = bot
+            session.bot_color = OPPONENT[color]
+            game.create_player(BOT_NAME, COLOR_NAMES[OPPONENT[color]])
+        game_id = next(self._ids)
+        self._sessions[game_id] = session
+        seats[game_id] = name
+        session.clients.add(writer)
+        if bot is not None and session.bot_color == BLACK:
+            self._start_bot(game_id)
+        return {"ok": True, "game": game_id, "color": COLOR_NAMES[color]}
+
+    def _join(self, request, seats, writer):
+        """
+        Seats the client in the empty color of a game
+
+        :param request: Dictionary with game and name
+        :param seats: Dictionary
+        :param writer: asyncio StreamWriter
+        :return: Dictionary response
+        """
+        game_id = request["game"]
+        name = text_field(request, "name")
+        game = self._resume(game_id).game
+        players = game.get_players()
+        if len(players) == 2:
+            raise ProtocolError("game_full", "Both players are already seated")
+        if name in players.values():
+            raise ProtocolError("name_taken", "The other player has this name")
+        color = WHITE if "Black" in players else BLACK
+        game.create_player(name, COLOR_NAMES[color])
+        seats[game_id] = name
+        session = self._sessions[game_id]
+        session.clients.add(writer)
+        self._notify(session, {"event": "joined", "game": game_id, "name": name, "color": COLOR_NAMES[color]},
+                     writer)
+        return {"ok": True, "game": game_id, "color": COLOR_NAMES[color]}
+
+    async def _move(self, request, seats):
+        """
+        Plays one play_game step for the connection's player, checked against the legal moves, then lets the
+        bot answer if it is its turn
+
+        :param request: Dictionary with game, from and to
+        :param seats: Dictionary
+        :return: Dictionary response
+        """
+        game_id = request["game"]
+        session = self._resume(game_id)
+        game = session.game
+        if game_id not in seats:
+            raise InvalidPlayer("You are not playing in this game!")
+        if len(game.get_players()) < 2:
+            raise ProtocolError("not_ready", "Waiting for the other player to join")
+        start = tuple(request["from"])
+        destination = tuple(request["to"])
+        # negative indexes would get past valid_square_location, so only the board's dark squares are let through
+        if start not in SQUARE_OF or destination not in SQUARE_OF:
+            raise InvalidSquare("Not a valid choice!")
+        # pieces play_game rejects are left to its own exceptions
+        token = game.get_token(start)
+        if game.valid_player(seats[game_id]) and token is not None and \
+                token.get_color_code() == game.get_turn_code() and not self._legal_step(session, start, destination):
+            raise ProtocolError("illegal_move", "Not a legal move")
+        captures = game.play_game(seats[game_id], start, destination)
+        if captures is None:
+            raise ProtocolError("illegal_move", "Not a legal move")
+        self._after_step(session, destination)
+        response = dict(state(game), ok=True, game=game_id, captures=captures)
+        self._notify(session, {"event": "moved", "game": game_id, "from": list(start), "to": list(destination),
+                               "turn": response["turn"], "winner": response["winner"]})
+        if session.bot is not None and response["winner"] is None and game.get_turn_code() == session.bot_color:
+            self._start_bot(game_id)
+        return response
+
+    def _legal_step(self, session, start, destination):
+        """
+        Returns True if start to destination is the next step of a legal move, continuing the capture chain
+        if one is under way
+
+        :param session: Session object
+        :param start: Tuple (row, column)
+        :param destination: Tuple (row, column)
+        :return: Bool
+        """
+        if session.chain is not None and start != session.chain:
+            return False
+        return any(move[0] == start and move[1] == destination for move in session.game.legal_moves())
+
+    def _after_step(self, session, destination):
+        """
+        Records where a capture chain continues from after a step, clearing it once the turn has passed
+
+        :param session: Session object
+        :param destination: Tuple (row, column)
+        :return: None
+        """
+        token = session.game.get_token(destination)
+        if token is not None and token.get_color_code() == session.game.get_turn_code():
+            session.chain = destination
+        else:
+            session.chain = None
+        session.last_used = time.monotonic()
+
+    def _start_bot(self, game_id):
+        """
+        Starts computing the bot's move for a game as a task the server keeps until it is done
+
+        :param game_id: Int
+        :return: None
+        """
+        task = asyncio.ensure_future(self._bot_turn(game_id))
+        self._bot_tasks.add(task)
+        task.add_done_callback(functools.partial(self._bot_done, game_id))
+
+    def _bot_done(self, game_id, task):
+        """
+        Done callback of a bot move task: logs an error the move failed with and sends it to the game's connections
+
+        :param game_id: Int
+        :param task: asyncio Task
+        :return: None
+        """
+        self._bot_tasks.discard(task)
+        if task.cancelled() or task.exception() is None:
+            return
+        error = task.exception()
+        logger.error("Bot move failed in game %s", game_id, exc_info=error)
+        session = self._sessions.get(game_id)
+        if session is not None:
+            self._notify(session, {"event": "error", "game": game_id, "error": "bot_failed",
+                                   "message": type(error).__name__ + ": " + str(error)})
+
+    async def _bot_turn(self, game_id):
+        """
+        Computes the bot's move in the executor from a snapshot of the game, then plays it
+
+        :param game_id: Int
+        :return: None
+        """
+        session = self._resume(game_id)
+        session.busy = True
+        try:
+            loop = asyncio.get_running_loop()
+            move = await loop.run_in_executor(self._executor, bot_move, session.game.to_bytes(), session.bot,
+                                              self._bot_options)
+        finally:
+            session.busy = False
+        game = session.game
+        if move is None or game.get_turn_code() != session.bot_color:
+            return
+        game.play_move(BOT_NAME, move)
+        session.chain = None
+        session.last_used = time.monotonic()
+        update = state(game)
+        self._notify(session, {"event": "moved", "game": game_id, "move": [list(square) for square in move],
+                               "turn": update["turn"], "winner": update["winner"]})
+
+    def _notify(self, session, message, skip=None):
+        """
+        Sends an event line to the connections in a game
+
+        :param session: Session object
+        :param message: Dictionary
+        :param skip: asyncio StreamWriter not to send to, or None
+        :return: None
+        """
+        for writer in list(session.clients):
+            if writer is skip:
+                continue
+            if writer.is_closing():
+                session.clients.discard(writer)
+            else:
+                send(writer, message)
+
+    def _resume(self, game_id):
+        """
+        Returns the session of a game, restoring the game from its snapshot if it was suspended
+
+        :param game_id: Int
+        :return: Session object
+        """
+        session = self._sessions.get(game_id)
+        if session is None:
+            raise ProtocolError("unknown_game", "No game " + str(game_id))
+        if session.game is None:
+            if session.path is not None:
+                session.game = Checkers.from_file(session.path)
+                os.remove(session.path)
+                session.path = None
+            else:
+                session.game = Checkers.from_bytes(session.snapshot)
+                session.snapshot = None
+        session.last_used = time.monotonic()
+        return session
+
+    def suspend_idle(self, now=None):
+        """
+        Replaces the games idle for longer than idle_seconds with their snapshots, written to suspend_dir if
+        there is one and kept in memory otherwise. Games waiting for the next step of a capture chain stay active
+
+        :param now: Float time.monotonic value, the current time by default
+        :return: Int number of games suspended
+        """
+        now = time.monotonic() if now is None else now
+        suspended = 0
+        for game_id, session in self._sessions.items():
+            # a game in the middle of a capture chain is kept, the snapshot doesn't hold where the chain continues
+            if session.game is None or session.busy or session.chain is not None or \
+                    now - session.last_used < self._idle_seconds:
+                continue
+            try:
+                if self._suspend_dir is not None:
+                    path = os.path.join(self._suspend_dir, str(game_id) + ".game")
+                    session.game.to_file(path)
+                    session.path = path
+                else:
+                    session.snapshot = session.game.to_bytes()
+            except OSError:
+                # the game stays active and is tried again on the next sweep
+                logger.exception("Could not suspend game %s", game_id)
+                continue
+            session.game = None
+            suspended += 1
+        return suspended
+
+    def expire(self, now=None):
+        """
+        Removes the games no connection is seated in any more, which nobody can play again, and the finished games
+        idle for longer than idle_seconds, deleting their snapshot files
+
+        :param now: Float time.monotonic value, the current time by default
+        :return: Int number of games removed
+        """
+        now = time.monotonic() if now is None else now
+        expired = []
+        for game_id, session in self._sessions.items():
+            if session.busy:
+                continue
+            if not session.clients:
+                expired.append(game_id)
+            elif session.game is not None and now - session.last_used >= self._idle_seconds and \
+                    state(session.game)["winner"] is not None:
+                expired.append(game_id)
+        for game_id in expired:
+            session = self._sessions.pop(game_id)
+            if session.path is not None:
+                try:
+                    os.remove(session.path)
+                except OSError:
+                    logger.exception("Could not remove the snapshot of game %s", game_id)
+        return len(expired)
+
+    async def _sweep(self):
+        """
+        Removes expired games and suspends idle ones every few seconds while the server runs. Errors are logged
+        and the sweep carries on
+
+        :return: None
+        """
+        while True:
+            await asyncio.sleep(min(max(self._idle_seconds, 1.0), 10.0))
+            try:
+                self.expire()
+                self.suspend_idle()
+            except Exception:
+                logger.exception("Idle game sweep failed")
+
+
+def state(game):
+    """
+    Returns the JSON-ready state of a game
+
+    :param game: Checkers object
+    :return: Dictionary
+    """
+    players = game.get_players()
+    winner = None
+    if len(players) == 2:
+        winner = game.game_winner()
+        if winner == "Game has not ended":
+            winner = None
+    return {"board": game.get_board_dm(), "turn": game.get_turn(), "players": players, "winner": winner}
+
+
+def text_field(request, key):
+    """
+    Returns a string field of a request, raising ProtocolError with bad_request if it is missing or not a string
+
+    :param request: Dictionary
+    :param key: String
+    :return: String
+    """
+    value = request.get(key)
+    if not isinstance(value, str):
+        raise ProtocolError("bad_request", "Field " + key + " must be a string")
+    return value
+
+
+def send(writer, message):
+    """
+    Queues one JSON line on a connection
+
+    :param writer: asyncio StreamWriter
+    :param message: Dictionary
+    :return: None
+    """
+    writer.write(json.dumps(message).encode("utf-8") + b"\n")
+
+
+def bot_move(snapshot, name, options):
+    """
+    Executor side of a bot move: restores the game from its snapshot onto BitBoard masks, which is all the bots
+    search with, and returns the bot's move
+
+    :param snapshot: Bytes from Checkers.to_bytes
+    :param name: String, one of Simulator.BOTS
+    :param options: Dictionary of bot options
+    :return: List of tuples or None
+    """
+    if name not in _worker_bots:
+        _worker_bots[name] = make_bot(name, None, options)
+    return _worker_bots[name].choose_move(Checkers.from_bytes(snapshot, backend="bitboard"))
+
+
+async def serve(options):
+    """
+    Runs a server until cancelled
+
+    :param options: Dictionary of server options
+    :return: None
+    """
+    server = GameServer(options["idle_seconds"], options["suspend_dir"], options["workers"],
+                        {"time_limit": options["time_limit"], "max_depth": 64, "playouts": None, "table_mb": 4},
+                        options["backend"])
+    if options["stats_file"]:
+        install_signal_handlers(options["stats_file"])
+    listener = await server.start(options["host"], options["port"])
+    print("Serving on", ", ".join(str(sock.getsockname()) for sock in listener.sockets))
+    try:
+        await listener.serve_forever()
+    finally:
+        await server.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Host checkers games over TCP, one JSON request per line")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--workers", type=int, default=1, help="processes computing bot moves")
+    parser.add_argument("--time-limit", type=float, default=0.5, help="seconds per bot move")
+    parser.add_argument("--idle-seconds", type=float, default=300.0, help="idle time before a game is suspended")
+    parser.add_argument("--suspend-dir", help="write suspended games here instead of keeping them in memory")
+    parser.add_argument("--backend", choices=BACKENDS, default="objects", help="Checkers backend games are hosted on")
+    parser.add_argument("--stats-file", help="SIGUSR1 writes instrumentation stats here, SIGUSR2 toggles recording")
+    try:
+        asyncio.run(serve(vars(parser.parse_args())))
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,164 @@
+import argparse
+import json
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+from CheckersGame import Checkers, BACKENDS
+from Engine import AlphaBetaEngine
+from MCTS import MCTSEngine
+
+BOTS = ("random", "alphabeta", "mcts")
+
+
+class RandomBot:
+    """Bot playing a uniformly random legal move, the cheapest opponent for load generation"""
+    def __init__(self, seed=None):
+        self._random = random.Random(seed)
+
+    def choose_move(self, game):
+        """
+        Returns a random legal move for the side to move, or None if there is none
+
+        :param game: Checkers object
+        :return: List of tuples or None
+        """
+        moves = game.legal_moves()
+        if not moves:
+            return None
+        return self._random.choice(moves)
+
+
+def make_bot(name, seed, options):
+    """
+    Creates a bot by name: "random", "alphabeta" or "mcts"
+
+    :param name: String
+    :param seed: Int
+    :param options: Dictionary with time_limit, max_depth, playouts and table_mb
+    :return: Bot object with a choose_move(game) method
+    """
+    if name == "random":
+        return RandomBot(seed)
+    if name == "alphabeta":
+        return AlphaBetaEngine(time_limit=options["time_limit"], max_depth=options["max_depth"],
+                               table_mb=options["table_mb"])
+    if name == "mcts":
+        return MCTSEngine(playouts=options["playouts"], time_limit=options["time_limit"], seed=seed)
+    raise ValueError("Bot can only be one of " + ", ".join(BOTS))
+
+
+def play_one(black, white, max_moves, record=None, backend="bitboard"):
+    """
+    Plays one game between two bots without any prompts or board printing. A side with no legal move
+    loses, a game reaching max_moves plies or repeating a position three times is a draw
+
+    :param black: Bot object playing Black
+    :param white: Bot object playing White
+    :param max_moves: Int
+    :param record: List to append a (position hash, color, move) tuple to for every ply played, or None
+    :param backend: String, Checkers backend the game is played on
+    :return: Tuple (winner "Black", "White" or None for a draw, Int plies played)
+    """
+    game = Checkers(backend=backend)
+    game.create_player("Black", "Black")
+    game.create_player("White", "White")
+    bots = {"Black": black, "White": white}
+    seen = {}
+    for ply in range(max_moves):
+        turn = game.get_turn()
+        move = bots[turn].choose_move(game)
+        if move is None:
+            return ("White" if turn == "Black" else "Black"), ply
+        if record is not None:
+            record.append((game.get_hash(), turn, move))
+        game.play_move(turn, move)
+        seen[game.get_hash()] = seen.get(game.get_hash(), 0) + 1
+        if seen[game.get_hash()] == 3:
+            return None, ply + 1
+    return None, max_moves
+
+
+def run_games(first, count, options):
+    """
+    Plays a batch of games in the current process, reusing the two bots across the batch
+
+    :param first: Int, index of the first game, used to seed the bots
+    :param count: Int
+    :param options: Dictionary of simulator options
+    :return: List of (winner, plies) tuples
+    """
+    black = make_bot(options["black"], options["seed"] + 2 * first, options)
+    white = make_bot(options["white"], options["seed"] + 2 * first + 1, options)
+    return [play_one(black, white, options["max_moves"], backend=options["backend"]) for game in range(count)]
+
+
+def simulate(options):
+    """
+    Plays options["games"] games across options["workers"] processes and returns throughput and result totals
+
+    :param options: Dictionary of simulator options
+    :return: Dictionary
+    """
+    games = options["games"]
+    workers = max(1, options["workers"])
+    # about four batches per worker so a slow batch doesn't hold up the rest
+    batch = max(1, games // (workers * 4))
+    batches = [(first, min(batch, games - first)) for first in range(0, games, batch)]
+    start = time.perf_counter()
+    if workers == 1:
+        results = [result for first, count in batches for result in run_games(first, count, options)]
+    else:
+        with ProcessPoolExecutor(workers) as pool:
+            futures = [pool.submit(run_games, first, count, options) for first, count in batches]
+            results = [result for future in futures for result in future.result()]
+    elapsed = time.perf_counter() - start
+
+    plies = sum(length for winner, length in results)
+    return {
+        "games": len(results),
+        "seconds": elapsed,
+        "games_per_second": len(results) / elapsed if elapsed else 0.0,
+        "moves_per_second": plies / elapsed if elapsed else 0.0,
+        "average_length": plies / len(results) if results else 0.0,
+        "black_wins": sum(1 for winner, length in results if winner == "Black"),
+        "white_wins": sum(1 for winner, length in results if winner == "White"),
+        "draws": sum(1 for winner, length in results if winner is None),
+    }
+
+
+def main(argv=None):
+    """
+    Command line entry point: plays a batch of bot games and prints a throughput report
+
+    :param argv: List of strings, defaults to sys.argv
+    :return: Dictionary report
+    """
+    parser = argparse.ArgumentParser(description="Headless batch self-play between checkers bots")
+    parser.add_argument("--games", type=int, default=100)
+    parser.add_argument("--black", choices=BOTS, default="random")
+    parser.add_argument("--white", choices=BOTS, default="random")
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--max-moves", type=int, default=200, help="plies before a game is called a draw")
+    parser.add_argument("--time-limit", type=float, default=0.05, help="seconds per move for search bots")
+    parser.add_argument("--max-depth", type=int, default=64)
+    parser.add_argument("--playouts", type=int, default=None, help="MCTS playouts per move")
+    parser.add_argument("--table-mb", type=int, default=4)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--backend", choices=BACKENDS, default="bitboard", help="Checkers backend games are played on")
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    options = vars(parser.parse_args(argv))
+
+    report = simulate(options)
+    if options["json"]:
+        print(json.dumps(report, indent=2))
+    else:
+        print("Games:          ", report["games"], "in", round(report["seconds"], 2), "s")
+        print("Games/sec:      ", round(report["games_per_second"], 2))
+        print("Moves/sec:      ", round(report["moves_per_second"], 1))
+        print("Average length: ", round(report["average_length"], 1), "plies")
+        print("Black | White | Draw:", report["black_wins"], "|", report["white_wins"], "|", report["draws"])
+    return report
+
+
+if __name__ == "__main__":
+    main()
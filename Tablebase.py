@@ -0,0 +1,289 @@
+import argparse
+import mmap
+import struct
+import sys
+import time
+from array import array
+from itertools import combinations, product
+from math import comb
+from BitBoard import BitBoard
+
+# results, from the point of view of the side to move
+DRAW = 0
+WON = 1
+LOST = 2
+# index slots that can't occur in a game, such as a Regular piece on its crowning row
+INVALID = 3
+# entries are 2 bytes: result in the top 2 bits, distance to the end of the game in plies below
+DISTANCE_MASK = (1 << 14) - 1
+
+MAGIC = b"LBTB"
+VERSION = 1
+# magic, version, maximum pieces
+HEADER = struct.Struct("<4sHH")
+ENTRY = struct.Struct("<H")
+
+# piece kinds in index order
+KINDS = (("Black", "Regular"), ("Black", "King"), ("Black", "TripleKing"),
+         ("White", "Regular"), ("White", "King"), ("White", "TripleKing"))
+KIND_CODES = {kind: code for code, kind in enumerate(KINDS)}
+
+
+class Tablebase:
+    """Read side of an endgame tablebase file written by generate(). The file is memory-mapped, so lookups
+    only read the 2-byte entries they need and nothing is loaded up front. Results are from the point of view
+    of the side to move: WON, LOST or DRAW, with the number of plies until the game ends under best play"""
+    def __init__(self, path):
+        self._file = open(path, "rb")
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, pieces = HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC or version != VERSION:
+            self.close()
+            raise ValueError("Not a version " + str(VERSION) + " tablebase file: " + str(path))
+        self._pieces = pieces
+
+    def get_pieces(self):
+        """
+        Returns the largest number of pieces on the board the file covers
+
+        :return: Int
+        """
+        return self._pieces
+
+    def close(self):
+        """
+        Unmaps and closes the file
+
+        :return: None
+        """
+        self._map.close()
+        self._file.close()
+
+    def probe(self, board):
+        """
+        Looks up a BitBoard position
+
+        :param board: BitBoard object
+        :return: Tuple (result, distance), or None if the position has too many pieces
+        """
+        if board.piece_count("Black") + board.piece_count("White") > self._pieces:
+            return None
+        return self._lookup(position_index(board_pieces(board), board.get_turn()))
+
+    def probe_game(self, game):
+        """
+        Looks up the current position of a Checkers game
+
+        :param game: Checkers object
+        :return: Tuple (result, distance), or None if the position has too many pieces
+        """
+        return self.probe(game.to_bitboard())
+
+    def _lookup(self, index):
+        """
+        Reads and unpacks one entry
+
+        :param index: Int
+        :return: Tuple (result, distance)
+        """
+        entry = ENTRY.unpack_from(self._map, HEADER.size + ENTRY.size * index)[0]
+        return entry >> 14, entry & DISTANCE_MASK
+
+
+def table_offset(count):
+    """
+    Returns the index of the first entry for positions with the given number of pieces. Each count takes
+    C(32, count) square sets * 6^count piece kinds * 2 sides to move
+
+    :param count: Int
+    :return: Int
+    """
+    return sum(comb(32, fewer) * 6 ** fewer * 2 for fewer in range(count))
+
+
+def position_index(pieces, turn):
+    """
+    Returns the tablebase index of a position: colexicographic rank of the occupied squares, then the piece
+    kinds as base 6 digits, then the side to move
+
+    :param pieces: List of (square, kind code) tuples sorted by square
+    :param turn: "Black" or "White"
+    :return: Int
+    """
+    rank = 0
+    kinds = 0
+    for place, (square, kind) in enumerate(pieces):
+        rank += comb(square, place + 1)
+        kinds = kinds * 6 + kind
+    return table_offset(len(pieces)) + (rank * 6 ** len(pieces) + kinds) * 2 + (turn == "White")
+
+
+def is_valid(pieces):
+    """
+    Returns False for piece sets that can't come up in a game: a Regular piece on its crowning row would
+    already have been crowned
+
+    :param pieces: List of (square, kind code) tuples
+    :return: Bool
+    """
+    for square, kind in pieces:
+        if (kind == KIND_CODES["Black", "Regular"] and square < 4) or \
+                (kind == KIND_CODES["White", "Regular"] and square >= 28):
+            return False
+    return True
+
+
+def solve(pieces):
+    """
+    Retrograde solves every position with up to the given number of pieces, fewest pieces first so every
+    capture leads into a finished table
+
+    :param pieces: Int
+    :return: array of 2-byte entries covering every index below table_offset(pieces + 1)
+    """
+    table = array("H", bytes(ENTRY.size * table_offset(pieces + 1)))
+    # an empty board: the side to move has no pieces and has lost
+    table[0] = table[1] = LOST << 14
+    for count in range(1, pieces + 1):
+        solve_count(count, table)
+    return table
+
+
+def solve_count(count, table):
+    """
+    Solves every position with exactly count pieces in place. Finished games are LOST at distance 0. Pass d
+    then marks a position WON at distance d if a move leads to a position LOST in fewer than d plies, or LOST
+    at distance d if every move leads to a position WON in fewer than d plies, so each distance is the
+    shortest win or longest loss. Positions left when the passes stop changing anything are draws
+
+    :param count: Int
+    :param table: array of entries, solved for every smaller count
+    :return: None
+    """
+    indices = array("I")
+    starts = array("I", [0])
+    successors = array("I")
+    for squares in combinations(range(32), count):
+        for kinds in product(range(6), repeat=count):
+            pieces = list(zip(squares, kinds))
+            for turn in ("Black", "White"):
+                index = position_index(pieces, turn)
+                if not is_valid(pieces):
+                    table[index] = INVALID << 14
+                    continue
+                board = build_board(pieces, turn)
+                moves = board.legal_moves()
+                if not moves:
+                    table[index] = LOST << 14
+                    continue
+                for move in moves:
+                    after = board.copy()
+                    after.play(move)
+                    successors.append(board_index(after))
+                indices.append(index)
+                starts.append(len(successors))
+
+    # distances already in the smaller tables can be picked up by any pass up to one past the longest
+    longest = max(entry & DISTANCE_MASK for entry in table)
+    pending = range(len(indices))
+    distance = 1
+    while pending:
+        unsolved = []
+        for slot in pending:
+            won = False
+            lost = True
+            for successor in successors[starts[slot]:starts[slot + 1]]:
+                entry = table[successor]
+                if (entry & DISTANCE_MASK) >= distance:
+                    lost = False
+                elif entry >> 14 == LOST:
+                    won = True
+                    break
+                elif entry >> 14 != WON:
+                    lost = False
+            if won:
+                table[indices[slot]] = (WON << 14) | min(distance, DISTANCE_MASK)
+            elif lost:
+                table[indices[slot]] = (LOST << 14) | min(distance, DISTANCE_MASK)
+            else:
+                unsolved.append(slot)
+        if len(unsolved) == len(pending) and distance > longest:
+            break
+        pending = unsolved
+        distance += 1
+
+
+def build_board(pieces, turn):
+    """
+    Builds a BitBoard from (square, kind code) tuples
+
+    :param pieces: List of tuples
+    :param turn: "Black" or "White"
+    :return: BitBoard object
+    """
+    masks = {"Black": 0, "White": 0, "King": 0, "TripleKing": 0}
+    for square, kind in pieces:
+        color, kind_name = KINDS[kind]
+        masks[color] |= 1 << square
+        if kind_name != "Regular":
+            masks[kind_name] |= 1 << square
+    return BitBoard(masks["Black"], masks["White"], masks["King"], masks["TripleKing"], turn)
+
+
+def board_pieces(board):
+    """
+    Returns the pieces of a BitBoard position as (square, kind code) tuples sorted by square
+
+    :param board: BitBoard object
+    :return: List of tuples
+    """
+    black, white, kings, triple_kings = board.get_masks()
+    occupied = black | white
+    pieces = []
+    while occupied:
+        low = occupied & -occupied
+        occupied ^= low
+        color = "Black" if black & low else "White"
+        kind = "TripleKing" if triple_kings & low else "King" if kings & low else "Regular"
+        pieces.append((low.bit_length() - 1, KIND_CODES[color, kind]))
+    return pieces
+
+
+def board_index(board):
+    """
+    Returns the tablebase index of a BitBoard position
+
+    :param board: BitBoard object
+    :return: Int
+    """
+    return position_index(board_pieces(board), board.get_turn())
+
+
+def generate(pieces, path):
+    """
+    Solves every position with up to the given number of pieces and writes the tablebase file
+
+    :param pieces: Int
+    :param path: String
+    :return: Dictionary of counts per result and seconds taken
+    """
+    start = time.perf_counter()
+    table = solve(pieces)
+    with open(path, "wb") as output:
+        output.write(HEADER.pack(MAGIC, VERSION, pieces))
+        if sys.byteorder == "big":
+            table.byteswap()
+        output.write(table.tobytes())
+    results = [0, 0, 0, 0]
+    for entry in table:
+        results[entry >> 14] += 1
+    return {"positions": len(table), "won": results[WON], "lost": results[LOST], "draw": results[DRAW],
+            "invalid": results[INVALID], "seconds": time.perf_counter() - start}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate an endgame tablebase file")
+    parser.add_argument("--pieces", type=int, default=3, help="largest number of pieces on the board")
+    parser.add_argument("--output", default="tablebase.bin")
+    options = parser.parse_args()
+    print(generate(options.pieces, options.output))
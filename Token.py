@@ -1,11 +1,19 @@
+from Codes import BLACK, WHITE, REGULAR, KING, TRIPLE_KING, COLOR_NAMES, TYPE_NAMES, COLOR_CODES, TYPE_CODES, \
+    OPPONENT, EMPTY, SQUARE_CODES
+
+
 class Token:
     """Represents a checkers piece token. Can take the form of a regular piece, King or Triple King. Includes
-    methods to move it based on official rules"""
+    methods to move it based on official rules. Color and type are kept as Color and PieceType codes in slots,
+    the string accessors translate them"""
+    __slots__ = ("_type", "_current_position", "_color")
+
     def __init__(self, position, color):
-        # can be "Regular", "King" or "TripleKing"
-        self._type = "Regular"
+        # REGULAR, KING or TRIPLE_KING
+        self._type = REGULAR
         self._current_position = position
-        self._color = color
+        # accepts "Black"/"White" or a Color code
+        self._color = COLOR_CODES[color]
 
     def get_color(self):
         """
@@ -13,6 +21,14 @@ class Token:
 
         :return: String
         """
+        return COLOR_NAMES[self._color]
+
+    def get_color_code(self):
+        """
+        Get method to return the current token's color as a Color code
+
+        :return: Color
+        """
         return self._color
 
     def change_position(self, position):
@@ -26,12 +42,12 @@ class Token:
 
     def change_type(self, type):
         """
-        Changes the current token's type. Input can be "King" or "TripleKing"
+        Changes the current token's type. Input can be "King" or "TripleKing", or a PieceType code
 
-        :param type: String
+        :param type: String or PieceType
         :return: None
         """
-        self._type = type
+        self._type = TYPE_CODES[type]
 
     def get_position(self):
         """
@@ -47,43 +63,27 @@ class Token:
 
         :return: String
         """
+        return TYPE_NAMES[self._type]
+
+    def get_type_code(self):
+        """
+        Get method to return the current token's type as a PieceType code
+
+        :return: PieceType
+        """
         return self._type
 
     def get_possible_moves(self):
         """
-        Returns possible moves for the current token leveraging regular_move_logic and king_move_logic
+        Returns possible moves for the current token from the precomputed diagonal tables. Regular tokens get their
+        2 forward diagonals, King and TripleKing tokens all 4. The lists are shared table entries and must not
+        be modified
 
         :return: Array of arrays
         """
-        row, column = self._current_position
-
-        if self._type == "Regular":
-            # black piece logic
-            if self._color == "Black":
-                return self.regular_move_logic("White", row, column)
-
-            # white piece logic
-            elif self._color == "White":
-                return self.regular_move_logic("Black", row, column)
-
-        elif self._type == "King":
-            # black_king piece logic
-            if self._color == "Black":
-                # can move one forwards or backwards for non capture
-                # when possible to capture, can go on any diagonal space as long as only 1 is captured
-                # no need for enemies to be adjacent
-                return self.king_move_logic("White", row, column)
-
-            # white_king piece logic
-            elif self._color == "White":
-                return self.king_move_logic("Black", row, column)
-
-        elif self._type == "TripleKing":
-            # including "OK" for triple parameter to display all diagonal pieces regardless of color
-            if self._color == "Black":
-                return self.king_move_logic("White", row, column)
-            elif self._color == "White":
-                return self.king_move_logic("Black", row, column)
+        if self._type == REGULAR:
+            return REGULAR_MOVES[self._color][self._current_position]
+        return KING_MOVES[self._current_position]
 
     def regular_move_logic(self, color, row_pos, column_pos):
         """
@@ -98,63 +98,12 @@ class Token:
         :param column_pos: Int
         :return: Array of arrays
         """
-        diagonal_above_left = []
-        diagonal_buffer = [(7, 0), (6, 1), (5, 2), (4, 3), (3, 4), (2, 5), (1, 6), (0, 7)]
-        check = (row_pos, column_pos) in diagonal_buffer
-
         # current player is black
         if color == "White":
-            if row_pos == 0 or check:
-                buffer = 1
-            else:
-                buffer = 0
-
-            for index in range(1, min(row_pos, column_pos) + 1):
-                if row_pos - index not in range(8) or column_pos - index not in range(8):
-                    pass
-                else:
-                    diagonal_above_left.append((row_pos - index, column_pos - index))
-
-            #print("from move logic, above left: ",diagonal_above_left)
-
-            diagonal_above_right = []
-            for index in range(1, min(row_pos, 8 - column_pos) + buffer):
-                if row_pos - index not in range(8) or column_pos + index not in range(8):
-                    pass
-                else:
-                    diagonal_above_right.append((row_pos - index, column_pos + index))
-
-            #print("from move logic, above right:", diagonal_above_right)
-            moves = [diagonal_above_left, diagonal_above_right]
-            return moves
-
+            return REGULAR_MOVES[BLACK][(row_pos, column_pos)]
         # current player is white
         if color == "Black":
-            if check:
-                buffer = 1
-            elif column_pos == 7:
-                buffer = 0
-            else:
-                buffer = 1
-
-            diagonal_bottom_right = []
-            for index in range(1, min(8 - row_pos, 8 - column_pos)):
-                if row_pos + index not in range(8) or column_pos + index not in range(8):
-                    pass
-                else:
-                    diagonal_bottom_right.append((row_pos + index, column_pos + index))
-            #print("from move logic, bottom right: ", diagonal_bottom_right)
-
-            diagonal_bottom_left = []
-            for index in range(1, min(8 - row_pos, column_pos) + buffer):
-                if row_pos + index not in range(8) or column_pos - index not in range(8):
-                    pass
-                else:
-                    diagonal_bottom_left.append((row_pos + index, column_pos - index))
-            #print("from move logic, bottom left: ", diagonal_bottom_left)
-
-            moves = [diagonal_bottom_right, diagonal_bottom_left]
-            return moves
+            return REGULAR_MOVES[WHITE][(row_pos, column_pos)]
 
     def king_move_logic(self, color, row_pos, column_pos):
         """
@@ -168,121 +117,116 @@ class Token:
         :param column_pos: Int
         :return: Array of arrays
         """
-        diagonal_buffer = [(6, 1), (5, 2), (4, 3), (3, 4), (2, 5), (1, 6), (7, 0)]
-        check = (row_pos, column_pos) in diagonal_buffer
-        if color == "White":
-            if row_pos == 0 or check:
-                buffer = 1
-            else:
-                buffer = 0
-
-        # current player is white
-        elif color == "Black":
-            if check:
-                buffer = 1
-            elif column_pos == 7:
-                buffer = 0
-            else:
-                buffer = 1
-
-        diagonal_above_left = []
-        for index in range(1, min(row_pos, column_pos) + 1):
-            if row_pos - index not in range(8) or column_pos - index not in range(8):
-                pass
-            else:
-                diagonal_above_left.append((row_pos - index, column_pos - index))
-
-        #print("from move logic, above left: ",diagonal_above_left)
-
-        diagonal_above_right = []
-        for index in range(1, min(row_pos, 8 - column_pos) + buffer):
-            if row_pos - index not in range(8) or column_pos + index not in range(8):
-                pass
-            else:
-                diagonal_above_right.append((row_pos - index, column_pos + index))
-
-        #print("from move logic, above right:" ,diagonal_above_right)
-
-        diagonal_bottom_right = []
-        for index in range(1, min(8 - row_pos, 8 - column_pos)):
-            if row_pos + index not in range(8) or column_pos + index not in range (8):
-                pass
-            else:
-                diagonal_bottom_right.append((row_pos + index, column_pos + index))
-
-        #print("from move logic, bottom right: ", diagonal_bottom_right)
-
-        diagonal_bottom_left = []
-        for index in range(1, min(8 - row_pos, column_pos) + buffer):
-            if row_pos + index not in range(8) or column_pos - index not in range(8):
-                pass
-            else:
-                diagonal_bottom_left.append((row_pos + index, column_pos - index))
-
-        #print("from move logic, bottom left: ", diagonal_bottom_left)
-
-        moves = [diagonal_above_left, diagonal_bottom_right, diagonal_above_right, diagonal_bottom_left]
-        return moves
+        return KING_MOVES[(row_pos, column_pos)]
 
     def possible_jumps(self, moves_list, board):
         """
         Takes a current position and possible moves list. If a jump is possible, returns > 0 if true
-        ,else 0
+        ,else 0. The board can be a grid of square codes or of the names get_board_dm returns
 
         :param moves_list: List
         :param board: List of Lists
         :return: Int (0 if no jumps possible, n > 0 for number of jumps possible)
         """
-        jumps = 0
-        if self._color == "Black":
-            foe = "White"
-        elif self._color == "White":
-            foe = "Black"
+        if isinstance(board[0][1], str):
+            board = board_codes(board)
+        return len(self.jump_moves(moves_list, board))
 
-        # Translate board rows to strings for evaluation
+    def jump_moves(self, moves_list, board):
+        """
+        Takes the possible moves list and board and returns every single jump the token can make as
+        (destination, captured squares) pairs:
+        Regular: adjacent foe on a forward diagonal with the square right behind it open
+        King: any distance over exactly one foe, landing on any open square behind it
+        TripleKing: any distance over friendly pieces, capturing one or two foes, landing on any open square
+
+        :param moves_list: List
+        :param board: List of Lists of square codes, as from Checkers.get_board_codes
+        :return: List of tuples (Tuple (row, column), List of tuples)
+        """
+        foe = OPPONENT[self._color]
+
+        jumps = []
         for diagonal in moves_list:
-            translated_list = []
-            if len(diagonal) == 0:
-                pass
-            for move in diagonal:
-                row, column = move
-                translated_list.append(board[row][column])
-            #print("translated list: ", translated_list)
-            if self._type == "King" or self._type == "Regular":
-                for space in range(len(translated_list)):
-                    if translated_list[space] == "OK":
-                        continue
-                    elif translated_list[space] != "OK":
-                        if self._type == "King":
-                            if translated_list[space] != foe:
-                                continue
-                            elif space < (len(translated_list) - 1) and translated_list[space + 1] == foe:
-                                continue
-                            elif space < (len(translated_list) - 1) and translated_list[space + 1] == "OK":
-                                if translated_list[space - 1] != foe:
-                                    jumps += 1
-                        if self._type == "Regular":
-                            # skip if only 1 move possible
-                            if len(translated_list) == 1:
-                                pass
-                            elif space == 0 and translated_list[space] == foe and translated_list[space + 1] == "OK":
-                                jumps += 1
-
-            elif self._type == "TripleKing":
-                # Establish enemy piece
-                friendly = 0
-                opposing = 0
-                for square in translated_list:
-                    if square == "OK":
-                        if opposing == 2:
-                            jumps += 1
-                        elif opposing == 1:
-                            jumps += 1
-                        elif opposing > 2:
-                            continue
-                    elif square == foe:
-                        opposing += 1
+            if self._type == REGULAR:
+                if len(diagonal) > 1:
+                    (row, column), (next_row, next_column) = diagonal[0], diagonal[1]
+                    if board[row][column] == foe and board[next_row][next_column] == EMPTY:
+                        jumps.append((diagonal[1], [diagonal[0]]))
+
+            elif self._type == KING:
+                captured = None
+                for square in diagonal:
+                    space = board[square[0]][square[1]]
+                    if space == EMPTY:
+                        if captured is not None:
+                            jumps.append((square, [captured]))
+                    elif space == foe and captured is None:
+                        captured = square
                     else:
-                        friendly += 1
+                        # a friendly piece or a second foe blocks the diagonal
+                        break
+
+            elif self._type == TRIPLE_KING:
+                captured = []
+                for square in diagonal:
+                    space = board[square[0]][square[1]]
+                    if space == EMPTY:
+                        if captured:
+                            jumps.append((square, list(captured)))
+                    elif space == foe:
+                        if len(captured) == 2:
+                            break
+                        captured.append(square)
+                    # friendly pieces are jumped over
         return jumps
 
+
+def board_codes(board):
+    """
+    Translates a board of color names ("OK" when empty, None for light squares) into a grid of square codes
+
+    :param board: List of Lists of strings
+    :return: List of Lists of Color codes, EMPTY or None
+    """
+    return [[SQUARE_CODES[square] for square in row] for row in board]
+
+
+def build_ray(row_pos, column_pos, direction):
+    """
+    Returns the squares along one diagonal from a position, nearest first, up to the edge of the board
+
+    :param row_pos: Int
+    :param column_pos: Int
+    :param direction: Tuple (row step, column step)
+    :return: List of tuples
+    """
+    row_step, column_step = direction
+    ray = []
+    row, column = row_pos + row_step, column_pos + column_step
+    while 0 <= row < 8 and 0 <= column < 8:
+        ray.append((row, column))
+        row, column = row + row_step, column + column_step
+    return ray
+
+
+# Diagonal tables, built once at import. RAYS maps (square, direction) to its ray of squares, the move tables
+# group them in the order get_possible_moves has always returned them
+ABOVE_LEFT = (-1, -1)
+ABOVE_RIGHT = (-1, 1)
+BOTTOM_RIGHT = (1, 1)
+BOTTOM_LEFT = (1, -1)
+
+RAYS = {}
+# indexed by Color code
+REGULAR_MOVES = ({}, {})
+KING_MOVES = {}
+for _row in range(8):
+    for _column in range(8):
+        for _direction in (ABOVE_LEFT, ABOVE_RIGHT, BOTTOM_RIGHT, BOTTOM_LEFT):
+            RAYS[(_row, _column), _direction] = build_ray(_row, _column, _direction)
+        _square = (_row, _column)
+        REGULAR_MOVES[BLACK][_square] = [RAYS[_square, ABOVE_LEFT], RAYS[_square, ABOVE_RIGHT]]
+        REGULAR_MOVES[WHITE][_square] = [RAYS[_square, BOTTOM_RIGHT], RAYS[_square, BOTTOM_LEFT]]
+        KING_MOVES[_square] = [RAYS[_square, ABOVE_LEFT], RAYS[_square, BOTTOM_RIGHT], RAYS[_square, ABOVE_RIGHT],
+                               RAYS[_square, BOTTOM_LEFT]]
@@ -0,0 +1,107 @@
+from array import array
+from BitBoard import encode_move, decode_move
+
+# bound types stored with each score, 0 marks an empty slot
+EXACT = 1
+LOWER = 2
+UPPER = 3
+
+# bytes per slot across the parallel arrays: key (8), depth (1), score (4), bound (1), move (8)
+ENTRY_BYTES = 22
+
+
+class TranspositionTable:
+    """Fixed-size cache of search results keyed by 64-bit position hash (Checkers.get_hash). Slots live in
+    preallocated parallel arrays sized from a memory cap in MB, so the table never grows. Each entry stores the
+    search depth, score, bound type (EXACT, LOWER or UPPER) and best move.
+    Replacement schemes:
+    "depth" - buckets of two slots, one kept for the deepest result and one always replaced
+    "always" - one slot per bucket, always replaced"""
+    def __init__(self, size_mb=16, replacement="depth"):
+        if replacement not in ("depth", "always"):
+            raise ValueError("Replacement scheme can only be 'depth' or 'always'!")
+        self._replacement = replacement
+        self._ways = 2 if replacement == "depth" else 1
+        entries = max(int(size_mb * 1024 * 1024) // ENTRY_BYTES, self._ways)
+        self._buckets = entries // self._ways
+        size = self._buckets * self._ways
+        self._keys = array("Q", bytes(8 * size))
+        self._depths = array("b", bytes(size))
+        self._scores = array("i", bytes(4 * size))
+        self._bounds = array("B", bytes(size))
+        self._moves = array("Q", bytes(8 * size))
+        self._probes = 0
+        self._hits = 0
+
+    def get_size(self):
+        """
+        Returns the number of slots in the table
+
+        :return: Int
+        """
+        return len(self._keys)
+
+    def get_memory(self):
+        """
+        Returns the bytes held by the slot arrays
+
+        :return: Int
+        """
+        return self.get_size() * ENTRY_BYTES
+
+    def get_stats(self):
+        """
+        Returns the probe and hit counts since the table was created or cleared
+
+        :return: Dictionary
+        """
+        return {"probes": self._probes, "hits": self._hits, "slots": self.get_size(),
+                "filled": self.get_size() - self._bounds.count(0)}
+
+    def clear(self):
+        """
+        Empties every slot and resets the stats
+
+        :return: None
+        """
+        size = self.get_size()
+        self._bounds = array("B", bytes(size))
+        self._probes = 0
+        self._hits = 0
+
+    def probe(self, key):
+        """
+        Looks up a position hash. Returns (depth, score, bound, move) if stored, move being a list of squares
+        (empty if none was stored), otherwise None
+
+        :param key: Int, 64-bit position hash
+        :return: Tuple or None
+        """
+        self._probes += 1
+        slot = (key % self._buckets) * self._ways
+        for index in range(slot, slot + self._ways):
+            if self._bounds[index] and self._keys[index] == key:
+                self._hits += 1
+                return self._depths[index], self._scores[index], self._bounds[index], decode_move(self._moves[index])
+        return None
+
+    def store(self, key, depth, score, bound, move):
+        """
+        Stores a search result. With the "depth" scheme the first slot of a bucket only gives way to
+        results searched at least as deep (or for the same position), anything else goes to the second slot
+
+        :param key: Int, 64-bit position hash
+        :param depth: Int, remaining search depth of the result
+        :param score: Int
+        :param bound: Int (EXACT, LOWER or UPPER)
+        :param move: List of squares or None
+        :return: None
+        """
+        index = (key % self._buckets) * self._ways
+        if self._ways == 2 and self._bounds[index] and self._keys[index] != key and depth < self._depths[index]:
+            index += 1
+        self._keys[index] = key
+        self._depths[index] = max(-128, min(depth, 127))
+        self._scores[index] = score
+        self._bounds[index] = bound
+        self._moves[index] = encode_move(move) if move else 0
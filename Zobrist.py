@@ -0,0 +1,37 @@
+import random
+from Codes import WHITE, COLOR_CODES, COLOR_NAMES, TYPE_NAMES
+
+
+def position_hash(tokens, turn):
+    """
+    Computes the 64-bit Zobrist key of a position from scratch: the XOR of the key of every token's
+    (color, type, square), plus WHITE_TO_MOVE when it is White's turn. Checkers keeps the same key up to date
+    incrementally, this is used to start it and to check it
+
+    :param tokens: Iterable of Token objects
+    :param turn: "Black" or "White", or a Color code
+    :return: Int
+    """
+    key = 0
+    for token in tokens:
+        key ^= PIECE_KEYS[token.get_color_code(), token.get_type_code()][token.get_position()]
+    if COLOR_CODES[turn] == WHITE:
+        key ^= WHITE_TO_MOVE
+    return key
+
+
+# Keys are drawn once at import from a fixed seed so the same position hashes the same in every process,
+# which files keyed by position hash rely on
+SEED = 20230601
+_generator = random.Random(SEED)
+
+# keyed by (color, type) codes
+PIECE_KEYS = {}
+for _color in range(len(COLOR_NAMES)):
+    for _type in range(len(TYPE_NAMES)):
+        PIECE_KEYS[_color, _type] = {}
+        for _row in range(8):
+            for _column in range(8):
+                if (_row + _column) % 2 == 1:
+                    PIECE_KEYS[_color, _type][(_row, _column)] = _generator.getrandbits(64)
+WHITE_TO_MOVE = _generator.getrandbits(64)